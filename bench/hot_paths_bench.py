@@ -0,0 +1,175 @@
+"""
+Measures the simulation hot paths on synthetic leagues
+
+    python bench/hot_paths_bench.py
+    python bench/hot_paths_bench.py --teams 12 16 --games 9 --played 0 0.5 0.9
+    python bench/hot_paths_bench.py --save-baseline
+
+Each combination of --teams, --games and --played is a case (see league.py).
+For each case, the micro numbers are the microseconds per call of
+SeasonSnapshot.roll, the championship seeder, ConferenceSeasonOutcomes +=,
+WeekOutcomes += and Simulator |= (merging two simulators of --iterations
+seasons each), best of --repeat. The end-to-end numbers are the seasons a
+second of Simulator.simulate and the peak RSS of a fresh process simulating
+--iterations seasons.
+
+The numbers are compared with the baseline file if there is one, and the
+process exits with status 1 if anything is more than --tolerance worse.
+--save-baseline writes the numbers to the baseline file instead.
+"""
+import argparse
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from league import synthetic_season
+
+from simulator import Simulator
+from sports.season import SeasonSnapshot
+from sports.outcomes import ConferenceSeasonOutcomes
+
+default_baseline = Path(__file__).resolve().parent / "hot_paths_baseline.json"
+
+higher_is_better = {"seasons_per_second"}
+
+
+def best_microseconds(call: Callable[[], object], calls: int, repeat: int) -> float:
+    """The best of `repeat` runs of `call` `calls` times, in microseconds per call"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def micro(season: SeasonSnapshot, samples: int, iterations: int, repeat: int) -> dict[str, float]:
+    random.seed(0)
+    results = {"roll_us": best_microseconds(lambda: season.roll(random.random), samples, repeat)}
+
+    rolled = [season.roll(random.random).conference(conference.name) for _ in range(samples) for conference in season.conferences]
+    for conference in rolled:
+        conference.standings
+    seeding = itertools.cycle(rolled)
+    def seed():
+        conference = next(seeding)
+        conference.championship_seeder(conference.team_names, conference.teams, conference.standings)
+    results["seed_us"] = best_microseconds(seed, len(rolled), repeat)
+
+    ccg_teams = [tuple(sorted(conference.championship_game_participants)) for conference in rolled]
+    adding = itertools.cycle(zip(rolled, ccg_teams))
+    conference_outcomes = ConferenceSeasonOutcomes()
+    def add_conference():
+        nonlocal conference_outcomes
+        conference_outcomes += next(adding)
+    results["conference_iadd_us"] = best_microseconds(add_conference, len(rolled), repeat)
+
+    week_outcomes = Simulator(season).week_outcomes
+    week_adding = itertools.cycle(rolled)
+    def add_week():
+        conference = next(week_adding)
+        week_outcomes[conference.name] += conference
+    results["week_iadd_us"] = best_microseconds(add_week, len(rolled), repeat)
+
+    simulators = [Simulator(season) for _ in range(repeat + 1)]
+    for simulator in simulators:
+        simulator.simulate(iterations)
+    merge = float("inf")
+    for simulator in simulators[1:]:
+        # merging into a fresh copy of the first each time, as the parent merges each worker once
+        merged = Simulator(season)
+        merged |= simulators[0]
+        start = time.perf_counter()
+        merged |= simulator
+        merge = min(merge, time.perf_counter() - start)
+    results["merge_us"] = merge * 1e6
+    return results
+
+
+def end_to_end(season: SeasonSnapshot, iterations: int) -> dict[str, float]:
+    """Run in a fresh process, so the peak RSS is this simulation's alone"""
+    random.seed(0)
+    simulator = Simulator(season)
+    start = time.perf_counter()
+    simulator.simulate(iterations)
+    seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+    return {"seasons_per_second": iterations / seconds, "peak_rss_mb": peak_rss / 1e6}
+
+
+def case_name(teams: int, games: int, played: float) -> str:
+    return f"teams={teams},games={games},played={played}"
+
+
+def run(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    cases = {}
+    context = multiprocessing.get_context("spawn")
+    for teams, games, played in itertools.product(args.teams, args.games, args.played):
+        name = case_name(teams, games, played)
+        season = synthetic_season(teams, games, played, args.conferences)
+        results = micro(season, args.samples, args.iterations, args.repeat)
+        with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+            results |= executor.submit(end_to_end, season, args.iterations).result()
+        cases[name] = results
+        print(name)
+        for metric, value in results.items():
+            print(f"    {metric:<22}{value:>12.1f}")
+    return cases
+
+
+def regressions(cases: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]], tolerance: float) -> list[str]:
+    """The metrics that are more than `tolerance` (a fraction) worse than the baseline"""
+    worse = []
+    for name, results in cases.items():
+        for metric, value in results.items():
+            base = baseline.get(name, {}).get(metric)
+            if not base or not value:
+                continue
+            change = base / value - 1 if metric in higher_is_better else value / base - 1
+            if change > tolerance:
+                worse.append(f"{name} {metric}: {base:.1f} -> {value:.1f} ({change:+.0%})")
+    return worse
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--teams", type=int, nargs="+", default=[16], help="Teams in each conference (default: 16)")
+    parser.add_argument("--games", type=int, nargs="+", default=[9], help="Conference games for each team (default: 9)")
+    parser.add_argument("--played", type=float, nargs="+", default=[0.5], help="Fraction of the games already played (default: 0.5)")
+    parser.add_argument("--conferences", type=int, default=1, help="Conferences in the league (default: 1)")
+    parser.add_argument("--samples", type=int, default=500, help="Calls per micro measurement (default: 500)")
+    parser.add_argument("--iterations", type=int, default=5000, help="Seasons simulated end to end, and by each merged simulator (default: 5000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of each micro measurement, of which the best is kept (default: 3)")
+    parser.add_argument("--baseline", type=Path, default=default_baseline, help=f"The baseline file (default: {default_baseline.name})")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the numbers to the baseline file instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="How much worse than the baseline is a regression (default: 0.2)")
+    args = parser.parse_args()
+
+    cases = run(args)
+
+    if args.save_baseline:
+        environment = {"python": platform.python_version(), "machine": platform.machine(), "system": platform.system(), "processor": platform.processor()}
+        arguments = {"conferences": args.conferences, "samples": args.samples, "iterations": args.iterations, "repeat": args.repeat}
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment, "arguments": arguments, "cases": cases}, f, indent=2)
+        print(f"Saved baseline to {args.baseline}")
+    elif args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        compared = [name for name in cases if name in baseline["cases"]]
+        print(f"Compared {len(compared)} of {len(cases)} cases with {args.baseline.name} ({baseline['environment']['python']} on {baseline['environment']['machine']})")
+        worse = regressions(cases, baseline["cases"], args.tolerance)
+        for line in worse:
+            print(f"REGRESSION {line}")
+        if worse:
+            sys.exit(1)
@@ -0,0 +1,67 @@
+"""
+Measures how long main.py takes to import, and how long a simulation worker takes to start
+
+    python bench/import_bench.py
+
+Each import is timed in a fresh interpreter. Worker startup is the time from
+creating a process pool to the first result of a task from main, with both the
+fork and spawn start methods (spawned workers import main again themselves).
+"""
+import argparse
+import concurrent.futures
+import multiprocessing
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+src = Path(__file__).resolve().parent.parent / "src"
+sys.path.insert(0, str(src))
+
+
+def import_seconds(statement: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"], cwd=src, capture_output=True, text=True, check=True).stdout
+        timings.append(float(output.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def heaviest_imports(module: str, count: int) -> list[tuple[str, float]]:
+    """The top-level imports of `module` that take longest, with their cumulative seconds"""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=src, capture_output=True, text=True, check=True).stderr
+    imports = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # direct imports of the module are indented by three spaces
+        if name.startswith("   ") and not name.startswith("    "):
+            imports.append((name.strip(), int(cumulative) / 1e6))
+    return sorted(imports, key=lambda item: -item[1])[:count]
+
+
+def worker_startup_seconds(start_method: str, workers: int) -> float:
+    import main
+
+    start = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(start_method)) as executor:
+        list(executor.map(main._standard_error, range(workers), [100] * workers))
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5, help="How many times to time each import (default: 5)")
+    parser.add_argument("--workers", type=int, default=4, help="How many workers to start (default: 4)")
+    args = parser.parse_args()
+
+    print(f"{'import main':<32}{import_seconds('import main', args.repeat) * 1000:>8.1f}ms")
+    print(f"{'import main, figures':<32}{import_seconds('import main, figures', args.repeat) * 1000:>8.1f}ms")
+    print(f"{'import main, scraping libraries':<32}{import_seconds('import main, requests, bs4', args.repeat) * 1000:>8.1f}ms")
+    print("heaviest imports of main:")
+    for name, seconds in heaviest_imports("main", 5):
+        print(f"  {name:<30}{seconds * 1000:>8.1f}ms")
+    for start_method in ("fork", "spawn"):
+        print(f"{f'{args.workers} {start_method} workers ready':<32}{worker_startup_seconds(start_method, args.workers) * 1000:>8.1f}ms")
@@ -0,0 +1,63 @@
+"""
+Made-up seasons for benchmarking
+
+A synthetic league is one or more conferences of made-up teams, each playing a
+round-robin schedule (one round a week) with some fraction of the rounds
+already played. Played games have random scores, and unplayed games have
+random win probabilities. The first unplayed round is tomorrow, so the
+simulator has games for this week's outcomes. The same seed always gives the
+same season.
+"""
+import datetime
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from sports.season import SeasonSnapshot, Conference, Game, TeamName
+from sports import tiebreakers
+
+
+def _rounds(teams: list[TeamName], count: int) -> list[list[tuple[TeamName, TeamName]]]:
+    """The first `count` rounds of a round-robin between `teams` (by the circle method)"""
+    if len(teams) % 2:
+        teams = teams + [None]
+    rounds = []
+    order = list(teams)
+    for _ in range(min(count, len(order) - 1)):
+        pairs = [(order[i], order[len(order) - 1 - i]) for i in range(len(order) // 2)]
+        rounds.append([pair for pair in pairs if None not in pair])
+        order = [order[0], order[-1]] + order[1:-1]
+    return rounds
+
+
+def synthetic_season(teams: int = 16, games: int = 9, played: float = 0.5, conferences: int = 1, seed: int = 0, year: int = 2024) -> SeasonSnapshot:
+    """
+    A season of `conferences` conferences of `teams` teams, each playing
+    `games` conference games, of which the first `played` fraction are over
+    """
+    if games >= teams + teams % 2:
+        raise ValueError(f"{teams} teams can't each play {games} different opponents")
+    rng = random.Random(seed)
+    played_rounds = round(played * games)
+    first_unplayed = datetime.date.today() + datetime.timedelta(days=1)
+
+    all_conferences: set[Conference] = set()
+    all_games: set[Game] = set()
+    for c in range(conferences):
+        name = f"C{c}"
+        team_names = [f"{name} Team {t:02}" for t in range(teams)]
+        all_conferences.add(Conference(name, set(team_names), None, True, tiebreakers.big12_championship_seeder))
+        strength = {team: rng.gauss(0, 1) for team in team_names}
+        for r, pairs in enumerate(_rounds(team_names, games)):
+            date = first_unplayed + datetime.timedelta(days=7 * (r - played_rounds))
+            for a, b in pairs:
+                if r < played_rounds:
+                    a_wins = rng.random() < 0.5 + 0.15 * (strength[a] - strength[b])
+                    score = (rng.randint(21, 45), rng.randint(0, 20))
+                    all_games.add(Game(date, a, b, False, score if a_wins else score[::-1], None))
+                else:
+                    probability = min(0.95, max(0.05, 0.5 + 0.15 * (strength[a] - strength[b])))
+                    all_games.add(Game(date, a, b, False, None, round(probability, 3)))
+    return SeasonSnapshot(year, all_conferences, all_games)
@@ -0,0 +1,96 @@
+"""
+Measures how long logo-heavy figures take to draw with and without the logo cache
+
+    python bench/logo_bench.py
+
+The logo table is like the "CCG Matchups Given Winners This Week" table, with
+random logos in every cell. It's drawn once as it was before the cache, with
+plottable's `image` cells (a subplot per cell, decoding every logo as it's
+drawn), and then with the cached logos: cold (decoding each logo once), from
+the atlas file, and warm.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(root / "src"))
+os.chdir(root)
+
+import figures
+import logos
+import matplotlib.pyplot as plt
+import pandas as pd
+from plottable import ColumnDefinition, Table, plots
+
+teams = ["BYU", "Colorado", "Iowa St", "Kansas St", "Baylor", "TCU", "Utah", "UCF", "Houston", "Kansas", "Cincinnati", "Texas Tech", "West Virginia", "Oklahoma St"]
+
+
+def logo_table(rows: int, games: int) -> tuple[list[list[str]], list[str]]:
+    cells = []
+    for _ in range(rows):
+        row = [figures._get_cropped_team_logo_path(random.choice(teams)) if random.random() < 0.7 else figures._get_team_logo_path("any") for _ in range(games)]
+        row += ["12.3%", figures._get_cropped_team_logo_path(random.choice(teams)), "vs.", figures._get_cropped_team_logo_path(random.choice(teams))]
+        cells.append(row)
+    return cells, [f"Game {i}" for i in range(games)] + ["Probability", "CCG Team", "vs.", "CCG Team "]
+
+
+def uncached_logo_table_figure(title: str, cells: list[list[str]], col_labels: list[str]) -> plt.Figure:
+    """The logo table as it was drawn before the cache, with an image subplot per logo cell"""
+    df = pd.DataFrame({label: [row[i] for row in cells] for i, label in enumerate(col_labels)})
+    coldefs = [ColumnDefinition(name=label, textprops={"ha": "center"}, width=0.5, plot_fn=plots.image) for label in col_labels if label not in {"Probability", "vs."}]
+    coldefs.append(ColumnDefinition(name="vs.", textprops={"ha": "center"}, width=0.25))
+    coldefs.append(ColumnDefinition(name="Probability", textprops={"ha": "center"}, width=0.5))
+    fig = plt.figure(title, figsize=(20, 20/(len(col_labels) - 1)*(len(cells) + 1)))
+    Table(df, column_definitions=coldefs, index_col=col_labels[0])
+    return fig
+
+
+def draw_seconds(cells: list[list[str]], col_labels: list[str], logo_table=figures._logo_table_figure) -> float:
+    start = time.perf_counter()
+    for fig in (logo_table("Logo table", cells, col_labels), figures._bar_graph("Bars", teams, [10.0] * len(teams), teams=[(team,) for team in teams])):
+        fig.savefig(os.devnull, format="png", bbox_inches="tight")
+        plt.close(fig)
+    return time.perf_counter() - start
+
+
+def logo_keys(cells: list[list[str]]) -> set[logos.LogoKey]:
+    keys = {(path, figures._CELL_LOGO_SIZE) for row in cells for path in row[:-4] + [row[-3], row[-1]]}
+    return keys | {(figures._get_team_logo_path(team), figures._BAR_LOGO_SIZE) for team in teams}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=40, help="Rows in the logo table (default: 40)")
+    parser.add_argument("--games", type=int, default=6, help="Game columns in the logo table (default: 6)")
+    args = parser.parse_args()
+
+    random.seed(0)
+    cells, col_labels = logo_table(args.rows, args.games)
+
+    # plottable's image cells and undownsampled bar logos, as before the cache
+    # undownsampled bar logos, decoded as they're drawn
+    team_logo = figures._get_team_logo
+    figures._get_team_logo = lambda team: plt.imread(figures._get_team_logo_path(team))
+    print(f"{'uncached':<12}{draw_seconds(cells, col_labels, uncached_logo_table_figure):>8.2f}s")
+    figures._get_team_logo = team_logo
+
+    start = time.perf_counter()
+    logos.preload(logo_keys(cells))
+    decode = time.perf_counter() - start
+    print(f"{'cold':<12}{decode + draw_seconds(cells, col_labels):>8.2f}s  ({decode:.2f}s decoding {len(logos._logos)} logos)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        atlas = Path(directory) / "atlas.npz"
+        logos.save_atlas(atlas)
+        logos._logos.clear()
+        start = time.perf_counter()
+        logos.load_atlas(atlas)
+        load = time.perf_counter() - start
+        print(f"{'atlas':<12}{load + draw_seconds(cells, col_labels):>8.2f}s  ({load:.2f}s loading {atlas.stat().st_size / 1e6:.1f}MB)")
+
+    print(f"{'warm':<12}{draw_seconds(cells, col_labels):>8.2f}s")
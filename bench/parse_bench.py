@@ -0,0 +1,84 @@
+"""
+Compares the scores page parser with the BeautifulSoup parser it replaced
+
+    python bench/parse_bench.py
+    python bench/parse_bench.py --page data/massey_pages/scores_php_s_cf2024_sub_fbs_all_1_sch_on.html
+
+Without --page, made up FBS-sized and all-divisions-sized pages are parsed.
+"""
+import argparse
+import datetime
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from bs4 import BeautifulSoup
+
+import massey_standin
+import scraper
+from sports.season import Game
+
+_soup_game_pattern = re.compile(r"(?P<date>[1-9][0-9]{3}-[0-1][0-9]-[0-3][0-9])\s*(?P<visit1>@?)(?P<name1>(?:[^ ]+ ??)+)\s*(?P<score1>[0-9]+)\s*(?P<visit2>@?)(?P<name2>(?:[^ ]+ ??)+)\s*(?P<score2>[0-9]+) *(?:(?P<overtime>O[1-9])|(?P<scheduled>Sch))? *(?P<neutralsite>[^\n]*)?")
+
+
+def parse_scores_soup(content: bytes) -> set[Game]:
+    """The parser scrape_games used before parse_scores"""
+    soup = BeautifulSoup(content, "html.parser")
+    data = soup.find("pre").text
+    games: set[Game] = set()
+    for match in _soup_game_pattern.findall(data):
+        date, visit1, name1, score1, visit2, name2, score2, overtime, scheduled, neutralsite = match
+        team_a, team_b = (name2, name1) if visit1 else (name1, name2)
+        neutral = bool(neutralsite.strip())
+        score = (int(score2), int(score1)) if visit1 else (int(score1), int(score2))
+        if (0, 0) == score:
+            score = None
+        games.add(Game(datetime.datetime.strptime(date, "%Y-%m-%d").date(), team_a, team_b, neutral, score, None))
+    return games
+
+
+def made_up_page(teams: int, games_per_team: int) -> bytes:
+    rng = random.Random(teams)
+    names = [f"{rng.choice(['North', 'South', 'East', 'West', 'Central'])} Team {i}" for i in range(teams)]
+    start = datetime.date(2024, 8, 24)
+    lines = []
+    for i in range(teams * games_per_team // 2):
+        team_a, team_b = rng.sample(names, 2)
+        date = start + datetime.timedelta(days=rng.randrange(100))
+        played = date < datetime.date(2024, 10, 20)
+        score = (rng.randrange(60), rng.randrange(60)) if played else None
+        neutral = rng.random() < 0.05
+        lines.append(massey_standin._massey_line(Game(date, team_a, team_b, neutral, score, None)))
+    body = "\n".join(sorted(lines))
+    return f"<html><body><h1>Scores</h1><pre>\n{body}\n</pre></body></html>".encode()
+
+
+def bench(name: str, content: bytes, repeat: int):
+    lines = content.count(b"\n")
+    timings = {}
+    for parser in (parse_scores_soup, scraper.parse_scores):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            games = parser(content)
+        timings[parser.__name__] = ((time.perf_counter() - start) / repeat, games)
+    (soup_seconds, soup_games), (fast_seconds, fast_games) = timings.values()
+    same = "same games" if soup_games == fast_games else "DIFFERENT GAMES"
+    print(f"{name:<16}{lines:>7} lines  soup {soup_seconds * 1000:>8.1f}ms  fast {fast_seconds * 1000:>7.1f}ms  {soup_seconds / fast_seconds:>5.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page", type=Path, action="append", help="A recorded scores page to parse (may be repeated)")
+    parser.add_argument("--repeat", type=int, default=5, help="How many times to parse each page (default: 5)")
+    args = parser.parse_args()
+
+    if args.page:
+        for page in args.page:
+            bench(page.name[:16], page.read_bytes(), args.repeat)
+    else:
+        bench("FBS", made_up_page(134, 13), args.repeat)
+        bench("all divisions", made_up_page(3500, 12), args.repeat)
@@ -0,0 +1,51 @@
+"""
+Measures win probability scraping throughput against a local Massey stand-in
+
+    python bench/scrape_bench.py --games 200 --latency 0.05
+"""
+import argparse
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import massey_standin
+import scraper
+
+
+def bench(matchups: list[scraper.Matchup], team_ids: dict, max_in_flight: int, requests_per_second: float | None) -> float:
+    start = time.perf_counter()
+    scraper.scrape_win_probabilities(matchups, team_ids, max_in_flight, requests_per_second)
+    return time.perf_counter() - start
+
+
+def serial(matchups: list[scraper.Matchup], team_ids: dict) -> float:
+    start = time.perf_counter()
+    for matchup in matchups:
+        scraper.scrape_win_probability(*matchup, team_ids)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--games", type=int, default=200, help="The number of win probabilities to scrape (default: 200)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds the stand-in waits before answering (default: 0.05)")
+    parser.add_argument("--rate", type=float, default=None, help="Requests per second for the concurrent scrapers (default: unlimited)")
+    args = parser.parse_args()
+
+    team_ids = {f"Team {i}": str(i) for i in range(64)}
+    pairs = list(itertools.permutations(team_ids, 2))
+    matchups = [(a, b, random.random() < 0.1) for a, b in random.Random(0).sample(pairs, args.games)]
+
+    server = massey_standin.serve(massey_standin.MasseyStandIn(team_ids=team_ids, latency=args.latency))
+    scraper.massey_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    seconds = serial(matchups, team_ids)
+    print(f"{'serial, no session':<24}{seconds:>8.2f}s {len(matchups) / seconds:>8.1f} games/s")
+    for max_in_flight in (1, 4, 8, 16):
+        seconds = bench(matchups, team_ids, max_in_flight, args.rate)
+        print(f"{f'{max_in_flight} in flight':<24}{seconds:>8.2f}s {len(matchups) / seconds:>8.1f} games/s")
+    server.shutdown()
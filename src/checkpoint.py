@@ -0,0 +1,109 @@
+"""
+Checkpoints of a run's merged results, for resuming it after it stops
+
+A checkpoint holds, for every scheduler job, the merged result of its completed
+chunks, how many iterations those were and how many chunks it has handed out
+(the position of its random stream, since chunk n of a job is seeded from the
+run's seed, the job's key and n). It also holds a hash of the season snapshot
+and the run's settings, so a run is only resumed against the same season and
+settings. Chunks that were running when the checkpoint was saved are simply
+run again from new seeds.
+"""
+import hashlib
+import os
+import pickle
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Hashable
+
+from sports.season import SeasonSnapshot
+
+
+VERSION = 1
+
+
+def snapshot_hash(season: SeasonSnapshot) -> str:
+    """A hash of the season that doesn't depend on the order of its games"""
+    return hashlib.sha256("\n".join(sorted(season.serialize())).encode()).hexdigest()
+
+
+@dataclass
+class Checkpoint:
+    snapshot: str
+    config: dict[str, Any]
+    seed: int
+    jobs: dict[Hashable, dict[str, Any]]
+    """The result, completed iterations, seconds, chunks and failure of each job, by key"""
+    extra: dict[str, Any] = field(default_factory=dict)
+    version: int = VERSION
+
+    def mismatch(self, snapshot: str, config: dict[str, Any]) -> str | None:
+        """Why this checkpoint can't be resumed with the season and settings given, or None if it can"""
+        if snapshot != self.snapshot:
+            return "the season snapshot has changed"
+        different = sorted(key for key in config.keys() | self.config.keys() if config.get(key) != self.config.get(key))
+        if different:
+            return "different settings: " + ", ".join(f"{key} was {self.config.get(key)}, now {config.get(key)}" for key in different)
+        return None
+
+    def restore(self, jobs: list) -> int:
+        """Picks up each of the scheduler jobs where its checkpointed state left off; returns how many were"""
+        restored = 0
+        for job in jobs:
+            state = self.jobs.get(job.key)
+            if state is None:
+                continue
+            job.result = state["result"]
+            job.completed = job.scheduled = state["completed"]
+            job.seconds = state["seconds"]
+            job.chunks = state["chunks"]
+            job.failed = state["failed"]
+            restored += 1
+        return restored
+
+    @property
+    def completed(self) -> int:
+        return sum(state["completed"] for state in self.jobs.values())
+
+
+def load(path: Path | str) -> Checkpoint:
+    with open(path, "rb") as f:
+        loaded = pickle.load(f)
+    if not isinstance(loaded, Checkpoint) or loaded.version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} checkpoint")
+    return loaded
+
+
+def latest(directory: Path | str = "results") -> Path | None:
+    """The most recently saved checkpoint of any run in `directory`"""
+    return max(Path(directory).glob("*/*checkpoint.pickle"), key=lambda path: path.stat().st_mtime, default=None)
+
+
+class Checkpointer:
+    """Saves the state of `jobs` to `path` every `every` seconds, when told a chunk has been merged"""
+    def __init__(self, path: Path | str, jobs: list, snapshot: str, config: dict[str, Any], seed: int, every: float):
+        self.path = Path(path)
+        self.jobs = jobs
+        self.snapshot = snapshot
+        self.config = config
+        self.seed = seed
+        self.every = every
+        self.extra: dict[str, Any] = {}
+        self.__saved = time.monotonic()
+
+    def merged(self):
+        if time.monotonic() - self.__saved >= self.every:
+            self.save()
+
+    def save(self):
+        jobs = {
+            job.key: {"result": job.result, "completed": job.completed, "seconds": job.seconds, "chunks": job.chunks, "failed": job.failed}
+            for job in self.jobs
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            pickle.dump(Checkpoint(self.snapshot, self.config, self.seed, jobs, dict(self.extra)), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.path)
+        self.__saved = time.monotonic()
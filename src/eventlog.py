@@ -0,0 +1,201 @@
+"""
+An append-only log of how a season changed from day to day
+
+Each line of the log is an event observed on some date: a game being scheduled,
+a game's final score, a new win probability, a game being cancelled (or moved,
+which is a cancellation and a new schedule entry), or a conference's members.
+Events are appended in date order. Every so often the state of the season is
+compacted into a checkpoint, a binary snapshot that notes how much of the log
+it covers, so the season on any date can be rebuilt from the latest checkpoint
+before it and the few events after.
+"""
+import argparse
+import datetime
+import shutil
+from pathlib import Path
+from typing import Callable, Iterator
+
+from sports.season import SeasonSnapshot, Conference, Game, ConferenceName, ChampionshipSeeder
+from sports import binary_snapshot
+
+
+GameKey = tuple[datetime.date, str, str]
+
+SCHEDULE = "schedule"
+RESULT = "result"
+PROBABILITY = "probability"
+CANCEL = "cancel"
+CONFERENCE = "conference"
+
+
+def _key(game: Game) -> GameKey:
+    return game.date, game.team_a, game.team_b
+
+
+def _conference_key(conference: Conference) -> tuple:
+    divisions = frozenset((division.name, frozenset(division.team_names)) for division in conference.divisions or ())
+    return conference.name, frozenset(conference.teams), divisions, conference.has_championship_game
+
+
+class _State:
+    """The season as of some point in the log"""
+    def __init__(self, season: SeasonSnapshot | None = None):
+        self.conferences: dict[ConferenceName, Conference] = {conference.name: conference for conference in season.conferences} if season else {}
+        self.games: dict[GameKey, Game] = {_key(game): game for game in season.games} if season else {}
+
+    def apply(self, kind: str, payload: str):
+        if kind in (SCHEDULE, RESULT, PROBABILITY):
+            game = Game.deserialize(payload)
+            self.games[_key(game)] = game
+        elif kind == CANCEL:
+            game = Game.deserialize(payload)
+            del self.games[_key(game)]
+        elif kind == CONFERENCE:
+            conference = Conference.deserialize(payload.split("\t"), lambda conf: None)
+            self.conferences[conference.name] = conference
+        else:
+            raise ValueError(f"Unknown event: {kind}")
+
+    def events(self, season: SeasonSnapshot) -> Iterator[tuple[str, str]]:
+        """The events that turn this state into `season`"""
+        for conference in sorted(season.conferences, key=lambda conference: conference.name):
+            old = self.conferences.get(conference.name)
+            if old is None or _conference_key(old) != _conference_key(conference):
+                yield CONFERENCE, "\t".join(conference.serialize())
+        games = {_key(game): game for game in season.games}
+        for key in sorted(self.games.keys() - games.keys()):
+            yield CANCEL, self.games[key].serialize()
+        for key, game in sorted(games.items()):
+            old = self.games.get(key)
+            if old is None or old.neutral != game.neutral:
+                yield SCHEDULE, game.serialize()
+            elif old.final_score != game.final_score:
+                yield RESULT, game.serialize()
+            elif old.team_a_win_probability != game.team_a_win_probability:
+                yield PROBABILITY, game.serialize()
+
+    def season(self, year: int, championship_seeder_getter: Callable[[ConferenceName], ChampionshipSeeder | None]) -> SeasonSnapshot:
+        conferences = {Conference(c.name, c.teams, c.divisions, c.has_championship_game, championship_seeder_getter(c.name)) for c in self.conferences.values()}
+        return SeasonSnapshot(year, conferences, set(self.games.values()))
+
+
+class SeasonLog:
+    """
+    The event log of one season, stored in `directory` as {year}.log with its
+    checkpoints in {year}_checkpoints/
+    """
+    def __init__(self, directory: Path, year: int, checkpoint_every: int = 2000):
+        self.directory = Path(directory)
+        self.year = year
+        self.checkpoint_every = checkpoint_every
+        """How many events to append after a checkpoint before writing the next one"""
+
+    @property
+    def path(self) -> Path:
+        return self.directory / f"{self.year}.log"
+
+    @property
+    def __checkpoints_dir(self) -> Path:
+        return self.directory / f"{self.year}_checkpoints"
+
+    def __checkpoints(self) -> list[tuple[datetime.date, int, Path]]:
+        """The checkpoints, of the form (date, log offset, path), oldest first"""
+        checkpoints = []
+        for path in self.__checkpoints_dir.glob("*.bin"):
+            date, offset = path.stem.split("_")
+            checkpoints.append((datetime.date.fromisoformat(date), int(offset), path))
+        return sorted(checkpoints)
+
+    def __events(self, offset: int) -> Iterator[tuple[datetime.date, str, str, int]]:
+        """The events after `offset` in the log, of the form (date, kind, payload, offset after the event)"""
+        if not self.path.exists():
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # cut off by a crash while appending; the next record overwrites it
+                    break
+                offset += len(line)
+                as_of, kind, payload = line.decode().rstrip("\n").split("\t", 2)
+                yield datetime.date.fromisoformat(as_of), kind, payload, offset
+
+    def __state(self, date: datetime.date | None) -> tuple[_State, datetime.date | None, int, int]:
+        """
+        The state as of `date` (or the end of the log), with the date of its
+        last event, the log offset it covers and the events since the checkpoint
+        """
+        state = _State()
+        last_date = None
+        offset = 0
+        for checkpoint_date, checkpoint_offset, path in reversed(self.__checkpoints()):
+            if date is None or checkpoint_date <= date:
+                state = _State(binary_snapshot.load(path, lambda conf: None))
+                last_date, offset = checkpoint_date, checkpoint_offset
+                break
+        events = 0
+        for as_of, kind, payload, end in self.__events(offset):
+            if date is not None and as_of > date:
+                break
+            state.apply(kind, payload)
+            last_date, offset = as_of, end
+            events += 1
+        return state, last_date, offset, events
+
+    def dates(self) -> list[datetime.date]:
+        """The dates on which anything was recorded"""
+        dates = {date for date, _, _ in self.__checkpoints()}
+        dates.update(as_of for as_of, _, _, _ in self.__events(0))
+        return sorted(dates)
+
+    def record(self, date: datetime.date, season: SeasonSnapshot) -> int:
+        """Appends the changes from the last recorded season to `season`, as of `date`; returns the number of events"""
+        state, last_date, offset, events_since_checkpoint = self.__state(None)
+        if last_date is not None and date < last_date:
+            raise ValueError(f"Can't record {date} after {last_date}")
+        events = list(state.events(season))
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.truncate(offset)
+            for kind, payload in events:
+                f.write(f"{date}\t{kind}\t{payload}\n".encode())
+                state.apply(kind, payload)
+            offset = f.tell()
+
+        if events and events_since_checkpoint + len(events) >= self.checkpoint_every:
+            self.__checkpoints_dir.mkdir(exist_ok=True)
+            binary_snapshot.save(state.season(self.year, lambda conf: None), self.__checkpoints_dir / f"{date}_{offset}.bin")
+        return len(events)
+
+    def snapshot(self, date: datetime.date, championship_seeder_getter: Callable[[ConferenceName], ChampionshipSeeder | None]) -> SeasonSnapshot:
+        """The season as it was recorded on `date`"""
+        state, last_date, _, _ = self.__state(date)
+        if last_date is None:
+            raise ValueError(f"Nothing was recorded by {date}")
+        return state.season(self.year, championship_seeder_getter)
+
+
+def record_snapshots(log: SeasonLog, paths: list[Path]) -> int:
+    """Records the daily text snapshots at `paths` (named {date}_season.txt) in date order; returns the number of events"""
+    events = 0
+    for path in sorted(paths):
+        date = datetime.date.fromisoformat(path.name.removesuffix("_season.txt"))
+        with open(path, "r") as f:
+            season = SeasonSnapshot.deserialize(f.readlines(), lambda conf: None)
+        if season.year == log.year:
+            events += log.record(date, season)
+    return events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a season's event log from daily snapshot files")
+    parser.add_argument("year", type=int, help="The season")
+    parser.add_argument("snapshots", type=Path, nargs="+", help="The daily {date}_season.txt snapshots to record")
+    parser.add_argument("--log-dir", type=Path, default=Path("data/season_log"), help="Where the log is kept (default: data/season_log)")
+    args = parser.parse_args()
+
+    log = SeasonLog(args.log_dir, args.year)
+    log.path.unlink(missing_ok=True)
+    shutil.rmtree(args.log_dir / f"{args.year}_checkpoints", ignore_errors=True)
+    print(f"recorded {record_snapshots(log, args.snapshots)} events over {len(log.dates())} days in {log.path}")
@@ -0,0 +1,205 @@
+"""
+The simulated outcome tables as plain data
+
+Each table is a list of rows (dicts of names and numbers) computed straight from
+the outcome objects, so they can be written as JSON, CSV or Parquet without
+drawing anything. Probabilities are fractions, not rounded percentages.
+"""
+import csv
+import importlib.util
+import json
+from typing import Any
+
+from sports.season import TeamName, TeamNames, TeamPair
+from sports.outcomes import ConferenceSeasonOutcomes, ScenarioOutcomes, WeekOutcomes
+
+
+Row = dict[str, Any]
+Tables = dict[str, list[Row]]
+
+FORMATS = ("json", "csv", "parquet")
+
+
+def parquet_available() -> bool:
+    return importlib.util.find_spec("pandas") is not None and any(importlib.util.find_spec(engine) is not None for engine in ("pyarrow", "fastparquet"))
+
+
+def winner_combinations(matchups: list[TeamPair], number: int) -> list[TeamNames]:
+    if number > len(matchups):
+        raise ValueError()
+    def gen_winners(remaining_matchups: list[TeamPair], remaining_winners: int):
+        for i in range(len(remaining_matchups) - remaining_winners + 1):
+            if remaining_winners > 1:
+                for future_winners in gen_winners(remaining_matchups[i+1:], remaining_winners - 1):
+                    for winner in remaining_matchups[i]:
+                        yield (winner, *future_winners)
+            else:
+                for winner in remaining_matchups[i]:
+                    yield (winner,)
+    return list(gen_winners(matchups, number))
+
+
+def ordered_week_games(week: WeekOutcomes, interesting_teams: list[TeamName]) -> list[TeamPair]:
+    """This week's games, those of `interesting_teams` first"""
+    ordered_games: list[TeamPair] = []
+    for interesting_team in interesting_teams:
+        for game in week.games:
+            if interesting_team in game and game not in ordered_games:
+                ordered_games.append(game)
+    for game in sorted(week.games, key=lambda matchup: ",".join(matchup)):
+        if game not in ordered_games:
+            ordered_games.append(game)
+    return ordered_games
+
+
+def week_ccg_matchups(week: WeekOutcomes, ordered_games: list[TeamPair]) -> dict[TeamNames, tuple[TeamPair, float]]:
+    """
+    The fewest winners of this week's games that settle the most likely CCG
+    matchup, with that matchup and the probability of those teams winning
+    """
+    all_winners_to_ccg_matchups: dict[TeamNames, TeamPair] = {}
+    for winners in winner_combinations(ordered_games, len(ordered_games)):
+        ccg_matchup = next(iter(sorted(week.permutations[tuple(sorted(winners))].items(), key=lambda item: item[1], reverse=True)))[0]
+        all_winners_to_ccg_matchups[tuple(winners)] = ccg_matchup
+
+    shortened_winners_to_ccg_matchups: dict[TeamNames, tuple[TeamPair, float]] = {}
+    for i in range(1, len(ordered_games) + 1):
+        for winners in filter(lambda winners: not any(set(winners).issuperset(shortened_winners) for shortened_winners in shortened_winners_to_ccg_matchups.keys()), winner_combinations(ordered_games, i)):
+            matchup: TeamPair | None = None
+            for ccg_matchup in (ccg_matchup for all_winners, ccg_matchup in all_winners_to_ccg_matchups.items() if set(winners).issubset(all_winners)):
+                if matchup is None:
+                    matchup = tuple(sorted(ccg_matchup))
+                elif tuple(sorted(ccg_matchup)) != matchup:
+                    break
+            else:
+                if matchup:
+                    shortened_winners_to_ccg_matchups[winners] = (matchup, week.prob_of_winners(set(winners)))
+    return shortened_winners_to_ccg_matchups
+
+
+def ccg_probabilities(conference: ConferenceSeasonOutcomes) -> list[Row]:
+    return [{"team": team, "ccg_probability": conference.prob_in_ccg(team)} for team in sorted(conference.team_names)]
+
+
+def ccg_matchups(conference: ConferenceSeasonOutcomes) -> list[Row]:
+    return [
+        {"team_a": matchup[0], "team_b": matchup[1], "probability": count / conference.total_seasons}
+        for matchup, count in sorted(conference.ccg_participants.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def win_counts(conference: ConferenceSeasonOutcomes) -> list[Row]:
+    return [
+        {"team": team, "wins": wins, "probability": probability}
+        for team in sorted(conference.team_names)
+        for wins, probability in sorted(conference.prob_final_win_count(team).items(), reverse=True)
+    ]
+
+
+def ccg_probabilities_given_total_wins(conference: ConferenceSeasonOutcomes) -> list[Row]:
+    return [
+        {"team": team, "wins": 12 - losses, "ccg_probability": probability}
+        for team in sorted(conference.team_names)
+        for losses, probability in sorted(conference.prob_in_ccg_given_total_losses(team).items())
+    ]
+
+
+def scenarios(conference: ConferenceSeasonOutcomes, scenario_outcomes: list[ScenarioOutcomes], teams: list[TeamName]) -> list[Row]:
+    return [
+        {"scenario": scenario.description(", "), "scenario_probability": scenario.total_seasons / conference.total_seasons, "team": team, "ccg_probability": scenario.prob_in_ccg(team)}
+        for scenario in scenario_outcomes if scenario.total_seasons
+        for team in teams
+    ]
+
+
+def week_results(conference: ConferenceSeasonOutcomes, week: WeekOutcomes, ccg_targets: list[TeamName]) -> list[Row]:
+    """Each target's CCG probability given each result this week"""
+    rows = []
+    for ccg_target in ccg_targets:
+        starting_ccg_prob = conference.prob_in_ccg(ccg_target)
+        for away, home in week.games:
+            rows.append({
+                "ccg_target": ccg_target,
+                "away": away,
+                "home": home,
+                "ccg_probability": starting_ccg_prob,
+                "ccg_probability_if_away_wins": week.prob_in_ccg_given_winners({away}, ccg_target),
+                "ccg_probability_if_home_wins": week.prob_in_ccg_given_winners({home}, ccg_target),
+            })
+    return rows
+
+
+def week_ccg_outcomes(week: WeekOutcomes, interesting_teams: list[TeamName]) -> list[Row]:
+    ordered_games = ordered_week_games(week, interesting_teams)
+    rows = []
+    for winners, (matchup, probability) in sorted(week_ccg_matchups(week, ordered_games).items(), key=lambda item: item[1][1], reverse=True):
+        row: Row = {}
+        for game in ordered_games:
+            row[f"{game[0]} at {game[1]}"] = next((winner for winner in winners if winner in game), None)
+        row.update({"probability": probability, "ccg_team_a": matchup[0], "ccg_team_b": matchup[1]})
+        rows.append(row)
+    return rows
+
+
+def structured_scenarios(ccg_target: TeamName, table_data: list[list[ScenarioOutcomes | None]], row_labels: list[str], col_labels: list[str]) -> list[Row]:
+    """The cells of a scenario grid; impossible or failed cells have no probabilities"""
+    return [
+        {
+            "row": row_label,
+            "column": col_label.replace("\n", ", "),
+            "ccg_target": ccg_target,
+            "ccg_probability": scenario.prob_in_ccg(ccg_target) if scenario else None,
+            "scenario_probability": scenario.probability if scenario else None,
+            "seasons": scenario.total_seasons if scenario else 0,
+        }
+        for row_label, row in zip(row_labels, table_data)
+        for col_label, scenario in zip(col_labels, row)
+    ]
+
+
+def season_tables(conference: ConferenceSeasonOutcomes, scenario_outcomes: list[ScenarioOutcomes], week: WeekOutcomes, interesting_teams: list[TeamName]) -> Tables:
+    tables = {
+        "ccg-probabilities": ccg_probabilities(conference),
+        "ccg-matchups": ccg_matchups(conference),
+        "win-count-probs": win_counts(conference),
+        "ccg-probs-given-total-wins": ccg_probabilities_given_total_wins(conference),
+        "scenarios": scenarios(conference, scenario_outcomes, interesting_teams),
+    }
+    if week.total_count:
+        tables["ccg-probs-given-week-results"] = week_results(conference, week, interesting_teams)
+        tables["ccg-matchups-given-winners"] = week_ccg_outcomes(week, interesting_teams)
+    return tables
+
+
+def _csv_value(value: Any) -> Any:
+    return "" if value is None else value
+
+
+def write(tables: Tables, path_prefix: str, formats: list[str]) -> list[str]:
+    """Writes the tables in each of `formats`; returns the paths written"""
+    paths = []
+    for format in formats:
+        if format == "json":
+            path = f"{path_prefix}tables.json"
+            with open(path, "w") as f:
+                json.dump(tables, f, indent=2)
+            paths.append(path)
+        elif format == "csv":
+            for name, rows in tables.items():
+                path = f"{path_prefix}{name}.csv"
+                fieldnames = list(dict.fromkeys(key for row in rows for key in row))
+                with open(path, "w", newline="") as f:
+                    writer = csv.DictWriter(f, fieldnames)
+                    writer.writeheader()
+                    writer.writerows({key: _csv_value(value) for key, value in row.items()} for row in rows)
+                paths.append(path)
+        elif format == "parquet":
+            # pandas and a Parquet engine are only needed for this format
+            import pandas as pd
+            for name, rows in tables.items():
+                path = f"{path_prefix}{name}.parquet"
+                pd.DataFrame(rows).to_parquet(path, index=False)
+                paths.append(path)
+        else:
+            raise ValueError(f"Unknown export format: {format}")
+    return paths
@@ -0,0 +1,66 @@
+"""
+A cache of saved figures, keyed by a hash of the data they're drawn from
+
+A figure is drawn by a renderer (a partial of a drawing function and the
+summarized data it draws), so two figures drawn by the same function from the
+same data are the same image. The cache keeps the PNG of each figure it's given
+under a hash of its renderer and of a version string that changes whenever
+anything else that affects drawing does, so unchanged figures can be copied
+instead of drawn again.
+"""
+import functools
+import hashlib
+import os
+import pickle
+import shutil
+from pathlib import Path
+
+
+class FigureCache:
+    """
+    Figures saved in `directory`, as {key}.png. Once they take more than
+    `max_bytes`, the least recently used are removed.
+    """
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(render: functools.partial, version: str = "") -> str:
+        """A hash of what `render` draws: its function, the data bound to it and `version`"""
+        content = (render.func.__module__, render.func.__qualname__, render.args, sorted(render.keywords.items()), version)
+        return hashlib.sha256(pickle.dumps(content, protocol=5)).hexdigest()
+
+    def __path(self, key: str) -> Path:
+        return self.directory / f"{key}.png"
+
+    def get(self, key: str) -> Path | None:
+        """The cached figure for `key`, if there is one"""
+        path = self.__path(key)
+        try:
+            # marks it as recently used
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, figure_path: Path | str):
+        """Caches the saved figure at `figure_path` under `key`"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        temporary = f"{self.__path(key)}.{os.getpid()}.tmp"
+        shutil.copyfile(figure_path, temporary)
+        os.replace(temporary, self.__path(key))
+        self.__evict()
+
+    def __evict(self):
+        paths = [(path, path.stat()) for path in self.directory.glob("*.png")]
+        size = sum(stat.st_size for _, stat in paths)
+        for path, stat in sorted(paths, key=lambda item: item[1].st_mtime):
+            if size <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            size -= stat.st_size
@@ -1,4 +1,4 @@
-from sports.season import TeamName, TeamNames, ConferenceName, TeamPair
+from sports.season import TeamName, TeamNames, ConferenceName
 from sports.outcomes import ConferenceSeasonOutcomes, ScenarioOutcomes, WeekOutcomes
 import matplotlib
 matplotlib.use("Agg")
@@ -6,13 +6,29 @@ print(matplotlib.get_backend())
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from matplotlib.offsetbox import OffsetImage, AnnotationBbox
+import concurrent.futures
+import functools
+import hashlib
 import math
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Any, Callable
 
+import plottable
 from plottable import Table, ColumnDefinition
 from plottable.cell import TableCell, Rectangle
-from plottable.plots import image
 import pandas as pd
 
+import logos
+from export import winner_combinations, ordered_week_games, week_ccg_matchups
+from figurecache import FigureCache
+
+
+figure_cache: FigureCache | None = None if os.environ.get("FIGURE_CACHE") == "" else FigureCache(Path(os.environ.get("FIGURE_CACHE", "data/figure_cache")))
+"""Where saved figures are kept to be reused when their data hasn't changed (set FIGURE_CACHE to another directory, or to nothing to turn it off)"""
+
 
 def _get_team_logo_path(team: TeamName):
     return f"assets/{team.lower().replace(" ", "_")}.png"
@@ -20,8 +36,12 @@ def _get_team_logo_path(team: TeamName):
 def _get_cropped_team_logo_path(team: TeamName):
     return f"assets/{team.lower().replace(" ", "_")}_cropped.png"
 
+_BAR_LOGO_SIZE = 128
+"""Logos under bars are drawn about 55 pixels tall, so this leaves room to spare"""
+_CELL_LOGO_SIZE = 256
+
 def _get_team_logo(team: TeamName):
-    return plt.imread(_get_team_logo_path(team))
+    return logos.logo(_get_team_logo_path(team), _BAR_LOGO_SIZE)
 
 def _rounded_percent(probability: float) -> float:
     if probability < 1:
@@ -89,19 +109,129 @@ def _bar_graph(
         fig.text(0.5, 0.05, caption, ha="center", fontsize=10)
     return fig
 
-def _winner_combinations(matchups: list[TeamPair], number: int) -> list[TeamNames]:
-    if number > len(matchups):
-        raise ValueError()
-    def gen_winners(remaining_matchups: list[TeamPair], remaining_winners: int):
-        for i in range(len(remaining_matchups) - remaining_winners + 1):
-            if remaining_winners > 1:
-                for future_winners in gen_winners(remaining_matchups[i+1:], remaining_winners - 1):
-                    for winner in remaining_matchups[i]:
-                        yield (winner, *future_winners)
-            else:
-                for winner in remaining_matchups[i]:
-                    yield (winner,)
-    return list(gen_winners(matchups, number))
+def _table_figure(
+        title: str,
+        figsize: tuple[float, float],
+        cells: list[list[Any]],
+        colors: list[list[str]],
+        col_labels: list[Any],
+        row_labels: list[str] | None = None,
+        *,
+        loc: str = "center",
+        tall_header: bool = False
+    ) -> Figure:
+    fig = plt.figure(title, figsize=figsize)
+    ax = plt.gca()
+    fig.patch.set_visible(False)
+    ax.set_title(title)
+    ax.axis("off")
+    ax.axis("tight")
+    table = ax.table(cells, colLabels=col_labels, rowLabels=row_labels, loc=loc, cellColours=colors)
+    table.scale(1.0, 1.5)
+    if tall_header:
+        table_cells = table.get_celld()
+        for i in range(len(col_labels)):
+            table_cells[(0,i)].set_height(4 * table_cells[(0,i)].get_height())
+    return fig
+
+def _draw_cell_logos(fig: Figure, table: Table, cells: list[list[str]], logo_columns: list[int]):
+    """
+    Draws the logo at the path in each of a table's logo cells where plottable's
+    `image` cells would put it, but all on one axes laid over the table instead
+    of on an axes per cell, which was most of the time the table took to draw
+    """
+    # laid exactly over the table, with figure coordinates as its data coordinates, so that it crops the same
+    position = table.ax.get_position()
+    overlay = fig.add_axes(position)
+    overlay.axis("off")
+    overlay.set_xlim(position.x0, position.x1)
+    overlay.set_ylim(position.y0, position.y1)
+    overlay.set_autoscale_on(False)
+    fig_width, fig_height = fig.bbox.width, fig.bbox.height
+    to_figure = fig.transFigure.inverted()
+    for i, row in enumerate(cells):
+        for j in logo_columns:
+            logo = logos.logo(row[j], _CELL_LOGO_SIZE)
+            (xmin, ymin), (xmax, ymax) = to_figure.transform(table.cells[i, j].rectangle_patch.get_window_extent())
+            # padded above and below like plottable's subplot cells, and centered without stretching
+            padding = 0.2 * (ymax - ymin)
+            scale = min((xmax - xmin) * fig_width / logo.shape[1], (ymax - ymin - 2 * padding) * fig_height / logo.shape[0])
+            width, height = logo.shape[1] * scale / fig_width, logo.shape[0] * scale / fig_height
+            x, y = (xmin + xmax) / 2, (ymin + ymax) / 2
+            im = overlay.imshow(logo, extent=(x - width / 2, x + width / 2, y - height / 2, y + height / 2), aspect="auto")
+            im.set_clip_on(False)
+
+def _logo_table_figure(title: str, cells: list[list[str]], col_labels: list[str]) -> Figure:
+    df = pd.DataFrame({label: [row[i] for row in cells] for i, label in enumerate(col_labels)})
+    df.style.hide(axis="index")
+    logo_columns = [j for j, label in enumerate(col_labels) if label not in {"Probability", "vs."}]
+    coldefs = [ColumnDefinition(name=col_labels[j], textprops={"ha": "center"}, width=0.5, formatter=lambda path: "") for j in logo_columns]
+    coldefs.append(ColumnDefinition(name="vs.", textprops={"ha": "center"}, width=0.25))
+    coldefs.append(ColumnDefinition(name="Probability", textprops={"ha": "center"}, width=0.5))
+
+    fig = plt.figure(title, figsize=(20, 20/(len(col_labels) - 1)*(len(cells) + 1)))
+    ax = plt.gca()
+
+    tab = Table(df, column_definitions=coldefs, index_col=col_labels[0])
+    for i in range(len(cells)):
+        cell: TableCell = tab.cells[i,len(col_labels) - 4]
+        cell.rectangle_patch.set_facecolor(_percent_to_color(cells[i][-4]))
+    _draw_cell_logos(fig, tab, cells, logo_columns)
+    # fig.patch.set_visible(False)
+    # # ax.set_title(title)
+    # ax.axis("off")
+    # ax.axis("tight")
+    # table = ax.table(cells, colLabels=col_labels, loc="center", cellColours=colors)
+    # table.scale(1.0, 4)
+    # table_box = table.get_tightbbox()
+    # print(len(cells))
+    # row_height = (table_box.y1 - table_box.y0 - (4.5 * (len(cells) + 2))) / (len(cells) + 1)
+    # col_width = (table_box.x1 - table_box.x0 - 120) / len(cells[0])
+    # print(row_height, col_width)
+    # for i in range(1, len(cells)+1):
+    #     for j in range(len(cells[0]) - 2):
+    #         cell = table[i,j]
+    #         team = cell.get_text().get_text()
+    #         if team == "*":
+    #             continue
+    #         # logo = _get_team_logo(team)
+    #         logo = _get_team_logo("BYU")
+    #         imagebox = OffsetImage(logo, zoom=row_height / max(logo.shape))
+    #         xy = (table_box.x0 + (j + 0.5) * col_width - 965, -table_box.y0 - (i + 0.5) * row_height + 477)
+    #         ab = AnnotationBbox(imagebox, xy=(0, 0), xybox=xy, boxcoords="offset points", pad=0, frameon=False)
+    #         ax.add_artist(ab)
+    return fig
+
+FigureRenderer = Callable[[], Figure]
+"""Draws one figure from the summarized data bound to it; picklable so that figures can be drawn in other processes"""
+
+@functools.cache
+def _render_version() -> str:
+    """Changes whenever the drawing code, the plotting libraries or the logos do"""
+    digest = hashlib.sha256(f"{matplotlib.__version__} {plottable.__version__}".encode())
+    for module in (sys.modules[__name__], logos):
+        digest.update(Path(module.__file__).read_bytes())
+    for path in sorted(Path("assets").glob("*.png")):
+        stat = path.stat()
+        digest.update(f"{path.name} {stat.st_mtime_ns} {stat.st_size}".encode())
+    return digest.hexdigest()
+
+def _figure_key(render: FigureRenderer) -> str:
+    return FigureCache.key(render, _render_version())
+
+def _cached_figure(title: str, path: Path) -> Figure:
+    """A figure that shows an already saved figure"""
+    image = plt.imread(path)
+    fig = plt.figure(title, figsize=(image.shape[1] / 100, image.shape[0] / 100), dpi=100)
+    ax = fig.add_axes((0, 0, 1, 1))
+    ax.imshow(image)
+    ax.axis("off")
+    return fig
+
+def _save_figure(render: FigureRenderer, path: str):
+    fig = render()
+    fig.savefig(path, bbox_inches="tight")
+    plt.close(fig)
 
 class ConferenceFigures:
     def __init__(self, conference_name: ConferenceName, conference_outcomes: ConferenceSeasonOutcomes, scenarios: list[ScenarioOutcomes], week_outcomes: WeekOutcomes):
@@ -109,13 +239,60 @@ class ConferenceFigures:
         self.__conference = conference_outcomes
         self.__scenarios = scenarios
         self.__week = week_outcomes
-        self.__figures: dict[str, Figure] = {}
-
-    def save(self, path_prefix: str = ""):
-        for path, fig in self.__figures.items():
-            fig.savefig(path_prefix + path + ".png", bbox_inches="tight")
+        self.__figures: dict[str, FigureRenderer] = {}
+        self.__logos: set[logos.LogoKey] = set()
+
+    def __load_logos(self):
+        """Caches the logos the figures draw before any are drawn, saving them to the atlas if any weren't in it"""
+        logos.load_atlas()
+        if logos.preload(self.__logos) and logos.atlas_path is not None:
+            logos.save_atlas()
+
+    def save(self, path_prefix: str = "", workers: int | None = None):
+        """
+        Draws and saves every figure. The figures are drawn in a pool of
+        `workers` processes (by default, one per core), each of which is only
+        sent the summarized data of the figures it draws. The logos are
+        decoded up front, and shared with the workers. Figures whose data
+        hasn't changed since they were last saved are copied from the figure
+        cache instead.
+        """
+        to_draw: list[tuple[FigureRenderer, str, str | None]] = []
+        for name, render in self.__figures.items():
+            path = path_prefix + name + ".png"
+            key = _figure_key(render) if figure_cache is not None else None
+            cached = figure_cache.get(key) if key is not None else None
+            if cached is not None:
+                shutil.copyfile(cached, path)
+            else:
+                to_draw.append((render, path, key))
+        if figure_cache is not None:
+            print(f"Reused {len(self.__figures) - len(to_draw)} of {len(self.__figures)} figures from {figure_cache.directory}")
+        if not to_draw:
+            return
+
+        self.__load_logos()
+        renders = [render for render, _, _ in to_draw]
+        paths = [path for _, path, _ in to_draw]
+        if workers == 1 or len(to_draw) <= 1:
+            for render, path in zip(renders, paths):
+                _save_figure(render, path)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(workers, initializer=logos.load_atlas) as executor:
+                list(executor.map(_save_figure, renders, paths))
+        for _, path, key in to_draw:
+            if key is not None:
+                figure_cache.put(key, path)
 
     def show(self):
+        """Shows every figure, reusing the saved image of any whose data hasn't changed"""
+        self.__load_logos()
+        for name, render in self.__figures.items():
+            cached = figure_cache.get(_figure_key(render)) if figure_cache is not None else None
+            if cached is not None:
+                _cached_figure(name, cached)
+            else:
+                render()
         plt.show()
 
     def all_figures(self, interesting_teams: list[TeamName], ccg_target: str | None = None):
@@ -152,15 +329,7 @@ class ConferenceFigures:
         colors = [[_percent_to_color(_rounded_percent_str(abs(prob - starting_ccg_prob) / max(best_increase, -worst_decrease)), target=(100, 255, 100) if prob > starting_ccg_prob else (255, 100, 100)) for prob in row] + ["w"] for row in data]
 
         title = f"Probability of {ccg_target} Making the CCG Given This Week's Matchup Results"
-        fig = plt.figure(title, figsize=(20, 4))
-        ax = plt.gca()
-        fig.patch.set_visible(False)
-        ax.set_title(title)
-        ax.axis("off")
-        ax.axis("tight")
-        table = ax.table(cells, colLabels=col_labels, rowLabels=matchups, loc="center", cellColours=colors)
-        table.scale(1.0, 1.5)
-        self.__figures[f"{ccg_target.lower()}-ccg-probs-given-week-results"] = fig
+        self.__figures[f"{ccg_target.lower()}-ccg-probs-given-week-results"] = functools.partial(_table_figure, title, (20, 4), cells, colors, col_labels, matchups)
 
         best_winners = None
         best_ccg_prob = 0
@@ -181,7 +350,7 @@ class ConferenceFigures:
         # print("Possible weekly outcomes")
         print(f"{ccg_target} ways to clinch CCG:")
         for i in range(1, len(self.__week.games) + 1):
-            for winners in _winner_combinations(self.__week.games, i):
+            for winners in winner_combinations(self.__week.games, i):
                 ccg_prob = self.__week.prob_in_ccg_given_winners(set(winners), ccg_target)
                 prob = self.__week.prob_of_winners(set(winners))
                 score = (ccg_prob - starting_ccg_prob) * prob
@@ -207,15 +376,7 @@ class ConferenceFigures:
         colors = [[_percent_to_color(percent) for percent in row] for row in cells]
 
         title = f"Best Week Results for {ccg_target}"
-        fig = plt.figure(title, figsize=(20, 4))
-        ax = plt.gca()
-        fig.patch.set_visible(False)
-        ax.set_title(title)
-        ax.axis("off")
-        ax.axis("tight")
-        table = ax.table(cells, colLabels=col_labels, rowLabels=row_labels, loc="center", cellColours=colors)
-        table.scale(1.0, 1.5)
-        self.__figures[f"{ccg_target.lower()}-best-week-results"] = fig
+        self.__figures[f"{ccg_target.lower()}-best-week-results"] = functools.partial(_table_figure, title, (20, 4), cells, colors, col_labels, row_labels)
 
     def table_in_ccg_prob_given_total_wins(self, ccg_target: TeamName = ...):
         team_probs = {team: self.__conference.prob_in_ccg_given_total_losses(team, ccg_target=ccg_target) for team in self.__conference.team_names}
@@ -233,15 +394,7 @@ class ConferenceFigures:
         colors = [[_percent_to_color(percent) for percent in row] for row in cells]
 
         title = f"Probability of {'Each Team' if ccg_target is ... else ccg_target} Making the CCG Given Total Wins"
-        fig = plt.figure(title, figsize=(15, 7))
-        ax = plt.gca()
-        fig.patch.set_visible(False)
-        ax.set_title(title)
-        ax.axis("off")
-        ax.axis("tight")
-        table = ax.table(cells, colLabels=wins, rowLabels=sorted_teams, loc="center", cellColours=colors)
-        table.scale(1.0, 1.5)
-        self.__figures[f"{'all' if ccg_target is ... else ccg_target.lower()}-ccg-probs-given-total-wins-table"] = fig
+        self.__figures[f"{'all' if ccg_target is ... else ccg_target.lower()}-ccg-probs-given-total-wins-table"] = functools.partial(_table_figure, title, (15, 7), cells, colors, wins, sorted_teams)
 
     def table_in_ccg_prob_given_specific_losses(self, teams: list[TeamName], ccg_target: TeamName = ...):
         # interesting_teams = ["BYU", "Iowa St", "Kansas St", "Texas Tech", "Cincinnati", "Colorado"]
@@ -266,15 +419,7 @@ class ConferenceFigures:
             col_labels += [f"{team} Losses", f"{team if ccg_target is ... else ccg_target} CCG Prob"]
 
         title = f"Probability of {'Each Team' if ccg_target is ... else ccg_target} Making the CCG Given Specific Losses"
-        fig = plt.figure(f"Probability of {'Each Team' if ccg_target is ... else ccg_target} Making the CCG Given Specific Losses", figsize=(30, 15))
-        ax = plt.gca()
-        fig.patch.set_visible(False)
-        ax.set_title(title)
-        ax.axis("off")
-        ax.axis("tight")
-        table = ax.table(cells, loc="center", colLabels=col_labels, cellColours=colors)
-        table.scale(1.0, 1.5)
-        self.__figures[f"{'all' if ccg_target is ... else ccg_target.lower()}-ccg-probs-given-specific-losses-by-{'-'.join(teams)}-table"] = fig
+        self.__figures[f"{'all' if ccg_target is ... else ccg_target.lower()}-ccg-probs-given-specific-losses-by-{'-'.join(teams)}-table"] = functools.partial(_table_figure, title, (30, 15), cells, colors, col_labels)
 
     def __scenarios_table_data(self, scenarios: list[ScenarioOutcomes], teams: list[TeamName]):
         cells = []
@@ -312,18 +457,7 @@ class ConferenceFigures:
             cells, row_labels, col_labels, colors = self.__scenarios_table_data(scenarios, teams)
 
             title = f"Interesting Scenarios {i + 1}"
-            fig = plt.figure(title, figsize=(20, 4))
-            ax = plt.gca()
-            fig.patch.set_visible(False)
-            ax.set_title(title)
-            ax.axis("off")
-            ax.axis("tight")
-            table = ax.table(cells, colLabels=col_labels, rowLabels=row_labels, loc="lower center", cellColours=colors)
-            table.scale(1.0, 1.5)
-            table_cells = table.get_celld()
-            for j in range(len(col_labels)):
-                table_cells[(0,j)].set_height(4 * table_cells[(0,j)].get_height())
-            self.__figures[f"scenarios-table-{i}"] = fig
+            self.__figures[f"scenarios-table-{i}"] = functools.partial(_table_figure, title, (20, 4), cells, colors, col_labels, row_labels, loc="lower center", tall_header=True)
 
     def table_structured_scenarios(self, ccg_target: TeamName, table_data: list[list[ScenarioOutcomes]], row_labels: list[str], col_labels: list[str], show_scenario_probs: bool = True):
         # print(ccg_target, len(table_data), len(row_labels), len(col_labels))
@@ -350,17 +484,7 @@ class ConferenceFigures:
             colors = [[_percent_to_color(percent) for percent in row] for row in cells]
 
             title = f"{ccg_target} CCG Probability in Various Scenarios {i+1}"
-            fig = plt.figure(title, figsize=(20, 7))
-            ax = plt.gca()
-            fig.patch.set_visible(False)
-            ax.set_title(title)
-            ax.axis("off")
-            ax.axis("tight")
-            table = ax.table(cells, colLabels=col_labels[start:end], rowLabels=row_labels, loc="center", cellColours=colors)
-            table.scale(1.0, 1.5)
-            table_cells = table.get_celld()
-            for i in range(len(col_labels[start:end])):
-                table_cells[(0,i)].set_height(4 * table_cells[(0,i)].get_height())
+            fig = functools.partial(_table_figure, title, (20, 7), cells, colors, col_labels[start:end], row_labels, tall_header=True)
             for i in range(100000):
                 name = f"scenarios-detailed-{ccg_target}-ccg-probs-{i}"
                 if name not in self.__figures:
@@ -372,17 +496,7 @@ class ConferenceFigures:
                 colors = [[_percent_to_color(percent) for percent in row] for row in cells]
 
                 title = f"Scenario Probabilities {i+1}"
-                fig = plt.figure(title, figsize=(20, 7))
-                ax = plt.gca()
-                fig.patch.set_visible(False)
-                ax.set_title(title)
-                ax.axis("off")
-                ax.axis("tight")
-                table = ax.table(cells, colLabels=col_labels[start:end], rowLabels=row_labels, loc="center", cellColours=colors)
-                table.scale(1.0, 1.5)
-                table_cells = table.get_celld()
-                for i in range(len(col_labels[start:end])):
-                    table_cells[(0,i)].set_height(4 * table_cells[(0,i)].get_height())
+                fig = functools.partial(_table_figure, title, (20, 7), cells, colors, col_labels[start:end], row_labels, tall_header=True)
                 for i in range(100000):
                     name = f"scenarios-detailed-probs-{i}"
                     if name not in self.__figures:
@@ -390,32 +504,8 @@ class ConferenceFigures:
                         break
 
     def table_week_ccg_outcomes(self, interesting_teams: list[TeamName] = []):
-        ordered_games: list[TeamPair] = []
-        for interesting_team in interesting_teams:
-            for game in self.__week.games:
-                if interesting_team in game and game not in ordered_games:
-                    ordered_games.append(game)
-        for game in sorted(self.__week.games, key=lambda matchup: ",".join(matchup)):
-            if game not in ordered_games:
-                ordered_games.append(game)
-
-        all_winners_to_ccg_matchups: dict[TeamNames, TeamPair] = {}
-        for winners in _winner_combinations(ordered_games, len(ordered_games)):
-            ccg_matchup = next(iter(sorted(self.__week.permutations[tuple(sorted(winners))].items(), key=lambda item: item[1], reverse=True)))[0]
-            all_winners_to_ccg_matchups[tuple(winners)] = ccg_matchup
-
-        shortened_winners_to_ccg_matchups: dict[TeamNames, tuple[TeamPair, float]] = {}
-        for i in range(1, len(ordered_games) + 1):
-            for winners in filter(lambda winners: not any(set(winners).issuperset(shortened_winners) for shortened_winners in shortened_winners_to_ccg_matchups.keys()), _winner_combinations(ordered_games, i)):
-                matchup: TeamPair | None = None
-                for ccg_matchup in (ccg_matchup for all_winners, ccg_matchup in all_winners_to_ccg_matchups.items() if set(winners).issubset(all_winners)):
-                    if matchup is None:
-                        matchup = tuple(sorted(ccg_matchup))
-                    elif tuple(sorted(ccg_matchup)) != matchup:
-                        break
-                else:
-                    if matchup:
-                        shortened_winners_to_ccg_matchups[winners] = (matchup, self.__week.prob_of_winners(set(winners)))
+        ordered_games = ordered_week_games(self.__week, interesting_teams)
+        shortened_winners_to_ccg_matchups = week_ccg_matchups(self.__week, ordered_games)
 
         cells = []
         for winners, (matchup, prob) in sorted(shortened_winners_to_ccg_matchups.items(), key=lambda item: item[1][1], reverse=True):
@@ -439,44 +529,10 @@ class ConferenceFigures:
         colors = [["w"] * (len(row) - 2) + [_percent_to_color(row[-2])] + ["w"] for row in cells]
         col_labels = ["\nat ".join(game) for game in ordered_games] + ["Probability", "CCG Team", "vs.", "CCG Team "]
 
-        df = pd.DataFrame({label: [row[i] for row in cells] for i, label in enumerate(col_labels)})
-        df.style.hide(axis="index")
-        coldefs = [ColumnDefinition(name=label, textprops={"ha": "center"}, width=0.5, plot_fn=image) for label in col_labels if label not in {"Probability", "vs."}]
-        coldefs.append(ColumnDefinition(name="vs.", textprops={"ha": "center"}, width=0.25))
-        coldefs.append(ColumnDefinition(name="Probability", textprops={"ha": "center"}, width=0.5))
-
+        for row in cells:
+            self.__logos.update((path, _CELL_LOGO_SIZE) for path in row[:-4] + [row[-3], row[-1]])
         title = "CCG Matchups Given Winners This Week"
-        fig = plt.figure(title, figsize=(20, 20/(len(col_labels) - 1)*(len(cells) + 1)))
-        ax = plt.gca()
-
-        tab = Table(df, column_definitions=coldefs, index_col=col_labels[0])
-        for i in range(len(cells)):
-            cell: TableCell = tab.cells[i,len(col_labels) - 4]
-            cell.rectangle_patch.set_facecolor(_percent_to_color(cells[i][-4]))
-        # fig.patch.set_visible(False)
-        # # ax.set_title(title)
-        # ax.axis("off")
-        # ax.axis("tight")
-        # table = ax.table(cells, colLabels=col_labels, loc="center", cellColours=colors)
-        # table.scale(1.0, 4)
-        # table_box = table.get_tightbbox()
-        # print(len(cells))
-        # row_height = (table_box.y1 - table_box.y0 - (4.5 * (len(cells) + 2))) / (len(cells) + 1)
-        # col_width = (table_box.x1 - table_box.x0 - 120) / len(cells[0])
-        # print(row_height, col_width)
-        # for i in range(1, len(cells)+1):
-        #     for j in range(len(cells[0]) - 2):
-        #         cell = table[i,j]
-        #         team = cell.get_text().get_text()
-        #         if team == "*":
-        #             continue
-        #         # logo = _get_team_logo(team)
-        #         logo = _get_team_logo("BYU")
-        #         imagebox = OffsetImage(logo, zoom=row_height / max(logo.shape))
-        #         xy = (table_box.x0 + (j + 0.5) * col_width - 965, -table_box.y0 - (i + 0.5) * row_height + 477)
-        #         ab = AnnotationBbox(imagebox, xy=(0, 0), xybox=xy, boxcoords="offset points", pad=0, frameon=False)
-        #         ax.add_artist(ab)
-        self.__figures[f"ccg-matchups-given-winners"] = fig
+        self.__figures[f"ccg-matchups-given-winners"] = functools.partial(_logo_table_figure, title, cells, col_labels)
 
     def table_record_probabilities(self):
         team_probs = {team: self.__conference.prob_final_win_count(team) for team in self.__conference.team_names}
@@ -493,21 +549,13 @@ class ConferenceFigures:
         colors = [[_percent_to_color(percent) for percent in row[:-1]] + ["w"] for row in cells]
 
         title = f"Final Win Count Probabilities for Each Team"
-        fig = plt.figure(title, figsize=(15, 7))
-        ax = plt.gca()
-        fig.patch.set_visible(False)
-        ax.set_title(title)
-        ax.axis("off")
-        ax.axis("tight")
-        table = ax.table(cells, colLabels=wins, rowLabels=sorted_teams, loc="center", cellColours=colors)
-        table.scale(1.0, 1.5)
-        self.__figures["win-count-probs-table"] = fig
+        self.__figures["win-count-probs-table"] = functools.partial(_table_figure, title, (15, 7), cells, colors, wins, sorted_teams)
 
     def bars_ccg_probabilities(self):
         teams = sorted(self.__conference.team_names)
         Y = [_rounded_percent(self.__conference.prob_in_ccg(team)) for team in teams]
-        fig = _bar_graph(f"{self.__conference_name} Team CCG Probabilities", teams, Y, teams=[(team,) for team in teams], caption="Probability of each team making the CCG")
-        self.__figures[self.__conference_name.lower() + "-team-ccg-probabilities"] = fig
+        self.__logos.update((_get_team_logo_path(team), _BAR_LOGO_SIZE) for team in teams)
+        self.__figures[self.__conference_name.lower() + "-team-ccg-probabilities"] = functools.partial(_bar_graph, f"{self.__conference_name} Team CCG Probabilities", teams, Y, teams=[(team,) for team in teams], caption="Probability of each team making the CCG")
 
     def bars_ccg_matchups(self):
         matchups = []
@@ -517,8 +565,8 @@ class ConferenceFigures:
                 continue
             matchups.append(matchup)
             Y.append(_rounded_percent(count / self.__conference.total_seasons))
-        fig = _bar_graph(f"{self.__conference_name} CCG Matchups", [",".join(matchup) for matchup in matchups], Y, teams=matchups, caption="Probabilities of various CCG Matchups. Matchups with probability less than 1% are omitted.")
-        self.__figures[self.__conference_name.lower() + "-ccg-matchups"] = fig
+        self.__logos.update((_get_team_logo_path(team), _BAR_LOGO_SIZE) for matchup in matchups for team in matchup)
+        self.__figures[self.__conference_name.lower() + "-ccg-matchups"] = functools.partial(_bar_graph, f"{self.__conference_name} CCG Matchups", [",".join(matchup) for matchup in matchups], Y, teams=matchups, caption="Probabilities of various CCG Matchups. Matchups with probability less than 1% are omitted.")
 
     # TODO consider making a B12 rankings table
     # total_rankings = 0
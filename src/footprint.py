@@ -0,0 +1,120 @@
+"""
+How much memory the simulation's outcome structures take
+
+The dictionaries that grow with the number of simulated seasons are each
+team's `lost_to` (one entry per set of teams lost to), the CCG matchup counts
+under them and under the conference, this week's `WeekOutcomes.permutations`
+and each scenario's CCG matchup counts. When asked for a memory report, each
+worker sends back its peak RSS with each chunk (see `instruments`), and the
+entry counts of each job's merged result (and the parent's peak RSS) are
+recorded in `growth` after each chunk is merged, so a key space that keeps
+growing shows up as it happens.
+"""
+import resource
+import sys
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable
+
+from simulator import Simulator
+from sports.outcomes import ConferenceSeasonOutcomes, ScenarioOutcomes, WeekOutcomes
+
+
+@dataclass
+class Structure:
+    entries: int = 0
+    bytes: int = 0
+
+
+def peak_rss() -> int:
+    """The peak resident set size of this process, in bytes"""
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def deep_size(obj: Any, seen: set[int] | None = None) -> int:
+    """The bytes taken by `obj` and the containers and objects it holds, counting shared objects once"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__") and not isinstance(obj, type):
+        size += deep_size(vars(obj), seen)
+    return size
+
+
+def _structures(result: Any) -> Iterable[tuple[str, Any, int]]:
+    """(name, container, entries) of each outcome structure in a job result"""
+    if isinstance(result, Simulator):
+        for name, conference in result.conference_outcomes.items():
+            yield from _structures((name, conference))
+        for name, week in result.week_outcomes.items():
+            yield from _structures((name, week))
+        for scenario in result.scenarios:
+            yield from _structures(scenario)
+    elif isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], ConferenceSeasonOutcomes):
+        name, conference = result
+        lost_to = [team.lost_to for team in conference.teams.values()]
+        yield f"{name} lost_to", lost_to, sum(map(len, lost_to))
+        nested = [outcomes.ccg_participants for team_lost_to in lost_to for outcomes in team_lost_to.values()]
+        yield f"{name} lost_to ccg_participants", nested, sum(map(len, nested))
+        yield f"{name} ccg_participants", conference.ccg_participants, len(conference.ccg_participants)
+    elif isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], WeekOutcomes):
+        name, week = result
+        yield f"{name} week permutations", week.permutations, sum(map(len, week.permutations.values()))
+    elif isinstance(result, ScenarioOutcomes):
+        yield "scenario ccg_participants", result.ccg_participants, len(result.ccg_participants)
+    elif isinstance(result, (tuple, list)):
+        # a scenario grid row's proposal and cells, or the results of several jobs
+        for item in result:
+            yield from _structures(item)
+
+
+def entries(result: Any) -> dict[str, int]:
+    """The entry count of each outcome structure in a job result (cheap enough to call often)"""
+    counts: dict[str, int] = {}
+    for name, _, count in _structures(result):
+        counts[name] = counts.get(name, 0) + count
+    return counts
+
+
+def structures(result: Any) -> dict[str, Structure]:
+    """The entry count and size of each outcome structure in a job result"""
+    measured: dict[str, Structure] = {}
+    for name, container, count in _structures(result):
+        structure = measured.setdefault(name, Structure())
+        structure.entries += count
+        # nested structures are also counted in the sizes of the ones they're in
+        structure.bytes += deep_size(container)
+    return measured
+
+
+def table(phases: dict[str, dict[str, Structure]]) -> str:
+    lines = [f"{'Structure':<48}{'Entries':>12}{'MB':>12}"]
+    for phase, measured in phases.items():
+        lines.append(phase)
+        for name, structure in measured.items():
+            lines.append(f"  {name:<46}{structure.entries:>12}{structure.bytes / 1e6:>12.2f}")
+    return "\n".join(lines)
+
+
+worker_peak_rss: dict[int, int] = {}
+"""The peak RSS of each worker process (by pid), in bytes"""
+
+growth: list[dict[str, Any]] = []
+"""After each merged chunk: the time, the job, its completed iterations, its entry counts and the parent's peak RSS"""
+
+_start = time.monotonic()
+
+
+def record_worker(pid: int, rss: int):
+    worker_peak_rss[pid] = max(rss, worker_peak_rss.get(pid, 0))
+
+
+def record_growth(job: Any, completed: int, result: Any):
+    growth.append({"seconds": round(time.monotonic() - _start, 3), "job": str(job), "iterations": completed, "entries": entries(result), "parent_peak_rss": peak_rss()})
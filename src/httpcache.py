@@ -0,0 +1,177 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+
+@dataclass
+class _Entry:
+    url: str
+    body: str
+    """The hash of the response body, which is stored under that name"""
+    size: int
+    stored: float
+    """When the response was last fetched or revalidated (seconds since the epoch)"""
+    etag: str | None = None
+    last_modified: str | None = None
+    """The response's Last-Modified date, or without one the date it was sent, to revalidate with"""
+
+
+def ttl_by_pattern(ttls: list[tuple[str, float]], default: float = 0.0) -> Callable[[str], float]:
+    """A TTL function giving each URL the TTL (in seconds) of the first regex in `ttls` it matches"""
+    compiled = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+    def ttl(url: str) -> float:
+        for pattern, seconds in compiled:
+            if pattern.search(url):
+                return seconds
+        return default
+    return ttl
+
+
+class HttpCache:
+    """
+    An on-disk cache of GET responses
+
+    A response younger than `ttl(url)` seconds is served without any request.
+    An older one is revalidated with its ETag and Last-Modified date (or the
+    date the server sent it, if it had none), and only downloaded again if the
+    server says it changed. Bodies are stored by the hash of their contents,
+    so identical pages are stored once, and the least recently used responses
+    are evicted once the bodies take up more than `max_bytes`. The cache is
+    safe to use from several threads.
+    """
+    def __init__(self, directory: Path, ttl: Callable[[str], float] = lambda url: 0.0, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        """Responses served from the cache without a request"""
+        self.revalidated = 0
+        """Responses the server confirmed were unchanged"""
+        self.misses = 0
+        """Responses downloaded"""
+        self.__lock = threading.RLock()
+        self.__loaded = False
+        self.__bodies: dict[str, int] = {}
+        """The number of entries using each stored body"""
+        self.__size = 0
+
+    @property
+    def __entries(self) -> Path:
+        return self.directory / "entries"
+
+    @property
+    def __body_dir(self) -> Path:
+        return self.directory / "bodies"
+
+    def __entry_path(self, url: str) -> Path:
+        return self.__entries / (hashlib.sha256(url.encode()).hexdigest() + ".json")
+
+    def __load(self):
+        if self.__loaded:
+            return
+        self.__entries.mkdir(parents=True, exist_ok=True)
+        self.__body_dir.mkdir(parents=True, exist_ok=True)
+        for entry in map(self.__read_entry, self.__entries.glob("*.json")):
+            if entry is not None:
+                self.__add_body_reference(entry)
+        self.__loaded = True
+
+    def __read_entry(self, path: Path) -> _Entry | None:
+        try:
+            entry = _Entry(**json.loads(path.read_text()))
+        except (OSError, ValueError, TypeError):
+            return None
+        return entry if (self.__body_dir / entry.body).exists() else None
+
+    def __write_entry(self, entry: _Entry):
+        path = self.__entry_path(entry.url)
+        temporary = path.with_suffix(f".{threading.get_ident()}.tmp")
+        temporary.write_text(json.dumps(asdict(entry)))
+        os.replace(temporary, path)
+
+    def __add_body_reference(self, entry: _Entry):
+        if entry.body not in self.__bodies:
+            self.__bodies[entry.body] = 0
+            self.__size += entry.size
+        self.__bodies[entry.body] += 1
+
+    def __remove_body_reference(self, entry: _Entry):
+        self.__bodies[entry.body] -= 1
+        if self.__bodies[entry.body] == 0:
+            del self.__bodies[entry.body]
+            self.__size -= entry.size
+            (self.__body_dir / entry.body).unlink(missing_ok=True)
+
+    def __evict(self):
+        if self.__size <= self.max_bytes:
+            return
+        paths = sorted(self.__entries.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        for path in paths:
+            if self.__size <= self.max_bytes:
+                break
+            entry = self.__read_entry(path)
+            path.unlink(missing_ok=True)
+            if entry is not None:
+                self.__remove_body_reference(entry)
+
+    def get(self, url: str, session: "requests.Session | None" = None, timeout: float | None = None) -> bytes:
+        """The body of the response to a GET of `url`, from the cache if it's still good"""
+        import requests
+
+        get = (session or requests).get
+        with self.__lock:
+            self.__load()
+            path = self.__entry_path(url)
+            entry = self.__read_entry(path) if path.exists() else None
+            if entry is not None:
+                # the modification time of the entry is when it was last used, for eviction
+                os.utime(path)
+                if time.time() - entry.stored < self.ttl(url):
+                    self.hits += 1
+                    return (self.__body_dir / entry.body).read_bytes()
+
+        headers = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        response = get(url, headers=headers, timeout=timeout)
+        if entry is not None and response.status_code == 304:
+            with self.__lock:
+                body_path = self.__body_dir / entry.body
+                if path.exists() and body_path.exists():
+                    self.revalidated += 1
+                    entry.stored = time.time()
+                    self.__write_entry(entry)
+                    return body_path.read_bytes()
+            # evicted while revalidating, so fetch it again unconditionally
+            response = get(url, timeout=timeout)
+        response.raise_for_status()
+
+        content = response.content
+        body = hashlib.sha256(content).hexdigest()
+        new_entry = _Entry(url, body, len(content), time.time(), response.headers.get("ETag"), response.headers.get("Last-Modified") or response.headers.get("Date"))
+        with self.__lock:
+            self.misses += 1
+            body_path = self.__body_dir / body
+            if body not in self.__bodies:
+                temporary = body_path.with_suffix(f".{threading.get_ident()}.tmp")
+                temporary.write_bytes(content)
+                os.replace(temporary, body_path)
+            self.__add_body_reference(new_entry)
+            # another thread may have replaced the entry since it was read above
+            old_entry = self.__read_entry(path) if path.exists() else None
+            self.__write_entry(new_entry)
+            if old_entry is not None:
+                self.__remove_body_reference(old_entry)
+            self.__evict()
+        return content
@@ -0,0 +1,41 @@
+"""
+The instrumentation the scheduler's chunks are run with
+
+A `Worker` is the scheduler's wrapper for each chunk: in the worker process it
+reports the chunk's progress (see `progress`) and, if asked, collects the time
+of its phases (see `timing`) and the worker's peak RSS (see `footprint`), and
+sends those back in a `Report`, for the scheduler's merge hook to add up.
+"""
+import contextlib
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import footprint
+import progress
+from sports import timing
+
+
+@dataclass
+class Report:
+    timings: timing.Timings | None = None
+    rss: tuple[int, int] | None = None
+    """The worker's (pid, peak RSS)"""
+
+
+@dataclass
+class Worker:
+    time_phases: bool = False
+    report_memory: bool = False
+
+    def __call__(self, function: Callable[..., Any], iterations: int, *args) -> tuple[Any, Report]:
+        with timing.collecting() if self.time_phases else contextlib.nullcontext() as timings, progress.reporting(function.__name__):
+            start = time.perf_counter()
+            result = function(iterations, *args)
+            seconds = time.perf_counter() - start
+        if timings is not None:
+            timings.add(f"{function.__name__} (whole chunks)", seconds)
+        rss = (os.getpid(), footprint.peak_rss()) if self.report_memory else None
+        return result, Report(timings, rss)
+
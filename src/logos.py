@@ -0,0 +1,108 @@
+"""
+Decoded team logos, cached for the life of the process
+
+Each logo is decoded once per process, and downsampled once for each size it's
+drawn at, so drawing it again neither decodes the PNG nor resamples the full
+image. The cache can be saved to a single atlas file that other processes load
+instead of decoding the PNGs themselves; workers forked after the cache is
+filled share it without loading anything.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Iterable
+
+import matplotlib.image
+import numpy as np
+from PIL import Image
+
+
+LogoKey = tuple[str, int | None]
+"""The path of a logo and the size of its longest side in pixels (None for the full image)"""
+
+atlas_path: Path | None = Path("data/logo_atlas.npz")
+"""Where the atlas is saved and loaded from (None to not use one)"""
+
+_logos: dict[LogoKey, np.ndarray] = {}
+_sources: dict[LogoKey, tuple[int, int]] = {}
+"""The modification time and size of the file each cached logo was decoded from"""
+
+
+def _source(path: str) -> tuple[int, int]:
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _downsample(logo: np.ndarray, size: int) -> np.ndarray:
+    height, width = logo.shape[:2]
+    if max(height, width) <= size:
+        return logo
+    scale = size / max(height, width)
+    pixels = Image.fromarray(np.round(logo * 255).astype(np.uint8))
+    resized = pixels.resize((max(1, round(width * scale)), max(1, round(height * scale))), Image.Resampling.LANCZOS)
+    return np.asarray(resized, dtype=np.float32) / 255
+
+
+def logo(path: str, size: int | None = None) -> np.ndarray:
+    """The logo at `path`, scaled down so that its longest side is at most `size` pixels"""
+    key = (str(path), size)
+    cached = _logos.get(key)
+    if cached is None:
+        source = _source(key[0])
+        cached = matplotlib.image.imread(key[0])
+        if size is not None:
+            cached = _downsample(cached, size)
+        cached.setflags(write=False)
+        _logos[key] = cached
+        _sources[key] = source
+    return cached
+
+
+def preload(keys: Iterable[LogoKey]) -> int:
+    """Caches the logos for `keys`; returns how many weren't cached yet"""
+    decoded = 0
+    for path, size in keys:
+        if (str(path), size) not in _logos:
+            logo(path, size)
+            decoded += 1
+    return decoded
+
+
+def save_atlas(path: Path | str | None = None):
+    """Saves every cached logo to one atlas file"""
+    path = Path(path or atlas_path)
+    keys = sorted(_logos.keys(), key=lambda key: (key[0], key[1] or 0))
+    index = [[key[0], key[1], *_sources[key]] for key in keys]
+    # Logos are decoded from 8-bit PNGs, so storing them as bytes loses nothing
+    arrays = {f"logo{i}": np.round(_logos[key] * 255).astype(np.uint8) for i, key in enumerate(keys)}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(temporary, index=np.array(json.dumps(index)), **arrays)
+    os.replace(temporary, path)
+
+
+def load_atlas(path: Path | str | None = None) -> int:
+    """
+    Caches the logos in the atlas file that aren't cached yet, skipping any
+    whose PNG has changed since; returns how many were loaded
+    """
+    path = path or atlas_path
+    if path is None or not os.path.exists(path):
+        return 0
+    loaded = 0
+    with np.load(path) as atlas:
+        for i, (logo_path, size, mtime, file_size) in enumerate(json.loads(str(atlas["index"]))):
+            key = (logo_path, size)
+            if key in _logos:
+                continue
+            try:
+                if _source(logo_path) != (mtime, file_size):
+                    continue
+            except FileNotFoundError:
+                continue
+            cached = atlas[f"logo{i}"].astype(np.float32) / 255
+            cached.setflags(write=False)
+            _logos[key] = cached
+            _sources[key] = (mtime, file_size)
+            loaded += 1
+    return loaded
@@ -1,15 +1,29 @@
 import scraper
-from sports import outcomes
+import scheduler
+import tracing
+import checkpoint
+import export
+import footprint
+import instruments
+import progress
+import shards
+from sports import outcomes, timing
 from sports.outcomes import win_exactly, win_out, win_out_except_possibly, beat, win_out_except, any_outcome, win_at_most
 from sports.outcomes import ScenarioOutcomes
 from simulator import Simulator
-from figures import ConferenceFigures
-from sports.season import ConferenceName
+from sports.season import ConferenceName, TeamName
+from typing import Any
 import datetime
 import os
 import argparse
+import contextlib
+import dataclasses
 import itertools
 import concurrent.futures
+import json
+import math
+import random
+import time
 
 
 def simulate_scenario(iterations: int, simulator: Simulator, scenario: ScenarioOutcomes) -> ScenarioOutcomes:
@@ -21,15 +35,89 @@ def simulate_scenario(iterations: int, simulator: Simulator, scenario: ScenarioO
         return None
 
 
+def simulate_shared(iterations: int, simulator: Simulator, proposal: ScenarioOutcomes, scenarios: list[ScenarioOutcomes]) -> tuple[ScenarioOutcomes, list[ScenarioOutcomes]] | None:
+    try:
+        return simulator.simulate_shared(proposal, scenarios, iterations)
+    except ValueError as e:
+        print(f"ERROR: shared scenario failed: {proposal.description(", ")}")
+        return None
+
+
+def _merge_shared(result: tuple[ScenarioOutcomes, list[ScenarioOutcomes]], other: tuple[ScenarioOutcomes, list[ScenarioOutcomes]]) -> tuple[ScenarioOutcomes, list[ScenarioOutcomes]]:
+    proposal, scenarios = result
+    proposal |= other[0]
+    for scenario, other_scenario in zip(scenarios, other[1]):
+        scenario |= other_scenario
+    return result
+
+
 def simulate_season(iterations: int, simulator: Simulator) -> Simulator:
     simulator.simulate(iterations)
     return simulator
 
 
-def main(iterations: int = 100000, year: int = 2024, conference: ConferenceName = "B12", entire_season: bool = True, structured_scenarios: bool = True, save_figures: bool = True, show_figures: bool = True):
-    season = scraper.get_season_snapshot(year)
-    if conference:
-        season = season.filter(conference)
+def _standard_error(count: int, total: int) -> float:
+    # Smoothed so that estimates of 0% or 100% from few seasons still count as uncertain
+    p = (count + 1) / (total + 2)
+    return math.sqrt(p * (1 - p) / (total + 2))
+
+
+def _season_uncertainty(simulator: Simulator, conference: ConferenceName) -> float:
+    conference_outcomes = simulator.conference_outcomes[conference]
+    return max((_standard_error(team.made_ccg, conference_outcomes.total_seasons) for team in conference_outcomes.teams.values()), default=0.5)
+
+
+def _scenario_uncertainty(scenario: ScenarioOutcomes, team: TeamName = "BYU") -> float:
+    return _standard_error(round(scenario.prob_in_ccg(team) * scenario.total_seasons), scenario.total_seasons)
+
+
+def _shared_uncertainty(shared: tuple[ScenarioOutcomes, list[ScenarioOutcomes]]) -> float:
+    return max(map(_scenario_uncertainty, shared[1]), default=0.0)
+
+
+def _print_iteration_counts(iteration_counts: dict[str, Any]):
+    if "season_outcomes" in iteration_counts:
+        print(f"Season outcomes: {iteration_counts['season_outcomes']} seasons")
+    for row in iteration_counts.get("scenario_grid_rows", []):
+        print(f"Scenario grid row {row['row']}: {row['draws']} draws")
+    cells = iteration_counts.get("scenario_grid_cells", [])
+    if cells:
+        print(f"Scenario grid cells: {min(cell['seasons'] for cell in cells)} to {max(cell['seasons'] for cell in cells)} seasons each")
+
+
+def main(*, iterations: int | None = 100000, year: int = 2024, conference: ConferenceName = "B12", entire_season: bool = True, structured_scenarios: bool = True, save_figures: bool = True, show_figures: bool = True, grid_min_share: float = 0.2, time_budget: float | None = None, export_formats: list[str] = [], timings: bool = False, trace: bool = False, memory_report: bool = False, show_progress: bool = False, progress_log: str | None = None, checkpoint_every: float | None = None, resume: str | None = None, seed: int | None = None, shard: range | None = None, chunk_iterations: int = 1000, expected_snapshot: str | None = None, merge: list[str] = []):
+    season = scraper.get_season_snapshot(year, conference or None)
+
+    snapshot = checkpoint.snapshot_hash(season)
+    if expected_snapshot is not None and expected_snapshot != snapshot:
+        raise ValueError(f"The season snapshot is {snapshot}, not {expected_snapshot}")
+    config = {"year": year, "conference": conference, "iterations": iterations, "entire_season": entire_season, "structured_scenarios": structured_scenarios, "grid_min_share": grid_min_share}
+    if shard is not None or merge:
+        # a sharded run is as long as its chunks, however many iterations were asked for
+        del config["iterations"]
+    merged_shards: list[shards.Shard] = []
+    if merge:
+        merged_shards = [shards.load(path) for path in merge]
+        reason = shards.mismatch(merged_shards, snapshot, config)
+        if reason is not None:
+            raise ValueError(f"Can't merge the shards: {reason}")
+    resumed: checkpoint.Checkpoint | None = None
+    if resume:
+        resume_path = checkpoint.latest() if resume == "latest" else resume
+        if resume_path is None:
+            raise ValueError("There is no checkpoint to resume from")
+        resumed = checkpoint.load(resume_path)
+        reason = resumed.mismatch(snapshot, config)
+        if reason is not None:
+            raise ValueError(f"Can't resume from {resume_path}: {reason}")
+        print(f"Resuming from {resume_path} ({resumed.completed} iterations done)")
+    # each chunk of work seeds its own random stream from this, so a resumed run picks up new streams
+    if shard is not None:
+        # every shard of a run has to draw from the same streams, so by default they're seeded from the season
+        run_seed = seed if seed is not None else int(snapshot[:16], 16)
+        config |= {"seed": run_seed, "chunk_iterations": chunk_iterations}
+    else:
+        run_seed = resumed.seed if resumed else seed if seed is not None else random.getrandbits(64)
 
     simulation_tag = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
     simulation_dir = f"results/{simulation_tag}"
@@ -60,23 +148,12 @@ def main(iterations: int = 100000, year: int = 2024, conference: ConferenceName
     ]
 
     simulator = Simulator(season, scenarios)
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
 
+    jobs: list[scheduler.Job] = []
     if entire_season:
-        with concurrent.futures.ProcessPoolExecutor() as executor:
-            groups = os.process_cpu_count()
-            args = ([iterations // groups] * groups, [simulator.shallow_clone() for _ in range(groups)])
-            args[0][-1] += iterations % groups
-            for simulated in executor.map(simulate_season, *args):
-                simulator |= simulated
-
-    figs = ConferenceFigures(conference, simulator.conference_outcomes[conference], simulator.scenarios, simulator.week_outcomes[conference])
-
-    if entire_season:
-        # figs.all_figures(["BYU", "Colorado", "Iowa St", "Arizona St"], "BYU")
-        # figs.table_week("Colorado")
-        # figs.table_week("Iowa St")
-        # figs.table_week("Arizona St")
-        figs.table_week_ccg_outcomes(["BYU", "Colorado", "Iowa St", "Arizona St"])
+        season_job = scheduler.Job("season", simulate_season, (simulator.shallow_clone(),), iterations, uncertainty=lambda simulated: _season_uncertainty(simulated, conference))
+        jobs.append(season_job)
 
     if structured_scenarios:
         opponent_condition_lists = [
@@ -119,45 +196,271 @@ def main(iterations: int = 100000, year: int = 2024, conference: ConferenceName
         conditions_rows: list[str] = list(map(str, byu_conditions))
         conditions_columns: list[str] = ["\n".join(map(str, conditions)) for conditions in opponent_condition_lists]
 
-        args = ([], [], [])
-        indices_list = []
+        # Impossible cells (e.g. contradicting games that are already over) are found up front, so
+        # no simulation is scheduled for them and they are left blank.
+        row_indices_list: list[list[int]] = []
         for i, byu_condition in enumerate(byu_conditions):
+            row_indices_list.append([])
             for j, opponent_conditions in enumerate(opponent_condition_lists):
                 scenario = ScenarioOutcomes(byu_condition, *opponent_conditions)
-                indices_list.append((i, j))
-                args[0].append(iterations)
-                args[1].append(simulator)
-                args[2].append(scenario)
-        with concurrent.futures.ProcessPoolExecutor() as executor:
-            for indices, scenario in zip(indices_list, executor.map(simulate_scenario, *args)):
-                i, j = indices
+                reason = simulator.infeasibility(scenario)
+                if reason is not None:
+                    print(f"SKIP: {scenario.description(", ")} is impossible: {reason}")
+                    conditions_table[i][j] = None
+                else:
+                    row_indices_list[i].append(j)
+
+        # Every cell in a row shares the row's BYU condition, so each row is drawn once (forced to
+        # that condition) and the opponent conditions are checked against the shared draws. Only
+        # cells that too few of those draws satisfy fall back to their own forced simulation.
+        grid_simulator = Simulator(season)
+        row_jobs: list[scheduler.Job] = []
+        for i, row_indices in enumerate(row_indices_list):
+            if row_indices:
+                proposal = ScenarioOutcomes(byu_conditions[i])
+                row = [ScenarioOutcomes(byu_conditions[i], *opponent_condition_lists[j]) for j in row_indices]
+                row_jobs.append(scheduler.Job(i, simulate_shared, (grid_simulator, proposal, row), iterations, merge=_merge_shared, uncertainty=_shared_uncertainty))
+        jobs += row_jobs
+
+    for job in jobs:
+        job.seed = f"{run_seed}/{job.key}"
+    if resumed:
+        resumed.restore(jobs)
+    checkpointer = checkpoint.Checkpointer(f"{simulation_dir}/{simulation_tag}_checkpoint.pickle", jobs, snapshot, config, run_seed, checkpoint_every) if checkpoint_every else None
+
+    def on_merge(job: scheduler.Job, report: instruments.Report):
+        if report.timings is not None:
+            timing.totals |= report.timings
+        if report.rss is not None:
+            footprint.record_worker(*report.rss)
+        if memory_report and not job.failed:
+            footprint.record_growth(job.key, job.completed, job.result)
+        if checkpointer:
+            checkpointer.merged()
+
+    wrapper = instruments.Worker(time_phases=timings, report_memory=memory_report)
+    tracing.tracer = tracing.Tracer() if trace else None
+    for job in jobs:
+        job.merge = tracing.traced("merge", job.merge, job.function.__name__)
+    monitor = progress.Monitor(live=show_progress, log_path=progress_log) if show_progress or progress_log else None
+    fallback_cells: list[tuple[int, int]] = []
+    fallback_jobs: list[scheduler.Job] = []
+    # merging shards needs no simulation, so no pool either
+    pool = concurrent.futures.ProcessPoolExecutor(initializer=progress.attach, initargs=(monitor and monitor.queue,)) if not merge else contextlib.nullcontext()
+    with pool as executor, monitor or contextlib.nullcontext():
+        if tracing.tracer is not None and not merge:
+            executor = tracing.TracedExecutor(executor, tracing.tracer)
+        if shard is None and not merge:
+            with tracing.span("pilot chunks"):
+                scheduler.pilot(executor, jobs, wrapper=wrapper, on_merge=on_merge)
+
+        if structured_scenarios:
+            if merge:
+                fallback_cells = shards.fallbacks(merged_shards)
+            elif resumed and "fallbacks" in resumed.extra:
+                # decided before the checkpoint, from the pilot draws it had then
+                fallback_cells = resumed.extra["fallbacks"]
+            else:
+                # The pilot draws of each row are enough to tell which cells need their own simulation.
+                # Shards all decide from chunk 0 of each row, so they simulate the same cells.
+                pilots = shards.pilot(executor, row_jobs, chunk_iterations, wrapper=wrapper, on_merge=on_merge) if shard is not None else row_jobs
+                for job in pilots:
+                    if job.result is None:
+                        continue
+                    i = job.key
+                    proposal, row = job.result
+                    for j, scenario in zip(row_indices_list[i], row):
+                        if scenario.total_seasons < grid_min_share * proposal.total_seasons:
+                            fallback_cells.append((i, j))
+            for i, j in fallback_cells:
+                fallback_scenario = ScenarioOutcomes(byu_conditions[i], *opponent_condition_lists[j])
+                fallback_jobs.append(scheduler.Job((i, j), simulate_scenario, (grid_simulator, fallback_scenario), iterations, uncertainty=_scenario_uncertainty, seed=f"{run_seed}/{(i, j)}"))
+            if resumed:
+                resumed.restore(fallback_jobs)
+            if checkpointer:
+                checkpointer.extra["fallbacks"] = fallback_cells
+            for job in fallback_jobs:
+                job.merge = tracing.traced("merge", job.merge, job.function.__name__)
+            jobs += fallback_jobs
+
+        if merge:
+            merged = shards.merge_into(merged_shards, jobs)
+            print(f"Merged {len(merged_shards)} shards ({merged} iterations)")
+        elif shard is not None:
+            with tracing.span("run chunk range"):
+                scheduler.run_range(executor, jobs, shard, chunk_iterations, wrapper=wrapper, on_merge=on_merge)
+        else:
+            with tracing.span("run until deadline" if deadline is not None else "run chunks"):
+                scheduler.run(executor, jobs, deadline=deadline, wrapper=wrapper, on_merge=on_merge)
+    if shard is not None:
+        shard_path = f"{simulation_dir}/{simulation_tag}_shard_{shard.start}-{shard.stop}.pickle.gz"
+        shard_jobs = {job.key: {"result": job.result, "completed": job.completed, "seconds": job.seconds, "failed": job.failed} for job in jobs}
+        shards.save(shards.Shard(snapshot, config, (shard.start, shard.stop), shard_jobs, fallback_cells), shard_path)
+        print(f"Saved chunks {shard.start} to {shard.stop - 1} to {shard_path} (season snapshot {snapshot})")
+        return
+    if checkpointer:
+        checkpointer.save()
+        print(f"Saved a checkpoint to {checkpointer.path}")
+
+    iteration_counts: dict[str, Any] = {}
+
+    if entire_season:
+        simulator |= season_job.result
+        iteration_counts["season_outcomes"] = season_job.completed
+
+    figs = None
+    if save_figures or show_figures:
+        # matplotlib, pandas and plottable are slow to import, so simulation-only runs never import them
+        from figures import ConferenceFigures
+        figs = ConferenceFigures(conference, simulator.conference_outcomes[conference], simulator.scenarios, simulator.week_outcomes[conference])
+
+    interesting_teams = ["BYU", "Colorado", "Iowa St", "Arizona St"]
+    tables: export.Tables = {}
+    if export_formats and entire_season:
+        tables.update(export.season_tables(simulator.conference_outcomes[conference], simulator.scenarios, simulator.week_outcomes[conference], interesting_teams))
+
+    if figs and entire_season:
+        # figs.all_figures(["BYU", "Colorado", "Iowa St", "Arizona St"], "BYU")
+        # figs.table_week("Colorado")
+        # figs.table_week("Iowa St")
+        # figs.table_week("Arizona St")
+        figs.table_week_ccg_outcomes(interesting_teams)
+
+    if structured_scenarios:
+        iteration_counts["scenario_grid_rows"] = []
+        for job in row_jobs:
+            i = job.key
+            if job.result is None:
+                for j in row_indices_list[i]:
+                    conditions_table[i][j] = None
+                continue
+            proposal, row = job.result
+            for j, scenario in zip(row_indices_list[i], row):
                 conditions_table[i][j] = scenario
-        figs.table_structured_scenarios("BYU", conditions_table, conditions_rows, conditions_columns)
+            iteration_counts["scenario_grid_rows"].append({"row": conditions_rows[i], "draws": proposal.total_seasons})
+
+        for job in fallback_jobs:
+            i, j = job.key
+            shared_scenario = conditions_table[i][j]
+            if job.result is None:
+                conditions_table[i][j] = shared_scenario if shared_scenario and shared_scenario.total_seasons else None
+            else:
+                if shared_scenario:
+                    job.result |= shared_scenario
+                conditions_table[i][j] = job.result
+
+        iteration_counts["scenario_grid_cells"] = [
+            {"row": conditions_rows[i], "column": conditions_columns[j], "seasons": scenario.total_seasons}
+            for i, row in enumerate(conditions_table) for j, scenario in enumerate(row) if scenario
+        ]
+        if figs:
+            figs.table_structured_scenarios("BYU", conditions_table, conditions_rows, conditions_columns)
+        if export_formats:
+            tables["scenarios-detailed"] = export.structured_scenarios("BYU", conditions_table, conditions_rows, conditions_columns)
+
+    _print_iteration_counts(iteration_counts)
+    if timings:
+        print(timing.totals.table())
+    if trace:
+        print(tracing.tracer.summary())
+    if memory_report:
+        structures: dict[str, dict[str, footprint.Structure]] = {}
+        if entire_season:
+            structures["season"] = footprint.structures(season_job.result)
+        if structured_scenarios:
+            structures["scenario grid"] = footprint.structures([job.result for job in row_jobs + fallback_jobs if job.result is not None])
+        print(footprint.table(structures))
+        print(f"Peak RSS: {footprint.peak_rss() / 1e6:.0f}MB here, " + ", ".join(f"{rss / 1e6:.0f}MB in worker {pid}" for pid, rss in sorted(footprint.worker_peak_rss.items())))
+
+    filename_start = f"{simulation_dir}/{simulation_tag}_"
+    if save_figures or export_formats or timings or trace or memory_report:
+        os.makedirs(simulation_dir, exist_ok=True)
+    if save_figures or export_formats:
+        with open(f"{filename_start}iterations.json", "w") as f:
+            json.dump(iteration_counts, f, indent=2)
+    if timings:
+        with open(f"{filename_start}timings.json", "w") as f:
+            json.dump(timing.totals.to_json(), f, indent=2)
+    if trace:
+        tracing.tracer.save(f"{filename_start}trace.json")
+        print(f"Saved the trace to {filename_start}trace.json")
+    if memory_report:
+        with open(f"{filename_start}memory.json", "w") as f:
+            json.dump({
+                "peak_rss": footprint.peak_rss(),
+                "worker_peak_rss": {str(pid): rss for pid, rss in sorted(footprint.worker_peak_rss.items())},
+                "structures": {phase: {name: dataclasses.asdict(structure) for name, structure in measured.items()} for phase, measured in structures.items()},
+                "growth": footprint.growth,
+            }, f, indent=2)
+
+    if export_formats:
+        for path in export.write(tables, filename_start, export_formats):
+            print(f"Exported {path}")
 
     if save_figures:
-        os.mkdir(simulation_dir)
-        filename_start = f"{simulation_dir}/{simulation_tag}_"
         figs.save(filename_start)
 
     if show_figures:
         figs.show()
 
 
-def parse_args(args: list[str] | None = None) -> tuple[int, int, ConferenceName, bool]:
+def _duration(duration: str) -> float:
+    units = {"s": 1, "m": 60, "h": 3600}
+    duration = duration.strip().lower()
+    if duration and duration[-1] in units:
+        return float(duration[:-1]) * units[duration[-1]]
+    return float(duration)
+
+
+def _chunk_range(chunks: str) -> range:
+    start, _, end = chunks.partition(":")
+    chunk_range = range(int(start), int(end))
+    if not chunk_range or chunk_range.start < 0:
+        raise ValueError(f"{chunks} is not a range of chunks")
+    return chunk_range
+
+
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    """The command line as the keyword arguments of `main`"""
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("--iterations", type=int, default=100000, help="The number of simulation iterations to run (default: 100000)")
-    parser.add_argument("--no-save-figs", dest="save_figs", action="store_false", help="Don't save the figures (default: save them)")
-    parser.add_argument("--show-figs", action="store_true", help="Show the figures")
-    parser.add_argument("--tiebreakers", action="store_true", help="Simulate the tiebreaker scenarios")
-    parser.add_argument("--no-season-outcomes", dest="season_outcomes", action="store_false", help="Don't simulate the regular season outcomes")
+    amount = parser.add_mutually_exclusive_group()
+    amount.add_argument("--iterations", type=int, default=100000, help="The number of simulation iterations to run (default: 100000)")
+    amount.add_argument("--time-budget", type=_duration, help="Simulate until this much time has passed (e.g. 300s, 5m) instead of for a number of iterations")
+    parser.add_argument("--no-save-figs", dest="save_figures", action="store_false", help="Don't save the figures (default: save them)")
+    parser.add_argument("--show-figs", dest="show_figures", action="store_true", help="Show the figures")
+    parser.add_argument("--export", dest="export_formats", action="append", choices=export.FORMATS, default=[], help="Also write the outcome tables in this format; may be given more than once (use with --no-save-figs to skip plotting entirely)")
+    parser.add_argument("--timings", action="store_true", help="Time each phase of the simulation and each tiebreaker, and report the totals across workers")
+    parser.add_argument("--trace", action="store_true", help="Record when each chunk of work is pickled, queued, run and merged, as a Chrome trace")
+    parser.add_argument("--memory-report", action="store_true", help="Report the peak RSS of each worker and the size of each outcome structure, and log how they grow")
+    parser.add_argument("--progress", dest="show_progress", action="store_true", help="Show a live line with the iterations done, seasons a second and the leading CCG probabilities")
+    parser.add_argument("--progress-log", help="Write the progress records the workers send as JSON lines to this file")
+    parser.add_argument("--checkpoint-every", type=_duration, help="Save the merged results so far this often (e.g. 300s, 5m), so the run can be resumed if it stops")
+    parser.add_argument("--resume", nargs="?", const="latest", help="Continue the run from this checkpoint (default: the latest one in results/)")
+    parser.add_argument("--seed", type=int, help="Seed the run's random streams with this (default: a random seed, or for a shard one from the season snapshot)")
+    sharding = parser.add_mutually_exclusive_group()
+    sharding.add_argument("--shard", type=_chunk_range, metavar="START:END", help="Only run chunks START to END - 1 of every job and save them as a shard to merge with the run's other shards")
+    sharding.add_argument("--merge", nargs="+", default=[], metavar="SHARD", help="Merge these shards of a run and make the usual outputs from them instead of simulating")
+    parser.add_argument("--chunk-iterations", type=int, default=1000, help="The iterations in each chunk of a shard (default: 1000)")
+    parser.add_argument("--snapshot-hash", dest="expected_snapshot", help="Stop unless the season snapshot has this hash (printed by each shard), so every shard runs against the same season")
+    parser.add_argument("--tiebreakers", dest="structured_scenarios", action="store_true", help="Simulate the tiebreaker scenarios")
+    parser.add_argument("--grid-min-share", type=float, default=0.2, help="Minimum share of a scenario grid row's draws a cell must match before it is simulated on its own instead (default: 0.2)")
+    parser.add_argument("--no-season-outcomes", dest="entire_season", action="store_false", help="Don't simulate the regular season outcomes")
     # TODO Other options are not implemented
     # parser.add_argument("--year", default=2024, type=int, help="The season to run simulations on (default: 2024)")
     # parser.add_argument("--conference", default="B12", help="The conference to run simulations on (default: B12)")
 
+    parser.set_defaults(year=2024, conference="B12")
+
     parsed = parser.parse_args(args)
-    return parsed.iterations, 2024, "B12", parsed.season_outcomes, parsed.tiebreakers, parsed.save_figs, parsed.show_figs
+    if "parquet" in parsed.export_formats and not export.parquet_available():
+        parser.error("--export parquet needs pandas and pyarrow or fastparquet")
+    if (parsed.shard or parsed.merge) and (parsed.time_budget is not None or parsed.checkpoint_every or parsed.resume):
+        parser.error("--shard and --merge can't be used with --time-budget, --checkpoint-every or --resume")
+    if parsed.time_budget is not None:
+        parsed.iterations = None
+    return parsed
 
 
 if __name__ == "__main__":
-    main(*parse_args())
+    main(**vars(parse_args()))
@@ -0,0 +1,160 @@
+import argparse
+import hashlib
+import html
+import http.server
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+from pathlib import Path
+
+import requests
+
+from sports.season import Game, SeasonSnapshot, TeamName
+
+
+def _page_filename(path: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") + ".html"
+
+
+def _massey_line(game: Game) -> str:
+    """Formats a game the way a line of the Massey scores page does"""
+    score_a, score_b = game.final_score or (0, 0)
+    home = "" if game.neutral else "@"
+    line = f"{game.date} {game.team_a:<24}{score_a:>3} {home + game.team_b:<24}{score_b:>3}"
+    if game.final_score is None:
+        line += " Sch"
+    if game.neutral:
+        line += "  Neutral Site"
+    return html.escape(line)
+
+
+class MasseyStandIn:
+    """
+    Serves Massey Ratings pages without going to masseyratings.com
+
+    Pages recorded in `pages_dir` are served as they were recorded. Pages that
+    weren't recorded are fetched from `record_from` and saved to `pages_dir` if
+    it's given, or otherwise made up: the scores page lists the games of
+    `season`, team searches list `team_ids`, and game pages give a win
+    probability that depends only on the two teams and the site.
+    """
+    def __init__(self, pages_dir: Path | None = None, season: SeasonSnapshot | None = None, team_ids: dict[TeamName, int] | None = None, record_from: str | None = None, latency: float = 0.0):
+        self.pages_dir = pages_dir
+        self.season = season
+        self.team_ids = team_ids or {}
+        self.record_from = record_from
+        self.latency = latency
+        """Seconds to wait before answering each request, to act like a remote server"""
+        self.requests = 0
+        self.not_modified = 0
+        """Requests answered with 304 Not Modified"""
+        self.__lock = threading.Lock()
+
+    def page(self, path: str) -> bytes | None:
+        """The page at `path` (including the query string), or None if there is no such page"""
+        with self.__lock:
+            self.requests += 1
+        if self.pages_dir is not None:
+            recorded = self.pages_dir / _page_filename(path)
+            if recorded.exists():
+                return recorded.read_bytes()
+        if self.record_from is not None:
+            response = requests.get(self.record_from + path, timeout=30)
+            if response.status_code != 200:
+                return None
+            if self.pages_dir is not None:
+                self.pages_dir.mkdir(parents=True, exist_ok=True)
+                (self.pages_dir / _page_filename(path)).write_bytes(response.content)
+            return response.content
+        return self.__synthetic_page(path)
+
+    def __synthetic_page(self, path: str) -> bytes | None:
+        url = urllib.parse.urlsplit(path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        if url.path == "/game.php":
+            pwin = random.Random(f"{query.get('oid0')},{query.get('oid1')},{query.get('h')}").uniform(0.02, 0.98)
+            return f"<html><body><script>var pwin=[{pwin:.4f},{1 - pwin:.4f}];</script></body></html>".encode()
+        if url.path == "/scores.php" and self.season is not None:
+            lines = "\n".join(sorted(_massey_line(game) for game in self.season.games))
+            return f"<html><body><pre>\n{lines}\n</pre></body></html>".encode()
+        if url.path == "/json/namesearch.php":
+            return json.dumps({str(i): {"value": id, "label": name} for i, (name, id) in enumerate(self.team_ids.items())}).encode()
+        if url.path == "/school":
+            names = {str(id): name for name, id in self.team_ids.items()}
+            if query.get("t") not in names:
+                return None
+            return f'<html><body><h1 id="title0"><a href="#">{html.escape(names[query["t"]])}</a></h1></body></html>'.encode()
+        return None
+
+
+def serve(stand_in: MasseyStandIn, host: str = "127.0.0.1", port: int = 0) -> http.server.ThreadingHTTPServer:
+    """Starts serving `stand_in` on a background thread; the server's `server_address` has the port it bound"""
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            if stand_in.latency:
+                time.sleep(stand_in.latency)
+            body = stand_in.page(self.path)
+            etag = None if body is None else f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+            if etag is not None and etag == self.headers.get("If-None-Match"):
+                stand_in.not_modified += 1
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(404 if body is None else 200)
+            body = body or b""
+            if etag is not None:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve recorded or made up Massey Ratings pages; set MASSEY_URL to this server to scrape from it")
+
+    parser.add_argument("--host", default="127.0.0.1", help="The address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="The port to listen on (default: 8000)")
+    parser.add_argument("--pages", type=Path, help="The directory of recorded pages")
+    parser.add_argument("--record", action="store_true", help="Fetch pages that haven't been recorded from masseyratings.com and save them to --pages")
+    parser.add_argument("--season", type=Path, help="A season snapshot file to make up the scores page from")
+    parser.add_argument("--team-ids", type=Path, help="A team ids file to make up team searches from")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before answering each request (default: 0)")
+
+    return parser.parse_args(args)
+
+
+if __name__ == "__main__":
+    import scraper
+
+    args = parse_args()
+    season = None
+    if args.season:
+        with open(args.season, "r") as f:
+            season = SeasonSnapshot.deserialize(f.readlines(), lambda conf: None)
+    team_ids = None
+    if args.team_ids:
+        with open(args.team_ids, "r") as f:
+            team_ids = scraper._deserialize_team_ids(f.readlines())
+    stand_in = MasseyStandIn(args.pages, season, team_ids, "https://masseyratings.com" if args.record else None, args.latency)
+    server = serve(stand_in, args.host, args.port)
+    print(f"serving Massey pages on http://{args.host}:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,181 @@
+"""
+Live progress of the simulations running in worker processes
+
+A worker attached to a queue (with `attach`, the pool's initializer) reports
+on each chunk it runs: every `interval` seconds at most, the simulator loops
+send how many iterations of the chunk are done and, for a season simulation,
+how many of those seasons each team made the CCG. A `Monitor` in the parent
+reads the queue, adds up the latest record of every chunk, and shows a live
+line with the iterations done, seasons a second and the leading CCG
+probabilities with their standard errors. It can also write every record as a
+line of JSON.
+"""
+import contextlib
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import queue as queues
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterator, TextIO
+
+Counts = dict[str, tuple[int, int]]
+"""For each estimate, how many of how many seasons it held in (e.g. a team making the CCG)"""
+
+
+class Reporter:
+    """Sends the progress of one chunk to the parent"""
+    def __init__(self, queue: Any, function: str, chunk: int, interval: float):
+        self.queue = queue
+        self.function = function
+        self.chunk = chunk
+        self.interval = interval
+        self.__next = time.monotonic() + interval
+        self.__iterations = 0
+        self.__counts: Counts = {}
+
+    def update(self, iterations: int, counts: Callable[[], Counts] | None = None, *, force: bool = False):
+        """Notes that `iterations` of the chunk are done, and sends them on if it's time to"""
+        self.__iterations = iterations
+        now = time.monotonic()
+        if not force and now < self.__next:
+            return
+        self.__next = now + self.interval
+        if counts is not None:
+            self.__counts = counts()
+        self.__send(False)
+
+    def finish(self):
+        self.__send(True)
+
+    def __send(self, done: bool):
+        self.queue.put({"time": time.time(), "pid": os.getpid(), "chunk": self.chunk, "function": self.function, "iterations": self.__iterations, "counts": self.__counts, "done": done})
+
+
+_queue: Any = None
+_interval = 1.0
+_chunks = itertools.count()
+
+current: Reporter | None = None
+"""The reporter of the chunk running in this worker (None when not reporting)"""
+
+
+def attach(queue: Any, interval: float = 1.0):
+    """Sends the progress of the chunks this process runs to `queue` (None to stop)"""
+    global _queue, _interval
+    _queue = queue
+    _interval = interval
+
+
+@contextlib.contextmanager
+def reporting(function: str) -> Iterator[Reporter | None]:
+    """Makes a reporter for a chunk of `function` current for the length of the block, if attached to a queue"""
+    global current
+    previous = current
+    current = Reporter(_queue, function, next(_chunks), _interval) if _queue is not None else None
+    try:
+        yield current
+    finally:
+        if current is not None:
+            current.finish()
+        current = previous
+
+
+def _standard_error(count: int, total: int) -> float:
+    p = count / total
+    return math.sqrt(p * (1 - p) / total)
+
+
+class Monitor:
+    """
+    Reads the progress the workers send to its `queue` while it's entered,
+    showing a live line on stderr if `live` and writing each record to
+    `log_path` if given
+    """
+    def __init__(self, *, live: bool = True, log_path: str | None = None, interval: float = 0.5, estimates: int = 3):
+        self.queue = multiprocessing.Queue()
+        self.live = live
+        self.log_path = log_path
+        self.interval = interval
+        self.estimates = estimates
+        self.start = time.monotonic()
+        self.latest: dict[tuple[int, int], dict[str, Any]] = {}
+        """The latest record of each chunk, by (pid, chunk)"""
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__log: TextIO | None = None
+        self.__line_length = 0
+
+    def __enter__(self) -> "Monitor":
+        self.start = time.monotonic()
+        if self.log_path:
+            self.__log = open(self.log_path, "w")
+        self.__thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.__stop.set()
+        self.__thread.join()
+        self.__drain()
+        if self.live:
+            self.__show(final=True)
+        if self.__log:
+            self.__log.close()
+
+    def __run(self):
+        shown = time.monotonic()
+        while not self.__stop.is_set():
+            try:
+                self.__receive(self.queue.get(timeout=self.interval))
+            except queues.Empty:
+                pass
+            if self.live and time.monotonic() - shown >= self.interval:
+                self.__show()
+                shown = time.monotonic()
+
+    def __drain(self):
+        while True:
+            try:
+                self.__receive(self.queue.get(timeout=0.1))
+            except queues.Empty:
+                return
+
+    def __receive(self, record: dict[str, Any]):
+        self.latest[record["pid"], record["chunk"]] = record
+        if self.__log:
+            self.__log.write(json.dumps(record) + "\n")
+            self.__log.flush()
+
+    def iterations(self) -> dict[str, int]:
+        """The iterations done so far by each kind of chunk (by function)"""
+        done: dict[str, int] = {}
+        for record in list(self.latest.values()):
+            done[record["function"]] = done.get(record["function"], 0) + record["iterations"]
+        return done
+
+    def estimates_so_far(self) -> dict[str, tuple[float, float, int]]:
+        """Each estimate over every chunk so far, with its standard error and the seasons it's from"""
+        totals: dict[str, list[int]] = {}
+        for record in list(self.latest.values()):
+            for name, (count, total) in record["counts"].items():
+                summed = totals.setdefault(name, [0, 0])
+                summed[0] += count
+                summed[1] += total
+        return {name: (count / total, _standard_error(count, total), total) for name, (count, total) in totals.items() if total}
+
+    def line(self) -> str:
+        seconds = max(time.monotonic() - self.start, 1e-9)
+        iterations = self.iterations()
+        parts = [f"{sum(iterations.values()):,} iterations ({sum(iterations.values()) / seconds:,.0f}/s)"]
+        leaders = sorted(self.estimates_so_far().items(), key=lambda item: item[1][0], reverse=True)[:self.estimates]
+        parts += [f"{name} {p:.1%} ± {se:.1%}" for name, (p, se, _) in leaders]
+        return f"{seconds:.0f}s: " + ", ".join(parts)
+
+    def __show(self, final: bool = False):
+        line = self.line()
+        sys.stderr.write("\r" + line.ljust(self.__line_length) + ("\n" if final else ""))
+        sys.stderr.flush()
+        self.__line_length = len(line)
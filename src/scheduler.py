@@ -0,0 +1,253 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+import concurrent.futures
+import heapq
+import math
+import os
+import random
+import time
+
+
+def merge_ior(result: Any, other: Any) -> Any:
+    result |= other
+    return result
+
+
+@dataclass
+class Job:
+    """
+    A piece of simulation work that can be split into chunks of iterations
+
+    `function(iterations, *args)` runs one chunk in a worker and returns its
+    result, or None if the work failed. Chunk results are combined into
+    `result` with `merge(result, chunk_result)`. A job with `iterations` of None
+    runs until the deadline of the run.
+    """
+    key: Hashable
+    function: Callable[..., Any]
+    args: tuple
+    iterations: int | None
+    merge: Callable[[Any, Any], Any] = merge_ior
+    uncertainty: Callable[[Any], float] | None = None
+    """The standard error of the quantity the job estimates, given its result so far"""
+    result: Any = None
+    completed: int = 0
+    """Iterations merged into the result so far"""
+    scheduled: int = 0
+    """Iterations handed to workers so far"""
+    seconds: float = 0.0
+    """Worker time spent on the completed iterations"""
+    failed: bool = False
+    seed: str | None = None
+    """Chunk n of the job seeds the worker's random stream with f"{seed}/{n}", if set"""
+    chunks: int = 0
+    """Chunks handed to workers so far"""
+
+    @property
+    def seconds_per_iteration(self) -> float | None:
+        return self.seconds / self.completed if self.completed else None
+
+    @property
+    def remaining(self) -> int | float:
+        if self.failed:
+            return 0
+        if self.iterations is None:
+            return math.inf
+        return self.iterations - self.scheduled
+
+    @property
+    def variance_reduction_rate(self) -> float:
+        """How fast more iterations currently shrink the variance of the job's estimate, per second of work"""
+        variance = self.uncertainty(self.result) ** 2 if self.uncertainty and self.result is not None else 1.0
+        # the variance falls roughly as 1/n, so one more iteration reduces it by about variance/n
+        return variance / (max(self.scheduled, 1) * (self.seconds_per_iteration or 1.0))
+
+
+Wrapper = Callable[..., tuple[Any, Any]]
+"""Runs a chunk in its worker as `wrapper(function, iterations, *args)`, returning its result and a report on it"""
+
+MergeHook = Callable[[Job, Any], None]
+"""Called with the job and its chunk's report (None without a wrapper) after each chunk is merged"""
+
+
+@dataclass
+class Chunk:
+    """A chunk of a job, as sent to a worker"""
+    key: Hashable
+    function: Callable[..., Any]
+    args: tuple
+    iterations: int
+    seed: str | None = None
+    wrapper: Wrapper | None = None
+
+    def __call__(self) -> tuple[Any, float, Any]:
+        """Runs the chunk; returns its result, how long it took and the wrapper's report"""
+        if self.seed is not None:
+            random.seed(self.seed)
+        start = time.perf_counter()
+        if self.wrapper is None:
+            result, report = self.function(self.iterations, *self.args), None
+        else:
+            result, report = self.wrapper(self.function, self.iterations, *self.args)
+        return result, time.perf_counter() - start, report
+
+    def __str__(self) -> str:
+        return f"{self.function.__name__} {self.key} ({self.iterations} iterations)"
+
+    @property
+    def category(self) -> str:
+        return self.function.__name__
+
+
+def _submit(executor: concurrent.futures.Executor, job: Job, iterations: int, wrapper: Wrapper | None) -> concurrent.futures.Future:
+    seed = None if job.seed is None else f"{job.seed}/{job.chunks}"
+    job.chunks += 1
+    return executor.submit(Chunk(job.key, job.function, job.args, iterations, seed, wrapper))
+
+
+def _merge_chunk(job: Job, iterations: int, future: concurrent.futures.Future, on_merge: MergeHook | None):
+    result, seconds, report = future.result()
+    if result is None:
+        job.failed = True
+        job.result = None
+    elif not job.failed:
+        job.result = result if job.result is None else job.merge(job.result, result)
+        job.completed += iterations
+        job.seconds += seconds
+    if on_merge is not None:
+        on_merge(job, report)
+
+
+def _run_chunks(executor: concurrent.futures.Executor, chunks: list[tuple[float, int, Job, int]], max_in_flight: int, wrapper: Wrapper | None, on_merge: MergeHook | None):
+    """Runs chunks (cost, order, job, iterations) most expensive first, keeping at most `max_in_flight` submitted"""
+    heapq.heapify(chunks)
+    in_flight: dict[concurrent.futures.Future, tuple[Job, int]] = {}
+    while chunks or in_flight:
+        while chunks and len(in_flight) < max_in_flight:
+            _, _, job, iterations = heapq.heappop(chunks)
+            if job.failed:
+                continue
+            future = _submit(executor, job, iterations, wrapper)
+            in_flight[future] = (job, iterations)
+        if not in_flight:
+            break
+        done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            job, iterations = in_flight.pop(future)
+            _merge_chunk(job, iterations, future, on_merge)
+
+
+def pilot(executor: concurrent.futures.Executor, jobs: list[Job], workers: int | None = None, *, fraction: float = 0.01, min_iterations: int = 100, wrapper: Wrapper | None = None, on_merge: MergeHook | None = None):
+    """
+    Runs a short pilot chunk of every job that hasn't run yet, to measure how
+    long an iteration of each job takes
+
+    The pilot is `fraction` of the job's iterations, but at least `min_iterations`.
+    """
+    workers = workers or os.process_cpu_count() or 1
+    pilots = []
+    for order, job in enumerate(jobs):
+        if job.scheduled > 0:
+            continue
+        iterations = min_iterations if job.iterations is None else max(min_iterations, math.ceil(job.iterations * fraction))
+        iterations = min(job.remaining, iterations)
+        if iterations > 0:
+            job.scheduled += iterations
+            pilots.append((0.0, order, job, iterations))
+    _run_chunks(executor, pilots, 2 * workers, wrapper, on_merge)
+
+
+def run_range(executor: concurrent.futures.Executor, jobs: list[Job], chunks: range, chunk_iterations: int, workers: int | None = None, *, wrapper: Wrapper | None = None, on_merge: MergeHook | None = None):
+    """
+    Runs chunks `chunks` of every job, each of `chunk_iterations` iterations
+
+    Chunk n of a seeded job draws from the same random stream wherever it runs,
+    so one run can be split into ranges of chunks that are run separately (e.g.
+    on several machines) and merged afterwards.
+    """
+    workers = workers or os.process_cpu_count() or 1
+    queued = []
+    for j, job in enumerate(jobs):
+        job.chunks = chunks.start
+        job.scheduled += len(chunks) * chunk_iterations
+        # a job's chunks are taken in order, so each gets the seed of its own number
+        queued += [(0.0, n * len(jobs) + j, job, chunk_iterations) for n in range(len(chunks))]
+    _run_chunks(executor, queued, 2 * workers, wrapper, on_merge)
+
+
+def run(executor: concurrent.futures.Executor, jobs: list[Job], workers: int | None = None, *, deadline: float | None = None, chunks_per_worker: int = 4, min_chunk_seconds: float = 0.5, wrapper: Wrapper | None = None, on_merge: MergeHook | None = None):
+    """
+    Runs every job on `executor`, splitting the jobs into chunks
+
+    Jobs that haven't run yet get a pilot chunk first (see `pilot`). Without a
+    deadline, the rest of each job is then split into chunks of roughly equal
+    cost, sized so that every worker gets about `chunks_per_worker` of them, and
+    the chunks are queued most expensive job first. Idle workers take the next
+    chunk from the queue, so cheap chunks fill in around the expensive ones at
+    the end of the run.
+
+    With a `deadline` (in `time.monotonic()` seconds), see `run_until`.
+    `wrapper`, if given, runs each chunk in its worker (e.g. to instrument it),
+    and `on_merge` is called with the job and the wrapper's report after each
+    chunk is merged (e.g. to save a checkpoint).
+    """
+    workers = workers or os.process_cpu_count() or 1
+    pilot(executor, jobs, workers, wrapper=wrapper, on_merge=on_merge)
+    if deadline is not None:
+        run_until(executor, jobs, deadline, workers, chunks_per_worker=chunks_per_worker, min_chunk_seconds=min_chunk_seconds, wrapper=wrapper, on_merge=on_merge)
+        return
+    if any(job.iterations is None for job in jobs):
+        raise ValueError("Jobs without an iteration count need a deadline")
+
+    costs = {job.key: job.remaining * job.seconds_per_iteration for job in jobs if job.remaining > 0 and job.seconds_per_iteration is not None}
+    chunk_seconds = max(min_chunk_seconds, sum(costs.values()) / (workers * chunks_per_worker))
+
+    chunks = []
+    order = 0
+    for job in jobs:
+        if job.remaining <= 0:
+            continue
+        cost = costs.get(job.key, 0.0)
+        chunk_count = max(1, round(cost / chunk_seconds))
+        chunk_size = math.ceil(job.remaining / chunk_count)
+        while job.remaining > 0:
+            iterations = min(chunk_size, job.remaining)
+            job.scheduled += iterations
+            # negative so the most expensive jobs come off the heap first
+            chunks.append((-cost, order, job, iterations))
+            order += 1
+    _run_chunks(executor, chunks, 2 * workers, wrapper, on_merge)
+
+
+def run_until(executor: concurrent.futures.Executor, jobs: list[Job], deadline: float, workers: int | None = None, *, chunks_per_worker: int = 4, min_chunk_seconds: float = 0.5, wrapper: Wrapper | None = None, on_merge: MergeHook | None = None):
+    """
+    Runs chunks of the jobs until `deadline` (in `time.monotonic()` seconds)
+
+    Every job must have had a pilot chunk. Each free worker gets a chunk of the
+    job whose estimate is currently improving fastest per second of work (see
+    `Job.variance_reduction_rate`), so the time goes where the uncertainty is.
+    Chunks are sized to end by the deadline; chunks already running when the
+    deadline passes are waited for and merged.
+    """
+    workers = workers or os.process_cpu_count() or 1
+    chunk_seconds = max(min_chunk_seconds, (deadline - time.monotonic()) / (workers * chunks_per_worker * 4))
+    in_flight: dict[concurrent.futures.Future, tuple[Job, int]] = {}
+    while True:
+        while len(in_flight) < workers:
+            time_left = deadline - time.monotonic()
+            candidates = [job for job in jobs if job.remaining > 0 and job.seconds_per_iteration]
+            if time_left <= 0 or not candidates:
+                break
+            job = max(candidates, key=lambda job: job.variance_reduction_rate)
+            iterations = min(job.remaining, int(min(chunk_seconds, time_left) / job.seconds_per_iteration))
+            if iterations < 1:
+                break
+            job.scheduled += iterations
+            future = _submit(executor, job, iterations, wrapper)
+            in_flight[future] = (job, iterations)
+        if not in_flight:
+            break
+        done, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+        for future in done:
+            job, iterations = in_flight.pop(future)
+            _merge_chunk(job, iterations, future, on_merge)
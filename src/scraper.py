@@ -1,90 +1,303 @@
 
 import datetime
-import requests
-from bs4 import BeautifulSoup
 import re
 import datetime
-from typing import Iterable, Callable
-
-from sports.season import Game, TeamName, Conference, SeasonSnapshot
-from sports import tiebreakers
-
-
-_game_pattern = re.compile(r"(?P<date>[1-9][0-9]{3}-[0-1][0-9]-[0-3][0-9])\s*(?P<visit1>@?)(?P<name1>(?:[^ ]+ ??)+)\s*(?P<score1>[0-9]+)\s*(?P<visit2>@?)(?P<name2>(?:[^ ]+ ??)+)\s*(?P<score2>[0-9]+) *(?:(?P<overtime>O[1-9])|(?P<scheduled>Sch))? *(?P<neutralsite>[^\n]*)?")
+import os
+import threading
+import time
+import concurrent.futures
+import functools
+import html
+import json
+from pathlib import Path
+from typing import Iterable, Iterator, Callable, TYPE_CHECKING
+
+import eventlog
+import httpcache
+from sports.season import Game, TeamName, ConferenceName, Conference, SeasonSnapshot, ChampionshipSeeder
+from sports import tiebreakers, binary_snapshot
+
+if TYPE_CHECKING:
+    # requests and bs4 are slow to import, so they're only imported when something is actually scraped
+    import requests
+
+
+_pre_start_pattern = re.compile(rb"<pre[^>]*>", re.IGNORECASE)
+_pre_end_pattern = re.compile(rb"</pre>", re.IGNORECASE)
+_tag_pattern = re.compile(r"<[^>]*>")
+_game_pattern = re.compile(r"^(?P<date>[1-9][0-9]{3}-[0-1][0-9]-[0-3][0-9]) +(?P<visit1>@?)(?P<name1>\S+(?: \S+)*?) +(?P<score1>[0-9]+) +(?P<visit2>@?)(?P<name2>\S+(?: \S+)*?) +(?P<score2>[0-9]+)(?: +(?:(?P<overtime>O[1-9])|(?P<scheduled>Sch)))?(?: +(?P<neutralsite>.*?))? *$", re.MULTILINE)
 _win_probability_pattern = re.compile(r"pwin=\[(?P<pwina>[0-9\.]+),.*?\]")
 _championship_seeders = {"B12": tiebreakers.big12_championship_seeder}
 
 
-def scrape_team_ids(year: int) -> dict[TeamName, int]:
-    del year
-    url = "https://masseyratings.com/json/namesearch.php?s=587076&ct=10&mhr=1"
-    data = requests.get(url).json()
+def _championship_seeder(conference: ConferenceName) -> ChampionshipSeeder | None:
+    return _championship_seeders.get(conference)
+_timeout = 30
+
+massey_url = os.environ.get("MASSEY_URL", "https://masseyratings.com")
+"""Where Massey Ratings pages are fetched from (point MASSEY_URL at a massey_standin server to scrape offline)"""
+
+http_cache: httpcache.HttpCache | None = None if os.environ.get("MASSEY_CACHE") == "" else httpcache.HttpCache(
+    Path(os.environ.get("MASSEY_CACHE", "data/http_cache")),
+    httpcache.ttl_by_pattern([
+        (r"/school\?", 30 * 24 * 3600),
+        (r"/json/namesearch\.php", 24 * 3600),
+        (r"/game\.php", 6 * 3600),
+        (r"/scores\.php", 3600),
+    ]),
+)
+"""Where Massey responses are cached between scrapes (set MASSEY_CACHE to another directory, or to nothing to turn it off)"""
+
+Matchup = tuple[TeamName, TeamName, bool]
+"""An unplayed game to predict: (team a, team b, neutral)"""
+
+
+class RateLimiter:
+    """Spaces calls to `wait` out to at most `rate` per second, after an initial burst of `burst` calls"""
+    def __init__(self, rate: float | None, burst: int = 1):
+        self.__rate = rate
+        self.__burst = burst
+        self.__tokens = float(burst)
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def wait(self):
+        if not self.__rate:
+            return
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(self.__burst, self.__tokens + (now - self.__updated) * self.__rate)
+            self.__updated = now
+            # reserve a token now and sleep off any debt outside the lock, so waiting threads queue up in order
+            self.__tokens -= 1
+            delay = -self.__tokens / self.__rate
+        if delay > 0:
+            time.sleep(delay)
+
+
+def make_session(pool_size: int = 8, retries: int = 4, backoff: float = 0.5) -> "requests.Session":
+    """A session that keeps up to `pool_size` connections open and retries failed requests with exponential backoff"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504), allowed_methods=("GET",), respect_retry_after_header=True)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get(url: str, session: "requests.Session | None" = None) -> bytes:
+    if http_cache is not None:
+        return http_cache.get(url, session, _timeout)
+    import requests
+    response = (session or requests).get(url, timeout=_timeout)
+    response.raise_for_status()
+    return response.content
+
+
+def _scrape_team_name(id: int, session: "requests.Session") -> TeamName | None:
+    import requests
+    from bs4 import BeautifulSoup
 
-    team_ids: dict[TeamName, int] = {}
-    for team in data.values():
-        try:
-            id = team["value"]
-        except:
-            continue
-        team_data = BeautifulSoup(requests.get(f"https://masseyratings.com/school?t={id}").content, "html.parser")
-        name = team_data.find(id="title0").find("a").text
-        team_ids[name] = id
+    try:
+        team_data = BeautifulSoup(_get(f"{massey_url}/school?t={id}", session), "html.parser")
+    except requests.HTTPError:
+        return None
+    title = team_data.find(id="title0")
+    return None if title is None else title.find("a").text
+
+
+def scrape_team_ids(year: int, known: dict[TeamName, int] | None = None, on_found: Callable[[TeamName | None, int], None] | None = None, max_in_flight: int = 8, requests_per_second: float | None = 20.0, unresolved: Iterable[int] = ()) -> dict[TeamName, int]:
+    """
+    Scrapes the Massey ids of every team, adding to the `known` ones
+
+    Only ids that aren't known yet, or `unresolved` (their pages gave no team
+    before), have their pages fetched, concurrently over one pooled session.
+    `on_found` is called with each team as soon as its id is scraped, or with
+    None for an id whose page gives no team, so that progress can be saved as
+    it's made.
+    """
+    del year
+    team_ids = dict(known or {})
+    known_ids = {str(id) for id in team_ids.values()} | {str(id) for id in unresolved}
+    with make_session(max_in_flight) as session:
+        url = f"{massey_url}/json/namesearch.php?s=587076&ct=10&mhr=1"
+        data = json.loads(_get(url, session))
+
+        ids = []
+        for team in data.values():
+            try:
+                id = team["value"]
+            except:
+                continue
+            if str(id) not in known_ids:
+                ids.append(id)
+
+        limiter = RateLimiter(requests_per_second, max_in_flight)
+        def fetch(id: int) -> TeamName | None:
+            limiter.wait()
+            return _scrape_team_name(id, session)
+        with concurrent.futures.ThreadPoolExecutor(max_in_flight) as executor:
+            futures = {executor.submit(fetch, id): id for id in dict.fromkeys(ids)}
+            for future in concurrent.futures.as_completed(futures):
+                name = future.result()
+                if name is not None:
+                    team_ids[name] = futures[future]
+                if on_found:
+                    on_found(name, futures[future])
     return team_ids
 
 
-def _serialize_team_ids(team_ids: dict[TeamName, int]) -> str:
-    return "\n".join(f"{team},{id}" for team, id in team_ids.items())
+def _serialize_team_ids(team_ids: dict[TeamName | None, int]) -> str:
+    """One `name,id` row per team; an id whose page gives no team has no name"""
+    return "".join(f"{team or ''},{id}\n" for team, id in team_ids.items())
 
 
-def _deserialize_team_ids(lines: Iterable[str]) -> dict[TeamName, int]:
-    team_ids: dict[TeamName, int] = {}
+def _team_id_rows(lines: Iterable[str]) -> Iterator[tuple[str, str]]:
     for line in lines:
-        name, id = line.strip().split(",")
-        team_ids[name] = id
-    return team_ids
+        if line.strip():
+            yield tuple(line.strip().rsplit(",", 1))
+
+
+def _deserialize_team_ids(lines: Iterable[str]) -> dict[TeamName, int]:
+    return {name: id for name, id in _team_id_rows(lines) if name}
+
+
+def _deserialize_unresolved_ids(lines: Iterable[str]) -> set[int]:
+    """The ids saved without a name, whose pages gave no team"""
+    return {id for name, id in _team_id_rows(lines) if not name}
 
 
-def get_team_ids(year: int) -> dict[TeamName, int]:
+def get_team_ids(year: int, teams: Iterable[TeamName] | None = None) -> dict[TeamName, int]:
+    """
+    The Massey ids of every team, from data/{year}_team_ids.csv
+
+    Nothing is scraped unless the file is missing or lacks some of `teams`.
+    Then the teams missing from it are scraped and appended to it one by one, so
+    an interrupted scrape picks up where it left off, along with the ids whose
+    pages gave no team, so they aren't fetched again.
+    """
+    filename = f"data/{year}_team_ids.csv"
     try:
-        with open(f"data/{year}_team_ids.csv", "r") as f:
-            return _deserialize_team_ids(f.readlines())
-    except Exception:
-        print("scraping team ids...")
-        team_ids = scrape_team_ids(year)
-        print("done")
-        with open(f"data/{year}_team_ids.csv", "w") as f:
-            f.write(_serialize_team_ids(team_ids))
+        with open(filename, "r") as f:
+            saved = f.read()
+    except FileNotFoundError:
+        saved = ""
+    team_ids = _deserialize_team_ids(saved.splitlines())
+    if team_ids and (teams is None or all(team in team_ids for team in teams)):
         return team_ids
 
+    print("updating team ids...")
+    with open(filename, "a") as f:
+        if saved and not saved.endswith("\n"):
+            f.write("\n")
+        def save(name: TeamName | None, id: int):
+            f.write(_serialize_team_ids({name: id}))
+            f.flush()
+        team_ids = scrape_team_ids(year, team_ids, save, unresolved=_deserialize_unresolved_ids(saved.splitlines()))
+    print("done")
+    return team_ids
+
 
-def scrape_win_probability(team_a: TeamName, team_b: TeamName, neutral: bool, team_ids: dict[TeamName, int]) -> float:
+def scrape_win_probability(team_a: TeamName, team_b: TeamName, neutral: bool, team_ids: dict[TeamName, int], session: "requests.Session | None" = None) -> float:
     h = 0 if neutral else -1
-    url = f"https://masseyratings.com/game.php?s0=587076&oid0={team_ids[team_a]}&h={h}&s1=587076&oid1={team_ids[team_b]}"
-    page = requests.get(url).text
+    url = f"{massey_url}/game.php?s0=587076&oid0={team_ids[team_a]}&h={h}&s1=587076&oid1={team_ids[team_b]}"
+    page = _get(url, session).decode("utf-8", "replace")
     for pwin in _win_probability_pattern.findall(page):
         return float(pwin)
 
 
-def scrape_games(year: int, get_win_probability: Callable[[TeamName, TeamName, bool], float]) -> set[Game]:
-    url = f"https://masseyratings.com/scores.php?s=cf{year}&sub=fbs&all=1&sch=on"
-    page = requests.get(url)
-    soup = BeautifulSoup(page.content, "html.parser")
+def scrape_win_probabilities(matchups: Iterable[Matchup], team_ids: dict[TeamName, int], max_in_flight: int = 8, requests_per_second: float | None = 20.0) -> dict[Matchup, float]:
+    """
+    Scrapes the win probabilities of many matchups concurrently
+
+    At most `max_in_flight` requests are open at a time, all sharing the
+    connections of one session, and new requests are started at no more than
+    `requests_per_second`. Failed requests are retried with backoff.
+    """
+    matchups = list(dict.fromkeys(matchups))
+    limiter = RateLimiter(requests_per_second, max_in_flight)
+    with make_session(max_in_flight) as session, concurrent.futures.ThreadPoolExecutor(max_in_flight) as executor:
+        def fetch(matchup: Matchup) -> float:
+            limiter.wait()
+            return scrape_win_probability(*matchup, team_ids, session)
+        return dict(zip(matchups, executor.map(fetch, matchups)))
+
+
+@functools.cache
+def _date(date: str) -> datetime.date:
+    return datetime.date.fromisoformat(date)
+
 
-    data = soup.find("pre").text
+def _scores_page_text(content: bytes) -> str:
+    """The text of the first <pre> block of a scores page, found without parsing the rest of the page"""
+    start = _pre_start_pattern.search(content)
+    end = start and _pre_end_pattern.search(content, start.end())
+    if end is None:
+        raise ValueError("No <pre> block on the scores page")
+    pre = content[start.end():end.start()]
+    try:
+        text = pre.decode("utf-8")
+    except UnicodeDecodeError:
+        text = pre.decode("latin-1")
+    if "<" in text:
+        text = _tag_pattern.sub("", text)
+    return html.unescape(text)
+
+
+def parse_scores(content: bytes) -> set[Game]:
+    """Every game on a Massey scores page, without win probabilities"""
     games: set[Game] = set()
-    for match in _game_pattern.findall(data):
+    for match in _game_pattern.findall(_scores_page_text(content)):
         date, visit1, name1, score1, visit2, name2, score2, overtime, scheduled, neutralsite = match
         team_a, team_b = (name2, name1) if visit1 else (name1, name2)
-        neutral = bool(neutralsite.strip())
+        neutral = bool(neutralsite)
         score = (int(score2), int(score1)) if visit1 else (int(score1), int(score2))
-        team_a_win_probability = None
         if (0, 0) == score:
             score = None
-            team_a_win_probability = get_win_probability(team_a, team_b, neutral)
-        game = Game(datetime.datetime.strptime(date, "%Y-%m-%d").date(), team_a, team_b, neutral, score, team_a_win_probability)
-        games.add(game)
+        games.add(Game(_date(date), team_a, team_b, neutral, score, None))
     return games
-    
+
+
+def scrape_scores(year: int) -> set[Game]:
+    """Every game on the Massey scores page, without win probabilities"""
+    return parse_scores(_get(f"{massey_url}/scores.php?s=cf{year}&sub=fbs&all=1&sch=on"))
+
+
+def add_win_probabilities(games: set[Game], get_win_probabilities: Callable[[list[Matchup]], dict[Matchup, float]], previous: SeasonSnapshot | None = None) -> set[Game]:
+    """
+    Gives every unplayed game its win probability
+
+    Probabilities are reused from a `previous` snapshot for games that were
+    already scheduled then, but only if no game at all has been played since,
+    because every result re-solves the ratings of the whole league. Every other
+    probability is fetched, in one batch so they can be scraped concurrently.
+    """
+    reusable: dict[tuple, float] = {}
+    if previous is not None:
+        played_before = {(game.date, game.team_a, game.team_b) for game in previous.games if game.is_over}
+        if not any(game.is_over and (game.date, game.team_a, game.team_b) not in played_before for game in games):
+            reusable = {
+                (game.date, game.team_a, game.team_b, game.neutral): game.team_a_win_probability
+                for game in previous.games
+                if not game.is_over and game.team_a_win_probability is not None
+            }
+
+    def key(game: Game) -> tuple:
+        return game.date, game.team_a, game.team_b, game.neutral
+    fetched = get_win_probabilities([(game.team_a, game.team_b, game.neutral) for game in games if not game.is_over and key(game) not in reusable])
+    return {
+        game if game.is_over else Game(game.date, game.team_a, game.team_b, game.neutral, None, reusable.get(key(game), fetched.get((game.team_a, game.team_b, game.neutral))))
+        for game in games
+    }
+
+
+def scrape_games(year: int, get_win_probabilities: Callable[[list[Matchup]], dict[Matchup, float]], previous: SeasonSnapshot | None = None) -> set[Game]:
+    return add_win_probabilities(scrape_scores(year), get_win_probabilities, previous)
+
 
 def get_conferences(year: int) -> set[Conference]:
     del year
@@ -120,25 +333,72 @@ def get_conferences(year: int) -> set[Conference]:
     return conferences
 
 
-def get_season_snapshot(year: int) -> SeasonSnapshot:
+season_log_dir = Path("data/season_log")
+"""Where the event log of each season is kept (see eventlog.SeasonLog)"""
+
+
+def _previous_season_snapshot(year: int, date: datetime.date) -> SeasonSnapshot | None:
+    """The most recent snapshot of the season saved before `date`, if there is one"""
+    log = eventlog.SeasonLog(season_log_dir, year)
+    if any(recorded < date for recorded in log.dates()):
+        return log.snapshot(date - datetime.timedelta(days=1), lambda conf: _championship_seeders.get(conf))
+
+    dates = []
+    for path in Path("data").glob("*_season.txt"):
+        try:
+            dates.append((datetime.date.fromisoformat(path.name.removesuffix("_season.txt")), path))
+        except ValueError:
+            continue
+    for _, path in sorted((d for d in dates if d[0] < date), reverse=True):
+        try:
+            with open(path, "r") as f:
+                season = SeasonSnapshot.deserialize(f.readlines(), lambda conf: _championship_seeders.get(conf))
+        except Exception:
+            continue
+        if season.year == year:
+            return season
+    return None
+
+
+def get_season_snapshot(year: int, conference: ConferenceName | None = None) -> SeasonSnapshot:
+    """
+    Today's snapshot of the season, scraping it if needed
+
+    With a `conference`, the season is filtered to that conference (see
+    `SeasonSnapshot.filter`), reading only its games from the binary snapshot.
+    """
     date = datetime.date.today()
 
+    try:
+        return binary_snapshot.load_shared(f"data/{str(date)}_season.bin", _championship_seeder, conference)
+    except Exception:
+        # missing, from an older version, or without the conference; the text snapshot settles it
+        pass
+
     try:
         with open(f"data/{str(date)}_season.txt", "r") as f:
             season = SeasonSnapshot.deserialize(f.readlines(), lambda conf: _championship_seeders.get(conf))
     except Exception:
-        print("constructing season...")
-        team_ids = get_team_ids(year)
-        def get_win_probability(team_a: TeamName, team_b: TeamName, neutral: bool) -> float:
-            return scrape_win_probability(team_a, team_b, neutral, team_ids)
-        games = scrape_games(year, get_win_probability)
+        previous = _previous_season_snapshot(year, date)
+        print("constructing season..." if previous is None else "updating season...")
+        def get_win_probabilities(matchups: list[Matchup]) -> dict[Matchup, float]:
+            if not matchups:
+                return {}
+            team_ids = get_team_ids(year, {team for team_a, team_b, _ in matchups for team in (team_a, team_b)})
+            print(f"scraping {len(matchups)} win probabilities...")
+            return scrape_win_probabilities(matchups, team_ids)
+        games = scrape_games(year, get_win_probabilities, previous)
         conferences = get_conferences(year)
         season = SeasonSnapshot(year, conferences, games)
         print("done")
         with open(f"data/{str(date)}_season.txt", "w") as f:
             f.write("\n".join(season.serialize()))
+        eventlog.SeasonLog(season_log_dir, year).record(date, season)
 
-    return season
+    # the text file stays the readable record of the day; the binary copy is for loading quickly and
+    # for sending to workers by reference
+    binary_snapshot.save(season, f"data/{str(date)}_season.bin")
+    return binary_snapshot.load_shared(f"data/{str(date)}_season.bin", _championship_seeder, conference)
 
 
 # months = {
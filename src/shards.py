@@ -0,0 +1,127 @@
+"""
+Results of part of a run, for splitting one run across several machines
+
+A shard run simulates a range of the seeded chunks of every job (see
+`scheduler.run_range`) and saves the merged results of those chunks to a shard
+file, a gzipped pickle with a version, the hash of the season snapshot it was
+run against, the run's settings and seed, and its range of chunks. Shards of
+the same run are merged by merging each job's results, which are counts keyed
+by outcome, so merging costs as much as there are distinct outcomes however
+many iterations went into them.
+
+The scenario grid cells that need their own simulation are decided from the
+draws of chunk 0 of each row (see `pilot`), which every shard runs, so every
+shard simulates the same cells and the merged run doesn't depend on how it was
+split.
+"""
+import concurrent.futures
+import dataclasses
+import gzip
+import os
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Hashable
+
+import scheduler
+
+VERSION = 1
+
+
+@dataclass
+class Shard:
+    snapshot: str
+    config: dict[str, Any]
+    """The run's settings, including its seed and the iterations in each chunk"""
+    chunks: tuple[int, int]
+    """The first chunk of each job in this shard, and the one after the last"""
+    jobs: dict[Hashable, dict[str, Any]]
+    """The result, completed iterations, seconds and failure of each job, by key"""
+    fallbacks: list[tuple[int, int]] = field(default_factory=list)
+    """The scenario grid cells simulated on their own"""
+    version: int = VERSION
+
+
+def pilot(executor: concurrent.futures.Executor, jobs: list[scheduler.Job], chunk_iterations: int, *, wrapper: scheduler.Wrapper | None = None, on_merge: scheduler.MergeHook | None = None) -> list[scheduler.Job]:
+    """
+    Runs chunk 0 of each of the jobs on a copy of it, and returns the copies
+
+    Every shard of a run gets the same results from these, whatever range of
+    chunks it runs, so decisions made from them are the same in every shard.
+    """
+    pilots = [dataclasses.replace(job, result=None, completed=0, scheduled=0, seconds=0.0, failed=False, chunks=0) for job in jobs]
+    scheduler.run_range(executor, pilots, range(0, 1), chunk_iterations, wrapper=wrapper, on_merge=on_merge)
+    return pilots
+
+
+def save(shard: Shard, path: Path | str):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with gzip.open(temporary, "wb") as f:
+        pickle.dump(shard, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
+
+
+def load(path: Path | str) -> Shard:
+    with gzip.open(path, "rb") as f:
+        loaded = pickle.load(f)
+    if not isinstance(loaded, Shard) or loaded.version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} shard")
+    return loaded
+
+
+def _differences(a: dict[str, Any], b: dict[str, Any], keys: Any) -> str:
+    return ", ".join(f"{key} is {a.get(key)}, not {b.get(key)}" for key in sorted(keys) if a.get(key) != b.get(key))
+
+
+def mismatch(shards: list[Shard], snapshot: str, config: dict[str, Any]) -> str | None:
+    """
+    Why the shards can't be merged into a run with this season and these
+    settings (which needn't include the seed or chunk size), or None if they can
+    """
+    if not shards:
+        return "there are no shards"
+    for shard in shards:
+        if shard.snapshot != snapshot:
+            return f"the shard of chunks {shard.chunks[0]} to {shard.chunks[1] - 1} was run against another season snapshot"
+        different = _differences(shard.config, shards[0].config, shard.config.keys() | shards[0].config.keys())
+        if different:
+            return f"the shards were run with different settings: {different}"
+        if sorted(shard.fallbacks) != sorted(shards[0].fallbacks):
+            return "the shards simulated different scenario grid cells on their own"
+    different = _differences(shards[0].config, config, config.keys())
+    if different:
+        return f"the shards were run with other settings: {different}"
+    ranges = sorted(shard.chunks for shard in shards)
+    for (_, end), (next_start, next_end) in zip(ranges, ranges[1:]):
+        if next_start < end:
+            return f"chunks {next_start} to {min(end, next_end) - 1} are in more than one shard"
+    return None
+
+
+def fallbacks(shards: list[Shard]) -> list[tuple[int, int]]:
+    """The scenario grid cells the shards simulated on their own (the same in every shard that `mismatch` passes)"""
+    return sorted(shards[0].fallbacks)
+
+
+def merge_into(shards: list[Shard], jobs: list) -> int:
+    """Merges the shards' results into the scheduler jobs with the same keys; returns the iterations merged"""
+    merged = 0
+    for shard in shards:
+        for job in jobs:
+            state = shard.jobs.get(job.key)
+            if state is None:
+                continue
+            if state["failed"]:
+                job.failed = True
+                job.result = None
+            if job.failed:
+                continue
+            if state["result"] is not None:
+                job.result = state["result"] if job.result is None else job.merge(job.result, state["result"])
+            job.completed += state["completed"]
+            job.scheduled = job.completed
+            job.seconds += state["seconds"]
+            merged += state["completed"]
+    return merged
@@ -1,8 +1,11 @@
-from sports.season import TeamName, SeasonSnapshot, ConferenceName,  TeamPair
+from sports.season import TeamName, SeasonSnapshot, ConferenceName,  TeamPair, OutcomeIndex
 from sports.outcomes import ConferenceSeasonOutcomes, ScenarioOutcomes, WeekOutcomes
+from sports import timing
+import progress
 import random
 import os
 import datetime
+from typing import Callable, Iterator
 
 
 class Simulator:
@@ -14,6 +17,7 @@ class Simulator:
                 week_end = week_end - datetime.timedelta(days=1)
 
         self.__season = season
+        self.__index = OutcomeIndex(season)
 
         if week_outcomes:
             self.week_outcomes = week_outcomes
@@ -29,6 +33,8 @@ class Simulator:
             self.week_outcomes = week_outcomes
 
         self.scenarios = scenarios
+        for scenario in scenarios:
+            scenario.compile(self.__index)
         self.conference_outcomes = {conference.name: ConferenceSeasonOutcomes() for conference in season.conferences}
 
     def __ior__(self, other: "Simulator") -> "Simulator":
@@ -42,34 +48,100 @@ class Simulator:
 
     def simulate(self, iterations: int):
         # print(f"Running {iterations} simulations")
+        lap = timing.laps(timing.current)
         for i in range(iterations):
-            # if i % 1000 == 0:
-                # print("completed", i)
+            if i % 100 == 0 and progress.current is not None:
+                progress.current.update(i, self.__ccg_counts)
+            lap()
             rolled_season = self.__season.roll(random.random)
+            lap("roll")
             ccg_teams: dict[ConferenceName, TeamPair] = {}
             for conference in rolled_season.conferences:
                 rolled_conference = rolled_season.conference(conference.name)
+                lap("team construction")
+                # cached, so only computed here to time it apart from the seeding
+                rolled_conference.standings
+                lap("standings")
                 rolled_ccg_teams = tuple(sorted(rolled_conference.championship_game_participants))
+                lap("seeding")
                 ccg_teams[conference.name] = rolled_ccg_teams
 
                 self.conference_outcomes[conference.name] += (rolled_conference, rolled_ccg_teams)
+                lap("conference outcomes")
                 self.week_outcomes[conference.name] += rolled_conference
+                lap("week outcomes")
 
             ccg_games = tuple(item[1] for item in sorted(ccg_teams.items(), key=lambda item: item[0]))
-            for scenario in self.scenarios:
-                scenario += (rolled_season, ccg_games)
+            if self.scenarios:
+                outcome = self.__index.outcome(rolled_season)
+                for scenario in self.scenarios:
+                    scenario += (rolled_season, ccg_games, outcome)
+                lap("scenario checks")
+        if progress.current is not None:
+            progress.current.update(iterations, self.__ccg_counts, force=True)
+
+    def __ccg_counts(self) -> progress.Counts:
+        """How many of the seasons simulated so far each team made its CCG in"""
+        return {
+            f"{team} CCG": (outcomes.made_ccg, conference.total_seasons)
+            for conference in self.conference_outcomes.values()
+            for team, outcomes in conference.teams.items()
+        }
 
     def simulate_scenario(self, scenario: ScenarioOutcomes, iterations: int):
         # print(f"Running {iterations} simulations of scenario {scenario.description(", ")}")
+        self.__check_feasible(scenario)
+        lap = timing.laps(timing.current)
+        for rolled_season in self.__forced_rolls(scenario, iterations, lap):
+            ccg_games = self.__ccg_games(rolled_season, lap)
+            scenario += (rolled_season, ccg_games, self.__index.outcome(rolled_season))
+            lap("scenario checks")
+        return scenario
+
+    def simulate_shared(self, proposal: ScenarioOutcomes, scenarios: list[ScenarioOutcomes], iterations: int) -> tuple[ScenarioOutcomes, list[ScenarioOutcomes]]:
+        """
+        Simulates several scenarios from one shared set of draws
+
+        Seasons are rolled forced to the conditions of `proposal`, then every
+        scenario is checked against the same rolled season, so each scenario
+        only counts the draws that also satisfy its own conditions. The scenarios
+        should all imply the proposal's conditions (e.g. one row of a grid).
+        """
+        self.__check_feasible(proposal)
+        for scenario in scenarios:
+            scenario.compile(self.__index)
+        lap = timing.laps(timing.current)
+        for rolled_season in self.__forced_rolls(proposal, iterations, lap):
+            ccg_games = self.__ccg_games(rolled_season, lap)
+            outcome = self.__index.outcome(rolled_season)
+            proposal += (rolled_season, ccg_games, outcome)
+            for scenario in scenarios:
+                scenario += (rolled_season, ccg_games, outcome)
+            lap("scenario checks")
+        return proposal, scenarios
+
+    def infeasibility(self, scenario: ScenarioOutcomes) -> str | None:
+        """Why the scenario can never happen in this season, or None if it can (or can't be checked)"""
+        return scenario.infeasibility(self.__index)
+
+    def __check_feasible(self, scenario: ScenarioOutcomes):
+        reason = self.infeasibility(scenario)
+        if reason is not None:
+            print(f"ERROR: {scenario.description(", ")} is impossible: {reason}")
+            raise ValueError(reason)
+
+    def __forced_rolls(self, scenario: ScenarioOutcomes, iterations: int, lap: Callable[[str | None], None]) -> Iterator[SeasonSnapshot]:
         i = 0
         warned = False
         errors = 0
         while i < iterations:
-            # if i % 1000 == 0:
-            #     print("completed", i)
+            if i % 100 == 0 and progress.current is not None:
+                progress.current.update(i)
+            lap()
             try:
                 rolled_season = self.__season.roll(random.random, game_forcers=scenario.game_forcers)
             except ValueError as e:
+                lap("invalid rolls")
                 errors += 1
                 if not warned:
                     print(f"WARN: {scenario.description(", ")} produced invalid result on iteration {i}")
@@ -78,18 +150,26 @@ class Simulator:
                     print(f"ERROR: {scenario.description(", ")} produced 100 consecutive invalid results")
                     raise
                 continue
-            ccg_teams: dict[ConferenceName, TeamPair] = {}
-            for conference in rolled_season.conferences:
-                rolled_conference = rolled_season.conference(conference.name)
-                rolled_ccg_teams = tuple(sorted(rolled_conference.championship_game_participants))
-                ccg_teams[conference.name] = rolled_ccg_teams
-            ccg_games = tuple(item[1] for item in sorted(ccg_teams.items(), key=lambda item: item[0]))
-            scenario += (rolled_season, ccg_games)
+            lap("roll")
+            yield rolled_season
 
             errors = 0
             i += 1
+        if progress.current is not None:
+            progress.current.update(i, force=True)
 
-        return scenario
+    @staticmethod
+    def __ccg_games(rolled_season: SeasonSnapshot, lap: Callable[[str | None], None]) -> tuple[TeamPair, ...]:
+        ccg_teams: dict[ConferenceName, TeamPair] = {}
+        for conference in rolled_season.conferences:
+            rolled_conference = rolled_season.conference(conference.name)
+            lap("team construction")
+            rolled_conference.standings
+            lap("standings")
+            rolled_ccg_teams = tuple(sorted(rolled_conference.championship_game_participants))
+            lap("seeding")
+            ccg_teams[conference.name] = rolled_ccg_teams
+        return tuple(item[1] for item in sorted(ccg_teams.items(), key=lambda item: item[0]))
 
     def shallow_clone(self) -> "Simulator":
         week_outcomes = {conference: week.shallow_clone() for conference, week in self.week_outcomes.items()}
@@ -0,0 +1,255 @@
+"""
+A compact binary format for season snapshots
+
+The file starts with a fixed header, followed by a team table (the names of
+every team, in order, so that teams can be referred to by index), a conference
+table, one fixed-width record per game, and an index of the records of each
+team's games. Files are read by memory-mapping them, so loading a snapshot
+doesn't parse any text. When only one conference or a few teams are wanted, the
+index is used to unpack just their games.
+
+A season loaded with `load_shared` is loaded once per process, and is sent to
+other processes (e.g. with a process pool's tasks and results) as a reference to
+its file rather than pickled game by game, so each worker maps the file and
+builds the season once, however many tasks it is sent with. Forked workers start
+with the parent's copy and build nothing.
+"""
+import datetime
+import mmap
+import os
+import pickle
+import struct
+from multiprocessing.reduction import ForkingPickler
+from pathlib import Path
+from typing import Callable, Iterable
+
+from sports.season import SeasonSnapshot, Conference, Division, Game, TeamName, ConferenceName, ChampionshipSeeder
+
+
+MAGIC = b"CFBS"
+VERSION = 2
+
+_header = struct.Struct("<4sHxxiIIIIIII")
+"""magic, version, year, teams offset, conferences offset, games offset, index offset, team count, conference count, game count"""
+_game = struct.Struct("<IIIBHHd")
+"""date ordinal, team a index, team b index, flags, team a score, team b score, team a win probability"""
+_length = struct.Struct("<H")
+_count = struct.Struct("<H")
+_index = struct.Struct("<I")
+
+_NEUTRAL = 1
+_OVER = 2
+_HAS_PROBABILITY = 4
+
+
+def _pack_string(string: str) -> bytes:
+    encoded = string.encode()
+    return _length.pack(len(encoded)) + encoded
+
+
+def _unpack_string(buffer: memoryview, offset: int) -> tuple[str, int]:
+    (length,) = _length.unpack_from(buffer, offset)
+    offset += _length.size
+    return bytes(buffer[offset:offset + length]).decode(), offset + length
+
+
+def _pack_teams(teams: set[TeamName], team_indices: dict[TeamName, int]) -> bytes:
+    indices = sorted(team_indices[team] for team in teams)
+    return _count.pack(len(indices)) + b"".join(_index.pack(index) for index in indices)
+
+
+def serialize(season: SeasonSnapshot) -> bytes:
+    team_names = sorted({team for conference in season.conferences for team in conference.teams} | {team for game in season.games for team in (game.team_a, game.team_b)})
+    team_indices = {team: i for i, team in enumerate(team_names)}
+
+    # the offset of each name and then the names, so that names can be looked up without reading the others
+    encoded_names = [name.encode() for name in team_names]
+    name_offsets = [0]
+    for name in encoded_names:
+        name_offsets.append(name_offsets[-1] + len(name))
+    teams = b"".join(_index.pack(offset) for offset in name_offsets) + b"".join(encoded_names)
+
+    conferences = []
+    for conference in sorted(season.conferences, key=lambda conference: conference.name):
+        divisions = sorted(conference.divisions or (), key=lambda division: division.name)
+        conferences.append(_pack_string(conference.name) + bytes([conference.has_championship_game]) + _pack_teams(conference.teams, team_indices) + _count.pack(len(divisions)))
+        conferences += [_pack_string(division.name) + _pack_teams(division.team_names, team_indices) for division in divisions]
+    conferences = b"".join(conferences)
+
+    games = []
+    team_games: list[list[int]] = [[] for _ in team_names]
+    for position, game in enumerate(sorted(season.games, key=lambda game: (game.date, game.team_a, game.team_b))):
+        team_games[team_indices[game.team_a]].append(position)
+        team_games[team_indices[game.team_b]].append(position)
+        flags = (_NEUTRAL if game.neutral else 0) | (_OVER if game.final_score is not None else 0) | (_HAS_PROBABILITY if game.team_a_win_probability is not None else 0)
+        score_a, score_b = game.final_score or (0, 0)
+        games.append(_game.pack(game.date.toordinal(), team_indices[game.team_a], team_indices[game.team_b], flags, score_a, score_b, game.team_a_win_probability or 0.0))
+    games = b"".join(games)
+
+    # where each team's game positions start in the postings, and then the postings
+    index = [0]
+    for positions in team_games:
+        index.append(index[-1] + len(positions))
+    index = b"".join(_index.pack(start) for start in index) + b"".join(_index.pack(position) for positions in team_games for position in positions)
+
+    teams_offset = _header.size
+    conferences_offset = teams_offset + len(teams)
+    games_offset = conferences_offset + len(conferences)
+    index_offset = games_offset + len(games)
+    header = _header.pack(MAGIC, VERSION, season.year, teams_offset, conferences_offset, games_offset, index_offset, len(team_names), len(season.conferences), len(season.games))
+    return header + teams + conferences + games + index
+
+
+class _TeamTable:
+    """Looks team names up by index, decoding each name the first time it's needed"""
+    def __init__(self, buffer: memoryview, offset: int, count: int):
+        self.__buffer = buffer
+        self.__offsets = offset
+        self.__names_offset = offset + (count + 1) * _index.size
+        self.__names: dict[int, TeamName] = {}
+
+    def __getitem__(self, index: int) -> TeamName:
+        name = self.__names.get(index)
+        if name is None:
+            start, end = struct.unpack_from("<II", self.__buffer, self.__offsets + index * _index.size)
+            name = bytes(self.__buffer[self.__names_offset + start:self.__names_offset + end]).decode()
+            self.__names[index] = name
+        return name
+
+
+def _unpack_team_indices(buffer: memoryview, offset: int) -> tuple[list[int], int]:
+    (count,) = _count.unpack_from(buffer, offset)
+    offset += _count.size
+    return [index for (index,) in _index.iter_unpack(buffer[offset:offset + count * _index.size])], offset + count * _index.size
+
+
+def deserialize(buffer: bytes | memoryview, championship_seeder_getter: Callable[[ConferenceName], ChampionshipSeeder | None], conference: ConferenceName | None = None, teams: Iterable[TeamName] | None = None) -> SeasonSnapshot:
+    """
+    Reads a season from a binary snapshot
+
+    With a `conference`, the season is filtered as by `SeasonSnapshot.filter`:
+    it has only that conference and the games its teams play in. With `teams`,
+    it has only the games those teams play in and the conferences they belong
+    to. Only the games that are kept are read.
+    """
+    buffer = memoryview(buffer)
+    magic, version, year, teams_offset, conferences_offset, games_offset, index_offset, team_count, conference_count, game_count = _header.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError("Not a binary season snapshot")
+    if version != VERSION:
+        raise ValueError(f"Unsupported binary season snapshot version: {version}")
+
+    team_names = _TeamTable(buffer, teams_offset, team_count)
+    wanted_teams = None if teams is None else set(teams)
+
+    conference_records: list[tuple[ConferenceName, bool, list[int], list[tuple[str, list[int]]]]] = []
+    offset = conferences_offset
+    for _ in range(conference_count):
+        name, offset = _unpack_string(buffer, offset)
+        has_championship_game = bool(buffer[offset])
+        team_indices, offset = _unpack_team_indices(buffer, offset + 1)
+        (division_count,) = _count.unpack_from(buffer, offset)
+        offset += _count.size
+        divisions = []
+        for _ in range(division_count):
+            division_name, offset = _unpack_string(buffer, offset)
+            division_teams, offset = _unpack_team_indices(buffer, offset)
+            divisions.append((division_name, division_teams))
+        conference_records.append((name, has_championship_game, team_indices, divisions))
+
+    if conference is not None:
+        conference_records = [record for record in conference_records if record[0] == conference]
+        if not conference_records:
+            raise ValueError(f"No such conference: {conference}")
+        selected_teams = set(conference_records[0][2])
+    elif wanted_teams is not None:
+        selected_teams = set()
+        for i in range(team_count):
+            if team_names[i] in wanted_teams:
+                selected_teams.add(i)
+        conference_records = [record for record in conference_records if selected_teams.intersection(record[2])]
+    else:
+        selected_teams = None
+
+    conferences: set[Conference] = set()
+    for name, has_championship_game, team_indices, divisions in conference_records:
+        conference_teams = {team_names[index] for index in team_indices}
+        conference_divisions = {Division(division_name, {team_names[index] for index in division_teams}) for division_name, division_teams in divisions}
+        conferences.add(Conference(name, conference_teams, conference_divisions, has_championship_game, championship_seeder_getter(name)))
+
+    if selected_teams is None:
+        records = _game.iter_unpack(buffer[games_offset:games_offset + game_count * _game.size])
+    else:
+        starts = index_offset
+        postings = index_offset + (team_count + 1) * _index.size
+        positions: set[int] = set()
+        for team in selected_teams:
+            start, end = struct.unpack_from("<II", buffer, starts + team * _index.size)
+            positions.update(position for (position,) in _index.iter_unpack(buffer[postings + start * _index.size:postings + end * _index.size]))
+        records = (_game.unpack_from(buffer, games_offset + position * _game.size) for position in sorted(positions))
+
+    games: set[Game] = set()
+    dates: dict[int, datetime.date] = {}
+    for ordinal, team_a, team_b, flags, score_a, score_b, probability in records:
+        if ordinal not in dates:
+            dates[ordinal] = datetime.date.fromordinal(ordinal)
+        games.add(Game(
+            dates[ordinal],
+            team_names[team_a],
+            team_names[team_b],
+            bool(flags & _NEUTRAL),
+            (score_a, score_b) if flags & _OVER else None,
+            probability if flags & _HAS_PROBABILITY else None,
+        ))
+
+    return SeasonSnapshot(year, conferences, games)
+
+
+def save(season: SeasonSnapshot, path: Path | str):
+    """Writes the season to `path`, replacing any existing file only once the new one is complete"""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(serialize(season))
+    os.replace(temporary, path)
+
+
+def load(path: Path | str, championship_seeder_getter: Callable[[ConferenceName], ChampionshipSeeder | None], conference: ConferenceName | None = None, teams: Iterable[TeamName] | None = None) -> SeasonSnapshot:
+    """Reads a season from a memory-mapped binary snapshot file, filtered as by `deserialize`"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        buffer = memoryview(mapped)
+        try:
+            return deserialize(buffer, championship_seeder_getter, conference, teams)
+        finally:
+            buffer.release()
+
+
+_shared: dict[tuple[str, ConferenceName | None], SeasonSnapshot] = {}
+"""The seasons loaded with `load_shared` in this process, by (absolute path, conference)"""
+_shared_keys: dict[int, tuple[str, Callable[[ConferenceName], ChampionshipSeeder | None], ConferenceName | None]] = {}
+"""The arguments each of them was loaded with, by id"""
+
+
+def load_shared(path: Path | str, championship_seeder_getter: Callable[[ConferenceName], ChampionshipSeeder | None], conference: ConferenceName | None = None) -> SeasonSnapshot:
+    """
+    `load`, once per process for each file and conference; the season is sent to
+    other processes as a reference to the file, so `championship_seeder_getter`
+    must be picklable (e.g. a module-level function)
+    """
+    path = os.path.abspath(path)
+    season = _shared.get((path, conference))
+    if season is None:
+        season = load(path, championship_seeder_getter, conference)
+        _shared[path, conference] = season
+        _shared_keys[id(season)] = (path, championship_seeder_getter, conference)
+    return season
+
+
+def _reduce(season: SeasonSnapshot):
+    key = _shared_keys.get(id(season))
+    if key is None:
+        return season.__reduce_ex__(pickle.HIGHEST_PROTOCOL)
+    return load_shared, key
+
+
+# only what's sent between processes is pickled by reference; files like checkpoints still hold the whole season
+ForkingPickler.register(SeasonSnapshot, _reduce)
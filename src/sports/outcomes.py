@@ -1,4 +1,4 @@
-from sports.season import Standing, TeamName, TeamNames, TeamPair, SeasonSnapshot, ConferenceSnapshot, TeamSnapshot, Game, UniformRoller
+from sports.season import Standing, TeamName, TeamNames, TeamPair, SeasonSnapshot, ConferenceSnapshot, TeamSnapshot, Game, UniformRoller, OutcomeIndex
 from collections import defaultdict
 from dataclasses import dataclass, field
 from typing import Callable, TypeAlias, Iterable, Any
@@ -160,14 +160,133 @@ def _short_name(team: TeamName) -> str:
     return short_names.get(team, team)
 
 
+@dataclass(frozen=True)
+class CompiledCondition:
+    """
+    A scenario condition compiled against a base season into integer tests over
+    the outcome vector of a rolled season (see `OutcomeIndex`)
+
+    An outcome vector `bits` satisfies the condition when `bits & mask == value`
+    and, for every `(team, a_mask, b_mask, min_wins, max_wins)` in `win_counts`,
+    the number of set bits in `bits & a_mask` plus unset bits in `b_mask` (the
+    team's remaining wins) is between `min_wins` and `max_wins`.
+    """
+    mask: int = 0
+    value: int = 0
+    win_counts: tuple[tuple[TeamName, int, int, int, int], ...] = ()
+    impossible: str | None = None
+    """Why the condition can never hold, if it can't"""
+
+    def __contains__(self, bits: int) -> bool:
+        if self.impossible is not None or bits & self.mask != self.value:
+            return False
+        for _, a_mask, b_mask, min_wins, max_wins in self.win_counts:
+            wins = (bits & a_mask).bit_count() + (~bits & b_mask).bit_count()
+            if wins < min_wins or wins > max_wins:
+                return False
+        return True
+
+    def __and__(self, other: "CompiledCondition") -> "CompiledCondition":
+        impossible = self.impossible or other.impossible
+        if impossible is None and (self.value ^ other.value) & self.mask & other.mask:
+            impossible = "conditions require different winners of the same game"
+        return CompiledCondition(self.mask | other.mask, self.value | other.value, self.win_counts + other.win_counts, impossible)
+
+    def infeasibility(self, max_shared_games: int = 20) -> str | None:
+        """
+        Why no outcome vector can satisfy the condition, or None if one can
+
+        Each team's win count is checked against the games the condition already
+        decides, then every assignment of the undecided games that more than one
+        win count depends on is searched (pruned by the win count bounds). If more
+        than `max_shared_games` such games exist, the search is skipped and only
+        the per-team bounds are checked.
+        """
+        if self.impossible is not None:
+            return self.impossible
+
+        decided_wins = []
+        for team, a_mask, b_mask, min_wins, max_wins in self.win_counts:
+            wins = (self.value & self.mask & a_mask).bit_count() + (~self.value & self.mask & b_mask).bit_count()
+            undecided = ((a_mask | b_mask) & ~self.mask).bit_count()
+            if wins > max_wins or wins + undecided < min_wins or min_wins > max_wins:
+                return f"{team} can win {wins} to {wins + undecided} of their remaining games, but needs {max(min_wins, 0)} to {max_wins}"
+            decided_wins.append(wins)
+
+        shared = 0
+        seen = 0
+        for _, a_mask, b_mask, _, _ in self.win_counts:
+            undecided = (a_mask | b_mask) & ~self.mask
+            shared |= seen & undecided
+            seen |= undecided
+        shared_slots = [slot for slot in range(shared.bit_length()) if shared >> slot & 1]
+        if not shared_slots or len(shared_slots) > max_shared_games:
+            return None
+
+        # wins so far and games still free to go either way, for each win count
+        wins = list(decided_wins)
+        free = [((a_mask | b_mask) & ~self.mask).bit_count() for _, a_mask, b_mask, _, _ in self.win_counts]
+        def search(i: int) -> bool:
+            if any(w > count[4] or w + f < count[3] for w, f, count in zip(wins, free, self.win_counts)):
+                return False
+            if i == len(shared_slots):
+                return True
+            bit = 1 << shared_slots[i]
+            for team_a_wins in (True, False):
+                for k, (_, a_mask, b_mask, _, _) in enumerate(self.win_counts):
+                    if (a_mask | b_mask) & bit:
+                        free[k] -= 1
+                        wins[k] += 1 if (team_a_wins and a_mask & bit) or (not team_a_wins and b_mask & bit) else 0
+                found = search(i + 1)
+                for k, (_, a_mask, b_mask, _, _) in enumerate(self.win_counts):
+                    if (a_mask | b_mask) & bit:
+                        free[k] += 1
+                        wins[k] -= 1 if (team_a_wins and a_mask & bit) or (not team_a_wins and b_mask & bit) else 0
+                if found:
+                    return True
+            return False
+        if not search(0):
+            teams = ", ".join(sorted({team for team, a_mask, b_mask, _, _ in self.win_counts if (a_mask | b_mask) & shared}))
+            return f"no results of the games between {teams} give every team its required win count"
+        return None
+
+
+def _compile_result(index: OutcomeIndex, team: TeamSnapshot, opponent: TeamName, win: bool) -> CompiledCondition:
+    games = [game for game in team.games if game.opponent(team.name) == opponent]
+    if not games:
+        return CompiledCondition(impossible=f"{team.name} does not play {opponent}")
+    for game in games:
+        if game.is_over and (game.winner == team.name) == win:
+            return CompiledCondition()
+    for game in games:
+        slot = index.slot(game)
+        if slot is not None:
+            team_a_wins = win == (game.team_a == team.name)
+            return CompiledCondition(1 << slot, (1 << slot) if team_a_wins else 0)
+    return CompiledCondition(impossible=f"{team.name} already {'lost to' if win else 'beat'} {opponent}")
+
+
+def _compile_record(index: OutcomeIndex, team_name: TeamName, min_wins: int, max_wins: int, wins: set[TeamName], losses: set[TeamName]) -> CompiledCondition:
+    team = index.season.team(team_name)
+    compiled = CompiledCondition()
+    for opponent in wins:
+        compiled &= _compile_result(index, team, opponent, True)
+    for opponent in losses:
+        compiled &= _compile_result(index, team, opponent, False)
+    a_mask, b_mask = index.team_masks(team_name)
+    return compiled & CompiledCondition(win_counts=((team_name, a_mask, b_mask, min_wins - team.wins, max_wins - team.wins),))
+
+
 ScenarioConditionCallable: TypeAlias = Callable[[SeasonSnapshot], bool]
 ScenarioForcer: TypeAlias = Callable[[UniformRoller, SeasonSnapshot], Iterable[Game]]
+ScenarioCompiler: TypeAlias = Callable[[OutcomeIndex], CompiledCondition]
 
 class ScenarioCondition:
-    def __init__(self, condition: ScenarioConditionCallable, forcer: ScenarioForcer, args: list[Any], description: str, probability: float, probability_factors: dict[TeamPair, float]):
+    def __init__(self, condition: ScenarioConditionCallable, forcer: ScenarioForcer, args: list[Any], description: str, probability: float, probability_factors: dict[TeamPair, float], compiler: ScenarioCompiler | None = None):
         self.__description = description
         self.__condition = condition
         self.__forcer = forcer
+        self.__compiler = compiler
         self.__args = args
         self.__probability = probability
         self.__probability_factors = probability_factors
@@ -181,6 +300,12 @@ class ScenarioCondition:
     def __str__(self) -> str:
         return self.__description
 
+    def compile(self, index: OutcomeIndex) -> CompiledCondition | None:
+        """Compiles the condition against the base season of `index`, if the condition supports it"""
+        if self.__compiler is None:
+            return None
+        return self.__compiler(index, *self.__args)
+
     @property
     def probability(self) -> float:
         return self.__probability
@@ -202,6 +327,10 @@ def _win_exactly_forcer(roller: UniformRoller, season: SeasonSnapshot, team_name
     return season.team(team_name).roll(roller, force_total_wins=win_count, force_wins_against=wins, force_losses_against=losses).games
 
 
+def _win_exactly_compiler(index: OutcomeIndex, team_name: TeamName, win_count: int, wins: set[TeamName] = set(), losses: set[TeamName] = set()) -> CompiledCondition:
+    return _compile_record(index, team_name, win_count, win_count, wins, losses)
+
+
 def win_exactly(season: SeasonSnapshot, team_name: TeamName, win_count: int, wins: set[TeamName] = set(), losses: set[TeamName] = set(), description: str | None = None):
     if not description:
         description = f"{_short_name(team_name)} {win_count}-{12-win_count}"
@@ -214,6 +343,7 @@ def win_exactly(season: SeasonSnapshot, team_name: TeamName, win_count: int, win
         # description or f"{_short_name(team_name)} {win_count}-{12-win_count}\n({('beat ' + ', '.join(map(_short_name, wins))) if wins else ''}{'; ' if wins and losses else ''}{('lost to ' + ', '.join(map(_short_name, losses))) if losses else ''})",
         description,
         *season.team(team_name).probability_of(win_count, wins, losses),
+        compiler=_win_exactly_compiler,
     )
 
 
@@ -237,6 +367,10 @@ def _win_at_most_forcer(roller: UniformRoller, season: SeasonSnapshot, team_name
     return season.team(team_name).roll(roller, force_max_wins=max_win_count, force_wins_against=wins, force_losses_against=losses).games
 
 
+def _win_at_most_compiler(index: OutcomeIndex, team_name: TeamName, max_win_count: int, wins: set[TeamName] = set(), losses: set[TeamName] = set()) -> CompiledCondition:
+    return _compile_record(index, team_name, 0, max_win_count, wins, losses)
+
+
 def win_at_most(season: SeasonSnapshot, team_name: TeamName, max_win_count: int, wins: set[TeamName] = set(), losses: set[TeamName] = set()) -> ScenarioCondition:
     description = f"{_short_name(team_name)} {max_win_count}-{12-max_win_count} or worse"
     if wins:
@@ -248,7 +382,8 @@ def win_at_most(season: SeasonSnapshot, team_name: TeamName, max_win_count: int,
         _win_at_most_forcer,
         [team_name, max_win_count, wins, losses],
         description,
-        *season.team(team_name).probability_of(max_wins = max_win_count, wins_against=wins, losses_against=losses)
+        *season.team(team_name).probability_of(max_wins = max_win_count, wins_against=wins, losses_against=losses),
+        compiler=_win_at_most_compiler,
     )
 
 
@@ -267,13 +402,18 @@ def _beat_forcer(roller: UniformRoller, season: SeasonSnapshot, winner: TeamName
     return {season.team(winner).game_against(loser).force_outcome_if_not_over(winner, True)}
 
 
+def _beat_compiler(index: OutcomeIndex, winner: TeamName, loser: TeamName) -> CompiledCondition:
+    return _compile_result(index, index.season.team(winner), loser, True)
+
+
 def beat(season: SeasonSnapshot, winner: TeamName, loser: TeamName) -> ScenarioCondition:
     probability = season.team(winner).game_against(loser).win_probability(winner)
     return ScenarioCondition(
         _beat_condition, _beat_forcer, [winner, loser],
         f"{_short_name(winner)} beat {_short_name(loser)}",
         probability,
-        probability_factors={tuple(sorted([winner, loser])): probability}
+        probability_factors={tuple(sorted([winner, loser])): probability},
+        compiler=_beat_compiler,
     )
 
 
@@ -285,6 +425,14 @@ def _win_out_except_possibly_forcer(roller: UniformRoller, season: SeasonSnapsho
     return {game.force_outcome_if_not_over(team, True) if game.opponent(team) not in allowed_losses else game.roll(lambda p: roller() <= p) for game in season.team(team).games},
 
 
+def _win_out_except_possibly_compiler(index: OutcomeIndex, team: TeamName, allowed_losses: set[TeamName]) -> CompiledCondition:
+    team_snapshot = index.season.team(team)
+    compiled = CompiledCondition()
+    for opponent in team_snapshot.opponents - allowed_losses:
+        compiled &= _compile_result(index, team_snapshot, opponent, True)
+    return compiled
+
+
 def win_out_except_possibly(season: SeasonSnapshot, team_name: TeamName, possible_losses: list[TeamName]) -> ScenarioCondition:
     team = season.team(team_name)
     allowed_losses = set(possible_losses) | team.losses_against
@@ -300,7 +448,8 @@ def win_out_except_possibly(season: SeasonSnapshot, team_name: TeamName, possibl
         _win_out_except_possibly_condition, _win_out_except_possibly_forcer, [team_name, allowed_losses],
         f"{_short_name(team_name)} only possible {'losses' if len(possible_losses) > 1 else 'loss'}: {', '.join(map(_short_name,possible_losses))}",
         prob,
-        factors
+        factors,
+        compiler=_win_out_except_possibly_compiler,
     )
 
 
@@ -327,8 +476,13 @@ def _any_outcome_forcer(roller: UniformRoller, season: SeasonSnapshot) -> set[Ga
     return set()
 
 
+def _any_outcome_compiler(index: OutcomeIndex) -> CompiledCondition:
+    del index
+    return CompiledCondition()
+
+
 def any_outcome() -> ScenarioCondition:
-    return ScenarioCondition(_any_outcome_condition, _any_outcome_forcer, [], "Overall", 1.0, {})
+    return ScenarioCondition(_any_outcome_condition, _any_outcome_forcer, [], "Overall", 1.0, {}, compiler=_any_outcome_compiler)
 
 
 class ScenarioOutcomes:
@@ -337,6 +491,7 @@ class ScenarioOutcomes:
         self.__description_override = description_override
         self.__total_seasons = 0
         self.__ccg_participants: dict[tuple[TeamPair, ...], int] = defaultdict(_zero)
+        self.__compiled: CompiledCondition | None = None
 
     @property
     def total_seasons(self) -> int:
@@ -365,9 +520,38 @@ class ScenarioOutcomes:
     def __contains__(self, rolled_season: SeasonSnapshot) -> bool:
         return all(rolled_season in condition for condition in self.__conditions)
 
-    def __iadd__(self, result: tuple[SeasonSnapshot, tuple[TeamPair, ...]]) -> "ScenarioOutcomes":
-        season, ccg_teams = result
-        if season in self:
+    def compile(self, index: OutcomeIndex) -> CompiledCondition | None:
+        """
+        Compiles all of the conditions against the base season of `index`
+
+        Once compiled, results added with an outcome vector from the same index
+        are checked with integer operations instead of the condition callables.
+        Returns None (and keeps using the callables) if any condition can't be compiled.
+        """
+        compiled = CompiledCondition()
+        for condition in self.__conditions:
+            compiled_condition = condition.compile(index)
+            if compiled_condition is None:
+                compiled = None
+                break
+            compiled &= compiled_condition
+        self.__compiled = compiled
+        return compiled
+
+    def infeasibility(self, index: OutcomeIndex) -> str | None:
+        """Why the scenario can never happen given the base season of `index`, or None if it can (or can't be checked)"""
+        compiled = self.compile(index)
+        if compiled is None:
+            return None
+        return compiled.infeasibility()
+
+    def __iadd__(self, result: tuple[SeasonSnapshot, tuple[TeamPair, ...]] | tuple[SeasonSnapshot, tuple[TeamPair, ...], int]) -> "ScenarioOutcomes":
+        season, ccg_teams, *outcome = result
+        if outcome and self.__compiled is not None:
+            matches = outcome[0] in self.__compiled
+        else:
+            matches = season in self
+        if matches:
             self.__total_seasons += 1
             self.__ccg_participants[ccg_teams] += 1
         return self
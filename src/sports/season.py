@@ -177,7 +177,7 @@ class Division:
         return Division(parts[0], parts[1:])
 
     def serialize(self) -> str:
-        return self.name + "," + ",".join(self.team_names)
+        return self.name + "," + ",".join(sorted(self.team_names))
 
     def __hash__(self) -> int:
         return hash(self.name)
@@ -514,7 +514,7 @@ class Conference:
         return [
             self.name,
             _string_from_bool(self.has_championship_game),
-            ",".join(self.teams),
+            ",".join(sorted(self.teams)),
             "&".join(division.serialize() for division in self.divisions) if self.divisions else "",
         ]
 
@@ -581,6 +581,7 @@ class SeasonSnapshot:
         self.games = games
 
         self.__teams: dict[TeamName, TeamSnapshot] = {}
+        self.__ordered_games: list[Game] | None = None
 
     def __team_from_games_subset(self, name: TeamName, games: set[Game]) -> TeamSnapshot:
         for conf in self.conferences:
@@ -631,6 +632,13 @@ class SeasonSnapshot:
     def __clone_with_games(self, games: set[Game]) -> "SeasonSnapshot":
         return SeasonSnapshot(self.year, self.conferences, games)
 
+    @property
+    def ordered_games(self) -> list[Game]:
+        """The games in an order that doesn't depend on hashing, so a seeded roll draws the same in every process"""
+        if self.__ordered_games is None:
+            self.__ordered_games = sorted(self.games, key=lambda game: (game.date, game.team_a, game.team_b))
+        return self.__ordered_games
+
     def clone(self) -> "SeasonSnapshot":
         return self.__clone_with_games({game.clone() for game in self.games})
 
@@ -642,7 +650,7 @@ class SeasonSnapshot:
         ) -> "SeasonSnapshot":
         binary_roller = lambda p: roller() <= p
         if not game_forcers:
-            games = {game.roll(binary_roller) for game in self.games}
+            games = {game.roll(binary_roller) for game in self.ordered_games}
             return self.__clone_with_games(games)
 
         def add_no_conflicts(existing_games: set[Game], new_games: set[Game], raise_on_conflict: bool = True):
@@ -670,7 +678,7 @@ class SeasonSnapshot:
                 # print(f"  {game.winner} over {game.opponent(game.winner)}")
             add_no_conflicts(games, new_games)
 
-        for game in self.games:
+        for game in self.ordered_games:
             if not contains_game(games, game.team_a, game.team_b):
                 games.add(game.roll(binary_roller))
 
@@ -725,3 +733,50 @@ class SeasonSnapshot:
         lines.append("$ games")
         lines += [game.serialize() for game in self.games]
         return lines
+
+
+class OutcomeIndex:
+    """
+    Assigns each unplayed game of a season one bit of an integer outcome vector
+
+    Bit `i` of a rolled season's outcome vector is set when team a won the `i`th
+    unplayed game of the base season, so the results of a whole rolled season
+    can be tested with integer operations.
+    """
+    def __init__(self, season: SeasonSnapshot):
+        self.__season = season
+        remaining_games = sorted((game for game in season.games if not game.is_over), key=lambda game: (game.date, game.team_a, game.team_b))
+        self.__slots: dict[tuple[datetime.date, TeamName, TeamName], int] = {(game.date, game.team_a, game.team_b): i for i, game in enumerate(remaining_games)}
+        self.__team_masks: dict[TeamName, tuple[int, int]] = {}
+
+    @property
+    def season(self) -> SeasonSnapshot:
+        return self.__season
+
+    def slot(self, game: Game) -> int | None:
+        """The bit of `game` in an outcome vector, if the game is not over in the base season"""
+        return self.__slots.get((game.date, game.team_a, game.team_b))
+
+    def team_masks(self, team: TeamName) -> tuple[int, int]:
+        """The bits of the team's unplayed games, of the form (games as team a, games as team b)"""
+        if team in self.__team_masks:
+            return self.__team_masks[team]
+        a_mask = 0
+        b_mask = 0
+        for (_, team_a, team_b), slot in self.__slots.items():
+            if team_a == team:
+                a_mask |= 1 << slot
+            elif team_b == team:
+                b_mask |= 1 << slot
+        self.__team_masks[team] = (a_mask, b_mask)
+        return a_mask, b_mask
+
+    def outcome(self, rolled_season: SeasonSnapshot) -> int:
+        """The outcome vector of a season rolled from the base season"""
+        slots = self.__slots
+        bits = 0
+        for game in rolled_season.games:
+            slot = slots.get((game.date, game.team_a, game.team_b))
+            if slot is not None and game.final_score[0] > game.final_score[1]:
+                bits |= 1 << slot
+        return bits
@@ -1,4 +1,5 @@
 from sports.season import TeamName, TeamSnapshot
+from sports import timing
 from collections import defaultdict
 from typing import TypeVar, Iterable, Callable
 import random
@@ -106,11 +107,16 @@ def coin_toss(all_team_names: set[TeamName], all_teams: set[TeamSnapshot], tied_
         #         wins = team.filtered_record(all_team_names)[0]
         #         print("   ", team.name, wins, "wins:", team.wins_against & all_team_names, "losses:", team.losses_against & all_team_names)
         #     print("],")
-    winner = random.choice(list(tied_teams))
+    # sorted, so a seeded random stream picks the same team whatever the set's order
+    winner = random.choice(sorted(tied_teams, key=lambda team: team.name))
     return [{winner}, tied_teams - {winner}]
 
+_big12_tiebreakers = [head_to_head, against_all_common_opponents, against_highest_common_opponent, strength_of_conference_schedule, total_wins_in_12_game_season, coin_toss]
+# the wrappers only add to the current timings, so they are made once for every chunk
+_timed_big12_tiebreakers = [timing.timed(f"seeding / {tiebreaker.__name__}", tiebreaker) for tiebreaker in _big12_tiebreakers]
+
 def big12_championship_seeder(all_team_names: set[TeamName], all_teams: set[TeamSnapshot], standings: list[set[TeamSnapshot]]) -> tuple[TeamName, TeamName]:
-    tiebreakers = [head_to_head, against_all_common_opponents, against_highest_common_opponent, strength_of_conference_schedule, total_wins_in_12_game_season, coin_toss]
+    tiebreakers = _big12_tiebreakers if timing.current is None else _timed_big12_tiebreakers
     def two_team_tiebreaker(tied_teams: set[TeamSnapshot]) -> tuple[TeamSnapshot, TeamSnapshot]:
         for tiebreaker in tiebreakers:
             result = tiebreaker(all_team_names, all_teams, tied_teams, standings)
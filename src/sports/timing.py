@@ -0,0 +1,113 @@
+"""
+Wall time and call counts of the phases of a simulation
+
+Timing is off unless a `Timings` is `current`. Chunks run with timing (see
+`instruments`) collect the time of each phase into a fresh `Timings` (made
+`current` for the length of the chunk) and send it back with the chunk's
+result, so the parent can add up the phases of every worker in `totals`. Nested phases are named
+after the phase they're part of, e.g. "seeding / head_to_head".
+"""
+import contextlib
+import functools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+
+@dataclass
+class PhaseTime:
+    seconds: float = 0.0
+    calls: int = 0
+
+
+@dataclass
+class Timings:
+    phases: dict[str, PhaseTime] = field(default_factory=dict)
+
+    def add(self, phase: str, seconds: float, calls: int = 1):
+        phase_time = self.phases.get(phase)
+        if phase_time is None:
+            phase_time = self.phases[phase] = PhaseTime()
+        phase_time.seconds += seconds
+        phase_time.calls += calls
+
+    def __ior__(self, other: "Timings") -> "Timings":
+        for phase, phase_time in other.phases.items():
+            self.add(phase, phase_time.seconds, phase_time.calls)
+        return self
+
+    def to_json(self) -> dict[str, dict[str, float]]:
+        return {phase: {"seconds": phase_time.seconds, "calls": phase_time.calls} for phase, phase_time in sorted(self.phases.items())}
+
+    def table(self) -> str:
+        """The phases as a text table, grouped under their outer phases, slowest first"""
+        def order(phase: str) -> list:
+            # each outer phase's position, then this one's among its siblings
+            parts = phase.split(" / ")
+            key = []
+            for i in range(1, len(parts) + 1):
+                outer = self.phases.get(" / ".join(parts[:i]))
+                key += [-outer.seconds if outer else 0.0, parts[i - 1]]
+            return key
+        lines = [f"{'Phase':<48}{'Calls':>12}{'Seconds':>12}{'us/call':>12}"]
+        for phase in sorted(self.phases, key=order):
+            phase_time = self.phases[phase]
+            depth = phase.count(" / ")
+            name = "  " * depth + phase.rsplit(" / ", 1)[-1]
+            lines.append(f"{name:<48}{phase_time.calls:>12}{phase_time.seconds:>12.3f}{phase_time.seconds / max(phase_time.calls, 1) * 1e6:>12.1f}")
+        return "\n".join(lines)
+
+
+current: Timings | None = None
+"""Where the phases of the running chunk are collected (None when not timing)"""
+
+totals = Timings()
+"""The phases of every chunk this process has been sent back"""
+
+
+@contextlib.contextmanager
+def collecting() -> Iterator[Timings]:
+    """Collects the phases timed inside the block into a fresh `Timings`"""
+    global current
+    previous = current
+    current = Timings()
+    try:
+        yield current
+    finally:
+        current = previous
+
+
+def timed(phase: str, function: Callable[..., Any]) -> Callable[..., Any]:
+    """`function`, adding the time of each call to the current timings as `phase`"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            if current is not None:
+                current.add(phase, time.perf_counter() - start)
+    return wrapper
+
+
+def _no_lap(phase: str | None = None):
+    pass
+
+
+def laps(timings: Timings | None) -> Callable[[str | None], None]:
+    """
+    A function that adds the time since it was last called to `timings` as the
+    phase it's given (or, given none, only starts timing again), so consecutive
+    statements can be timed without wrapping them; it does nothing without timings
+    """
+    if timings is None:
+        return _no_lap
+    last = time.perf_counter()
+
+    def lap(phase: str | None = None):
+        nonlocal last
+        now = time.perf_counter()
+        if phase is not None:
+            timings.add(phase, now - last)
+        last = now
+    return lap
@@ -0,0 +1,172 @@
+"""
+A timeline of the work sent to process pools, in the Chrome trace-event format
+
+Tasks submitted to a `TracedExecutor` go to their worker through the tracer,
+which pickles each task itself the way the pool would (so shared seasons are
+still sent by reference) so that the time spent pickling and unpickling on
+both sides is measured, and notes when the task was submitted, started,
+finished and received. Those events, and the spans marked with `span`, are
+saved as a JSON trace that can be opened in Perfetto
+(ui.perfetto.dev) or chrome://tracing, with one track per worker.
+"""
+import concurrent.futures
+import contextlib
+import itertools
+import json
+import os
+import pickle
+import threading
+import time
+from multiprocessing.reduction import ForkingPickler
+from typing import Any, Callable, Iterator
+
+
+def _now() -> float:
+    # wall-clock time, which (unlike perf_counter) is the same in every process
+    return time.time()
+
+
+def _run(payload: bytes) -> tuple[bytes, tuple[int, int, float, float, float, float]]:
+    """Runs a pickled (function, args) in a worker; returns the pickled result and when each step ended"""
+    start = _now()
+    function, args = ForkingPickler.loads(payload)
+    unpickled = _now()
+    result = function(*args)
+    ran = _now()
+    data = bytes(ForkingPickler.dumps(result, pickle.HIGHEST_PROTOCOL))
+    return data, (os.getpid(), threading.get_native_id(), start, unpickled, ran, _now())
+
+
+class Tracer:
+    """The events of the tasks submitted through it and of the spans marked while it's the `tracer`"""
+    def __init__(self):
+        self.start = _now()
+        self.events: list[dict[str, Any]] = []
+        self.__ids = itertools.count()
+        self.__tasks: dict[concurrent.futures.Future, tuple[int, str, str, float]] = {}
+        self.__received: dict[concurrent.futures.Future, float] = {}
+        """When each task's result got back, which can be well before `result` is called"""
+        self.__busy: dict[tuple[int, int], list[float]] = {}
+        """The seconds each worker thread spent on tasks, and how many tasks it ran"""
+
+    def __us(self, t: float) -> float:
+        return round((t - self.start) * 1e6, 1)
+
+    def complete(self, name: str, category: str, start: float, end: float, pid: int | None = None, tid: int | None = None, **args):
+        self.events.append({
+            "name": name, "cat": category, "ph": "X", "ts": self.__us(start), "dur": round((end - start) * 1e6, 1),
+            "pid": os.getpid() if pid is None else pid, "tid": threading.get_native_id() if tid is None else tid, "args": args,
+        })
+
+    def __interval(self, name: str, category: str, id: int, start: float, end: float, **args):
+        """An interval that isn't on any one thread, like waiting in a queue (an async event)"""
+        common = {"name": name, "cat": category, "id": id, "pid": os.getpid(), "tid": threading.get_native_id()}
+        self.events.append(common | {"ph": "b", "ts": self.__us(start), "args": args})
+        self.events.append(common | {"ph": "e", "ts": self.__us(end)})
+
+    def submit(self, executor: concurrent.futures.Executor, name: str, category: str, function: Callable[..., Any], *args) -> concurrent.futures.Future:
+        """`executor.submit(function, *args)`, traced; get its result with `result`"""
+        task = next(self.__ids)
+        start = _now()
+        payload = bytes(ForkingPickler.dumps((function, args), pickle.HIGHEST_PROTOCOL))
+        submitted = _now()
+        self.complete("pickle arguments", category, start, submitted, task=task, bytes=len(payload))
+        future = executor.submit(_run, payload)
+        self.__tasks[future] = (task, name, category, submitted)
+        future.add_done_callback(self.__note_received)
+        return future
+
+    def __note_received(self, future: concurrent.futures.Future):
+        self.__received[future] = _now()
+
+    def result(self, future: concurrent.futures.Future) -> Any:
+        """The result of a task submitted with `submit`, which must be done"""
+        task, name, category, submitted = self.__tasks.pop(future)
+        data, (pid, tid, start, unpickled, ran, end) = future.result()
+        received = self.__received.pop(future)
+        unpickling = _now()
+        result = ForkingPickler.loads(data)
+        loaded = _now()
+
+        self.__interval("queued", category, task, submitted, start, task=task)
+        self.complete(name, category, start, end, pid, tid, task=task)
+        self.complete("unpickle arguments", category, start, unpickled, pid, tid, task=task)
+        self.complete("run", category, unpickled, ran, pid, tid, task=task)
+        self.complete("pickle result", category, ran, end, pid, tid, task=task, bytes=len(data))
+        self.__interval("result returned", category, task, end, received, task=task)
+        self.complete("unpickle result", category, unpickling, loaded, task=task, bytes=len(data))
+
+        busy = self.__busy.setdefault((pid, tid), [0.0, 0])
+        busy[0] += end - start
+        busy[1] += 1
+        return result
+
+    def utilization(self) -> dict[tuple[int, int], tuple[float, int]]:
+        """The share of the trace each worker thread spent on tasks, and how many tasks it ran"""
+        seconds = max(_now() - self.start, 1e-9)
+        return {worker: (busy / seconds, tasks) for worker, (busy, tasks) in sorted(self.__busy.items())}
+
+    def summary(self) -> str:
+        lines = [f"Traced {sum(tasks for _, tasks in self.__busy.values())} tasks over {_now() - self.start:.1f}s"]
+        for (pid, tid), (share, tasks) in self.utilization().items():
+            lines.append(f"    worker {pid}/{tid}: {share:.0%} busy, {tasks} tasks")
+        return "\n".join(lines)
+
+    def save(self, path: str):
+        metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "main"}}]
+        for (pid, tid), (share, tasks) in self.utilization().items():
+            if pid != os.getpid():
+                metadata.append({"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"worker {pid}"}})
+            metadata.append({"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": f"{share:.0%} busy, {tasks} tasks"}})
+        with open(path, "w") as f:
+            json.dump({"traceEvents": metadata + self.events, "displayTimeUnit": "ms"}, f)
+
+
+class TracedExecutor:
+    """
+    Submits tasks to `executor` through `tracer`
+
+    A task is named after its function, or after `str` of a callable object,
+    which can also give its category as a `category` attribute.
+    """
+    def __init__(self, executor: concurrent.futures.Executor, tracer: Tracer):
+        self.executor = executor
+        self.tracer = tracer
+
+    def submit(self, function: Callable[..., Any], /, *args) -> concurrent.futures.Future:
+        name = getattr(function, "__name__", None) or str(function)
+        traced = self.tracer.submit(self.executor, name, getattr(function, "category", "task"), function, *args)
+        future = concurrent.futures.Future()
+
+        def done(traced: concurrent.futures.Future):
+            try:
+                future.set_result(self.tracer.result(traced))
+            except BaseException as e:
+                future.set_exception(e)
+        traced.add_done_callback(done)
+        return future
+
+
+tracer: Tracer | None = None
+"""Where the spans are recorded (None to not trace)"""
+
+
+def traced(name: str, function: Callable[..., Any], category: str = "scheduler") -> Callable[..., Any]:
+    """`function`, marking each call on the timeline as `name` while tracing"""
+    def wrapper(*args, **kwargs):
+        with span(name, category):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+@contextlib.contextmanager
+def span(name: str, category: str = "scheduler", **args) -> Iterator[None]:
+    """Marks the time spent in the block on the timeline, if tracing"""
+    if tracer is None:
+        yield
+        return
+    start = _now()
+    try:
+        yield
+    finally:
+        tracer.complete(name, category, start, _now(), **args)
@@ -0,0 +1,101 @@
+from unittest import TestCase
+import concurrent.futures
+import datetime
+import multiprocessing
+import os
+import pickle
+import tempfile
+from multiprocessing.reduction import ForkingPickler
+
+from sports.season import SeasonSnapshot, Conference, Division, Game
+from sports import binary_snapshot
+
+date = datetime.date(2024, 11, 2)
+games = {
+    Game(date, "a", "b", False, (31, 24), None),
+    Game(date, "c", "d", True, (0, 3), None),
+    Game(date + datetime.timedelta(days=7), "a", "c", False, None, 0.1 + 0.2),
+    Game(date + datetime.timedelta(days=7), "b", "Texas A&M", True, None, 2 / 3),
+    Game(date + datetime.timedelta(days=14), "d", "Texas A&M", False, None, None),
+}
+conferences = {
+    Conference("zzz", {"a", "b", "c", "d"}, {Division("North", {"a", "b"}), Division("South", {"c", "d"})}, True, None),
+    Conference("yyy", {"Texas A&M"}, set(), False, None),
+}
+season = SeasonSnapshot(2024, conferences, games)
+
+
+def _no_seeder(conference: str) -> None:
+    return None
+
+
+def _game_count(season: SeasonSnapshot) -> tuple[int, SeasonSnapshot]:
+    return len(season.games), season
+
+
+def _text_round_trip(season: SeasonSnapshot) -> SeasonSnapshot:
+    return SeasonSnapshot.deserialize(season.serialize(), lambda conf: None)
+
+
+class BinarySnapshotTest(TestCase):
+    def assertSameSeason(self, actual: SeasonSnapshot, expected: SeasonSnapshot):
+        self.assertEqual(actual.year, expected.year)
+        self.assertEqual(sorted(game.serialize() for game in actual.games), sorted(game.serialize() for game in expected.games))
+        self.assertEqual(
+            {(c.name, frozenset(c.teams), frozenset((d.name, frozenset(d.team_names)) for d in c.divisions or ()), c.has_championship_game) for c in actual.conferences},
+            {(c.name, frozenset(c.teams), frozenset((d.name, frozenset(d.team_names)) for d in c.divisions or ()), c.has_championship_game) for c in expected.conferences},
+        )
+
+    def test_round_trip(self):
+        self.assertSameSeason(binary_snapshot.deserialize(binary_snapshot.serialize(season), lambda conf: None), season)
+
+    def test_round_trip_with_text(self):
+        text = _text_round_trip(season)
+        binary = binary_snapshot.deserialize(binary_snapshot.serialize(text), lambda conf: None)
+        self.assertSameSeason(binary, text)
+
+    def test_load_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "season.bin")
+            binary_snapshot.save(season, path)
+            seeder = object()
+            loaded = binary_snapshot.load(path, lambda conf: seeder)
+        self.assertSameSeason(loaded, season)
+        self.assertTrue(all(conference.championship_seeder is seeder for conference in loaded.conferences))
+
+    def test_not_a_snapshot(self):
+        with self.assertRaises(ValueError):
+            binary_snapshot.deserialize(b"\0" * 64, lambda conf: None)
+
+    def test_load_conference(self):
+        loaded = binary_snapshot.deserialize(binary_snapshot.serialize(season), lambda conf: None, conference="yyy")
+        self.assertSameSeason(loaded, season.filter("yyy"))
+
+    def test_load_teams(self):
+        loaded = binary_snapshot.deserialize(binary_snapshot.serialize(season), lambda conf: None, teams={"a"})
+        self.assertEqual({game for game in loaded.games}, {game for game in games if "a" in game})
+        self.assertEqual({conference.name for conference in loaded.conferences}, {"zzz"})
+
+    def test_load_missing_conference(self):
+        with self.assertRaises(ValueError):
+            binary_snapshot.deserialize(binary_snapshot.serialize(season), lambda conf: None, conference="xxx")
+
+    def test_shared_seasons_are_sent_by_reference(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "season.bin")
+            binary_snapshot.save(season, path)
+            shared = binary_snapshot.load_shared(path, _no_seeder)
+            self.assertIs(binary_snapshot.load_shared(path, _no_seeder), shared)
+            self.assertIsNot(binary_snapshot.load_shared(path, _no_seeder, "zzz"), shared)
+
+            sent = ForkingPickler.dumps(shared)
+            self.assertLess(len(sent), len(pickle.dumps(shared)) / 2)
+            self.assertIs(ForkingPickler.loads(sent), shared)
+            with concurrent.futures.ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("fork")) as executor:
+                count, returned = executor.submit(_game_count, shared).result()
+            self.assertEqual(count, len(games))
+            self.assertIs(returned, shared)
+
+        # other seasons, and files like checkpoints, still hold the whole season
+        self.assertSameSeason(ForkingPickler.loads(ForkingPickler.dumps(season)), season)
+        self.assertSameSeason(pickle.loads(pickle.dumps(shared)), season)
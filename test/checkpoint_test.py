@@ -0,0 +1,51 @@
+from unittest import TestCase
+import concurrent.futures
+import datetime
+import os
+import tempfile
+
+import checkpoint
+import scheduler
+from scheduler_test import _seeded, _merge
+from sports.season import SeasonSnapshot, Conference, Game
+
+date = datetime.date.today()
+games = [Game(date, "a", "b", False, None, 0.5), Game(date, "c", "d", False, (3, 0), None)]
+
+
+def _season(games: list[Game], teams: list[str]) -> SeasonSnapshot:
+    return SeasonSnapshot(2024, {Conference("zzz", set(teams), None, True, None)}, set(games))
+
+
+class CheckpointTest(TestCase):
+    def test_snapshot_hash(self):
+        self.assertEqual(checkpoint.snapshot_hash(_season(games, ["a", "b", "c", "d"])), checkpoint.snapshot_hash(_season(games[::-1], ["d", "c", "b", "a"])))
+        changed = [games[0], Game(date, "c", "d", False, (0, 3), None)]
+        self.assertNotEqual(checkpoint.snapshot_hash(_season(games, ["a", "b", "c", "d"])), checkpoint.snapshot_hash(_season(changed, ["a", "b", "c", "d"])))
+
+    def test_mismatch(self):
+        saved = checkpoint.Checkpoint("abc", {"iterations": 100}, 0, {})
+        self.assertIsNone(saved.mismatch("abc", {"iterations": 100}))
+        self.assertIn("snapshot", saved.mismatch("def", {"iterations": 100}))
+        self.assertIn("iterations was 100, now 200", saved.mismatch("abc", {"iterations": 200}))
+
+    def test_resume_continues_without_repeating_chunks(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run", "checkpoint.pickle")
+            first = scheduler.Job("job", _seeded, (), 300, merge=_merge, seed="1/job")
+            checkpointer = checkpoint.Checkpointer(path, [first], "abc", {}, 1, every=0)
+            with concurrent.futures.ThreadPoolExecutor(1) as executor:
+                scheduler.run(executor, [first], 1, min_chunk_seconds=0, on_merge=lambda job, report: checkpointer.merged())
+            self.assertEqual(checkpoint.latest(directory), checkpointer.path)
+            saved = checkpoint.load(path)
+
+            resumed = scheduler.Job("job", _seeded, (), 600, merge=_merge, seed="1/job")
+            self.assertEqual(saved.restore([resumed]), 1)
+            self.assertEqual((resumed.completed, resumed.chunks), (300, first.chunks))
+            with concurrent.futures.ThreadPoolExecutor(1) as executor:
+                scheduler.run(executor, [resumed], 1, min_chunk_seconds=0)
+
+        self.assertEqual(resumed.completed, 600)
+        self.assertEqual(resumed.result[:300], first.result)
+        # the new chunks had random streams of their own
+        self.assertEqual(len(set(resumed.result)), 600)
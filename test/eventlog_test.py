@@ -0,0 +1,76 @@
+from unittest import TestCase
+from parameterized import parameterized
+import datetime
+import tempfile
+
+import eventlog
+from sports.season import SeasonSnapshot, Conference, Division, Game
+
+day = datetime.date(2024, 10, 1)
+week = datetime.timedelta(days=7)
+conferences = {Conference("zzz", {"a", "b", "c", "d"}, {Division("North", {"a", "b"}), Division("South", {"c", "d"})}, True, None)}
+days = [
+    (day, {
+        Game(day + week, "a", "b", False, None, 0.6),
+        Game(day + week, "c", "d", True, None, 0.4),
+        Game(day + 2 * week, "a", "c", False, None, 0.5),
+        Game(day + 2 * week, "b", "d", False, None, 0.7),
+    }),
+    (day + week + datetime.timedelta(days=1), {
+        Game(day + week, "a", "b", False, (21, 14), None),
+        Game(day + week, "c", "d", True, (3, 10), None),
+        Game(day + 2 * week, "a", "c", False, None, 0.55),
+        Game(day + 2 * week, "b", "d", False, None, 0.7),
+    }),
+    (day + week + datetime.timedelta(days=3), {
+        Game(day + week, "a", "b", False, (21, 14), None),
+        Game(day + week, "c", "d", True, (3, 10), None),
+        Game(day + 2 * week, "a", "c", False, None, 0.55),
+        # moved to a neutral site a day later
+        Game(day + 2 * week + datetime.timedelta(days=1), "b", "d", True, None, 0.65),
+    }),
+]
+
+
+def _games(season: SeasonSnapshot) -> list[str]:
+    return sorted(game.serialize() for game in season.games)
+
+
+class SeasonLogTest(TestCase):
+    @parameterized.expand([
+        ("without_checkpoints", 1000),
+        ("with_checkpoints", 2),
+    ])
+    def test_snapshot_on_any_date(self, _, checkpoint_every):
+        with tempfile.TemporaryDirectory() as directory:
+            log = eventlog.SeasonLog(directory, 2024, checkpoint_every)
+            for date, games in days:
+                log.record(date, SeasonSnapshot(2024, conferences, games))
+            self.assertEqual(log.dates(), [date for date, _ in days])
+            for i, (date, games) in enumerate(days):
+                next_date = days[i + 1][0] if i + 1 < len(days) else date + week
+                for as_of in (date, next_date - datetime.timedelta(days=1)):
+                    season = log.snapshot(as_of, lambda conf: None)
+                    self.assertEqual(_games(season), sorted(game.serialize() for game in games))
+                    self.assertEqual({conference.name for conference in season.conferences}, {"zzz"})
+            with self.assertRaises(ValueError):
+                log.snapshot(day - datetime.timedelta(days=1), lambda conf: None)
+
+    def test_only_changes_are_appended(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log = eventlog.SeasonLog(directory, 2024)
+            self.assertEqual(log.record(days[0][0], SeasonSnapshot(2024, conferences, days[0][1])), 5)
+            # two results and one new probability
+            self.assertEqual(log.record(days[1][0], SeasonSnapshot(2024, conferences, days[1][1])), 3)
+            self.assertEqual(log.record(days[1][0], SeasonSnapshot(2024, conferences, days[1][1])), 0)
+            with self.assertRaises(ValueError):
+                log.record(days[0][0], SeasonSnapshot(2024, conferences, days[0][1]))
+
+    def test_cut_off_event_is_overwritten(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log = eventlog.SeasonLog(directory, 2024)
+            log.record(days[0][0], SeasonSnapshot(2024, conferences, days[0][1]))
+            with open(log.path, "a") as f:
+                f.write(f"{days[1][0]}\tresult\t2024-10-0")
+            log.record(days[1][0], SeasonSnapshot(2024, conferences, days[1][1]))
+            self.assertEqual(_games(log.snapshot(days[1][0], lambda conf: None)), sorted(game.serialize() for game in days[1][1]))
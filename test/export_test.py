@@ -0,0 +1,56 @@
+from unittest import TestCase
+from parameterized import parameterized
+import csv
+import json
+import os
+import tempfile
+
+import export
+from sports.outcomes import ConferenceSeasonOutcomes
+
+
+def _conference() -> ConferenceSeasonOutcomes:
+    conference = ConferenceSeasonOutcomes(total_seasons=4)
+    conference.ccg_participants[("a", "b")] += 3
+    conference.ccg_participants[("a", "c")] += 1
+    for team in ("a", "b", "c"):
+        conference.teams[team]
+    return conference
+
+
+class ExportTest(TestCase):
+    def test_ccg_tables(self):
+        conference = _conference()
+        self.assertEqual(export.ccg_probabilities(conference), [
+            {"team": "a", "ccg_probability": 1.0},
+            {"team": "b", "ccg_probability": 0.75},
+            {"team": "c", "ccg_probability": 0.25},
+        ])
+        self.assertEqual(export.ccg_matchups(conference), [
+            {"team_a": "a", "team_b": "b", "probability": 0.75},
+            {"team_a": "a", "team_b": "c", "probability": 0.25},
+        ])
+
+    @parameterized.expand([
+        ("one", 1, {("a",), ("b",), ("c",), ("d",)}),
+        ("two", 2, {("a", "c"), ("a", "d"), ("b", "c"), ("b", "d")}),
+    ])
+    def test_winner_combinations(self, _, number, expected):
+        self.assertEqual(set(export.winner_combinations([("a", "b"), ("c", "d")], number)), expected)
+
+    def test_write(self):
+        tables = {"numbers": [{"team": "a", "probability": 0.5}, {"team": "b", "probability": None}]}
+        with tempfile.TemporaryDirectory() as directory:
+            prefix = os.path.join(directory, "run_")
+            paths = export.write(tables, prefix, ["json", "csv"])
+            self.assertEqual(paths, [f"{prefix}tables.json", f"{prefix}numbers.csv"])
+            with open(paths[0]) as f:
+                self.assertEqual(json.load(f), tables)
+            with open(paths[1], newline="") as f:
+                self.assertEqual(list(csv.DictReader(f)), [{"team": "a", "probability": "0.5"}, {"team": "b", "probability": ""}])
+            with self.assertRaises(ValueError):
+                export.write(tables, prefix, ["xml"])
+
+    def test_structured_scenarios_blank_cells(self):
+        rows = export.structured_scenarios("a", [[None]], ["Overall"], ["a 12-0\nb 12-0"])
+        self.assertEqual(rows, [{"row": "Overall", "column": "a 12-0, b 12-0", "ccg_target": "a", "ccg_probability": None, "scenario_probability": None, "seasons": 0}])
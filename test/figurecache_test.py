@@ -0,0 +1,59 @@
+from unittest import TestCase
+from parameterized import parameterized
+import functools
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from figurecache import FigureCache
+
+
+def _draw(title: str, cells: list[list[str]], *, tall: bool = False):
+    pass
+
+
+def _draw_other(title: str, cells: list[list[str]], *, tall: bool = False):
+    pass
+
+
+render = functools.partial(_draw, "Title", [["1.0%", "2.0%"]], tall=True)
+
+
+class FigureCacheTest(TestCase):
+    def test_same_data_same_key(self):
+        self.assertEqual(FigureCache.key(render, "v1"), FigureCache.key(functools.partial(_draw, "Title", [["1.0%", "2.0%"]], tall=True), "v1"))
+
+    @parameterized.expand([
+        ("data", functools.partial(_draw, "Title", [["1.0%", "2.1%"]], tall=True), "v1"),
+        ("keyword", functools.partial(_draw, "Title", [["1.0%", "2.0%"]], tall=False), "v1"),
+        ("function", functools.partial(_draw_other, "Title", [["1.0%", "2.0%"]], tall=True), "v1"),
+        ("version", render, "v2"),
+    ])
+    def test_changes_change_key(self, _, other, version):
+        self.assertNotEqual(FigureCache.key(render, "v1"), FigureCache.key(other, version))
+
+    def test_put_and_get(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FigureCache(Path(directory) / "cache")
+            key = FigureCache.key(render)
+            self.assertIsNone(cache.get(key))
+            figure = Path(directory) / "figure.png"
+            figure.write_bytes(b"png")
+            cache.put(key, figure)
+            self.assertEqual(cache.get(key).read_bytes(), b"png")
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_least_recently_used_are_evicted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FigureCache(Path(directory) / "cache", max_bytes=250)
+            figure = Path(directory) / "figure.png"
+            figure.write_bytes(b"x" * 100)
+            for i, key in enumerate(("a", "b")):
+                cache.put(key, figure)
+                os.utime(cache.get(key), (time.time() - 100 + i, time.time() - 100 + i))
+            cache.get("a")
+            cache.put("c", figure)
+            self.assertIsNotNone(cache.get("a"))
+            self.assertIsNone(cache.get("b"))
+            self.assertIsNotNone(cache.get("c"))
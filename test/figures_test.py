@@ -0,0 +1,55 @@
+from unittest import TestCase
+import datetime
+import os
+import pickle
+import random
+import tempfile
+from pathlib import Path
+
+import figures
+import logos
+from simulator import Simulator
+from sports import tiebreakers
+from sports.season import SeasonSnapshot, Conference, Game
+
+date = datetime.date.today()
+teams = ["Arizona", "Arizona St", "Baylor", "BYU"]
+games = {Game(date, a, b, False, None, 0.5) for i, a in enumerate(teams) for b in teams[i + 1:]}
+season = SeasonSnapshot(2024, {Conference("B12", set(teams), None, True, tiebreakers.big12_championship_seeder)}, games)
+
+
+class ConferenceFiguresTest(TestCase):
+    def setUp(self):
+        # the logos are found from the root of the repository
+        self.directory = os.getcwd()
+        os.chdir(Path(__file__).parent.parent)
+        self.figure_cache, figures.figure_cache = figures.figure_cache, None
+        self.atlas_path, logos.atlas_path = logos.atlas_path, None
+
+        random.seed(0)
+        simulator = Simulator(season)
+        simulator.simulate(200)
+        self.figures = figures.ConferenceFigures("B12", simulator.conference_outcomes["B12"], [], simulator.week_outcomes["B12"])
+        self.figures.bars_ccg_probabilities()
+        self.figures.bars_ccg_matchups()
+        self.figures.table_record_probabilities()
+        self.figures.table_in_ccg_prob_given_total_wins()
+
+    def tearDown(self):
+        os.chdir(self.directory)
+        figures.figure_cache = self.figure_cache
+        logos.atlas_path = self.atlas_path
+
+    def test_renderers_pickle(self):
+        for name, render in self.figures._ConferenceFigures__figures.items():
+            self.assertEqual(pickle.dumps(pickle.loads(pickle.dumps(render))), pickle.dumps(render), name)
+
+    def test_pool_saves_the_same_figures(self):
+        with tempfile.TemporaryDirectory() as one, tempfile.TemporaryDirectory() as pool:
+            self.figures.save(one + "/", workers=1)
+            self.figures.save(pool + "/", workers=2)
+            saved = sorted(os.listdir(one))
+            self.assertEqual(len(saved), 4)
+            self.assertEqual(sorted(os.listdir(pool)), saved)
+            for name in saved:
+                self.assertEqual(Path(pool, name).read_bytes(), Path(one, name).read_bytes(), name)
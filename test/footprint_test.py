@@ -0,0 +1,37 @@
+from unittest import TestCase
+import datetime
+import random
+
+import footprint
+from simulator import Simulator
+from sports import tiebreakers
+from sports.season import SeasonSnapshot, Conference, Game
+
+date = datetime.date.today()
+teams = ["a", "b", "c", "d"]
+games = {Game(date, a, b, False, None, 0.5) for i, a in enumerate(teams) for b in teams[i + 1:]}
+season = SeasonSnapshot(2024, {Conference("zzz", set(teams), None, True, tiebreakers.big12_championship_seeder)}, games)
+
+
+def _simulate(iterations: int) -> Simulator:
+    simulator = Simulator(season)
+    simulator.simulate(iterations)
+    return simulator
+
+
+class FootprintTest(TestCase):
+    def test_deep_size_counts_shared_objects_once(self):
+        shared = list(range(1000))
+        self.assertLess(footprint.deep_size([shared, shared]), 2 * footprint.deep_size(shared))
+
+    def test_entries(self):
+        random.seed(0)
+        simulator = _simulate(200)
+        entries = footprint.entries(simulator)
+        conference = simulator.conference_outcomes["zzz"]
+        self.assertEqual(entries["zzz lost_to"], sum(len(team.lost_to) for team in conference.teams.values()))
+        self.assertEqual(entries["zzz ccg_participants"], len(conference.ccg_participants))
+        self.assertEqual(entries["zzz week permutations"], sum(map(len, simulator.week_outcomes["zzz"].permutations.values())))
+        measured = footprint.structures(simulator)
+        self.assertEqual({name: structure.entries for name, structure in measured.items()}, entries)
+        self.assertGreater(measured["zzz lost_to"].bytes, measured["zzz lost_to ccg_participants"].bytes)
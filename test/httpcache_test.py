@@ -0,0 +1,83 @@
+from unittest import TestCase
+from pathlib import Path
+import tempfile
+from types import SimpleNamespace
+
+import httpcache
+import massey_standin
+
+team_ids = {f"Team {i}": str(i) for i in range(20)}
+
+
+class _RecordingSession:
+    """Answers every GET with `headers`, and 304 Not Modified to conditional ones, keeping the headers of each request"""
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+        self.requests: list[dict[str, str]] = []
+
+    def get(self, url: str, headers: dict[str, str] = {}, timeout: float | None = None) -> SimpleNamespace:
+        self.requests.append(headers)
+        return SimpleNamespace(status_code=304 if headers else 200, headers=self.headers, content=b"page", raise_for_status=lambda: None)
+
+
+class HttpCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.stand_in = massey_standin.MasseyStandIn(team_ids=team_ids)
+        cls.server = massey_standin.serve(cls.stand_in)
+        cls.url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_fresh_responses_are_not_requested(self):
+        cache = httpcache.HttpCache(Path(self.directory.name), lambda url: 3600)
+        url = f"{self.url}/game.php?oid0=1&h=0&oid1=2"
+        requests_before = self.stand_in.requests
+        first = cache.get(url)
+        self.assertEqual(cache.get(url), first)
+        self.assertEqual(self.stand_in.requests - requests_before, 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_stale_responses_are_revalidated(self):
+        url = f"{self.url}/school?t=3"
+        first = httpcache.HttpCache(Path(self.directory.name)).get(url)
+        # a new cache on the same directory, as on the next run
+        cache = httpcache.HttpCache(Path(self.directory.name))
+        not_modified_before = self.stand_in.not_modified
+        self.assertEqual(cache.get(url), first)
+        self.assertEqual(self.stand_in.not_modified - not_modified_before, 1)
+        self.assertEqual((cache.revalidated, cache.misses), (1, 0))
+
+    def test_least_recently_used_are_evicted(self):
+        urls = [f"{self.url}/school?t={i}" for i in range(10)]
+        size = len(httpcache.HttpCache(Path(self.directory.name) / "probe").get(urls[0]))
+        cache = httpcache.HttpCache(Path(self.directory.name), lambda url: 3600, max_bytes=3 * size + size // 2)
+        for url in urls:
+            cache.get(url)
+        # the first page is the same size as the others, so three of the newest fit
+        self.assertEqual(len(list((Path(self.directory.name) / "bodies").iterdir())), 3)
+        cache.get(urls[-1])
+        self.assertEqual(cache.hits, 1)
+        cache.get(urls[0])
+        self.assertEqual(cache.misses, 11)
+
+    def test_revalidates_with_the_dates_the_server_sent(self):
+        for headers, expected in [
+            ({"ETag": '"1"', "Last-Modified": "Sat, 01 Nov 2025 00:00:00 GMT", "Date": "Sun, 02 Nov 2025 00:00:00 GMT"}, {"If-None-Match": '"1"', "If-Modified-Since": "Sat, 01 Nov 2025 00:00:00 GMT"}),
+            ({"ETag": '"1"', "Date": "Sun, 02 Nov 2025 00:00:00 GMT"}, {"If-None-Match": '"1"', "If-Modified-Since": "Sun, 02 Nov 2025 00:00:00 GMT"}),
+            # never a date from this machine's clock
+            ({"ETag": '"1"'}, {"If-None-Match": '"1"'}),
+        ]:
+            with self.subTest(headers=headers), tempfile.TemporaryDirectory() as directory:
+                cache = httpcache.HttpCache(Path(directory))
+                session = _RecordingSession(headers)
+                cache.get("http://example.com/page", session)
+                self.assertEqual(cache.get("http://example.com/page", session), b"page")
+                self.assertEqual(session.requests, [{}, expected])
+                self.assertEqual(cache.revalidated, 1)
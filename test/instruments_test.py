@@ -0,0 +1,51 @@
+from unittest import TestCase
+import concurrent.futures
+import datetime
+import os
+import random
+
+import footprint
+import instruments
+import scheduler
+from simulator import Simulator
+from sports import timing, tiebreakers
+from sports.season import SeasonSnapshot, Conference, Game
+
+date = datetime.date.today()
+teams = ["a", "b", "c", "d"]
+games = {Game(date, a, b, False, None, 0.5) for i, a in enumerate(teams) for b in teams[i + 1:]}
+season = SeasonSnapshot(2024, {Conference("zzz", set(teams), None, True, tiebreakers.big12_championship_seeder)}, games)
+
+
+def _simulate(iterations: int) -> Simulator:
+    simulator = Simulator(season)
+    simulator.simulate(iterations)
+    return simulator
+
+
+class WorkerTest(TestCase):
+    def test_reports_nothing_unless_asked(self):
+        random.seed(0)
+        result, report = instruments.Worker()(_simulate, 10)
+        self.assertEqual(result.conference_outcomes["zzz"].total_seasons, 10)
+        self.assertEqual(report, instruments.Report())
+
+    def test_scheduler_sends_reports_to_the_merge_hook(self):
+        timing.totals = timing.Timings()
+        footprint.growth.clear()
+        footprint.worker_peak_rss.clear()
+
+        def merged(job: scheduler.Job, report: instruments.Report):
+            timing.totals |= report.timings
+            footprint.record_worker(*report.rss)
+            footprint.record_growth(job.key, job.completed, job.result)
+
+        job = scheduler.Job("season", _simulate, (), 200)
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            scheduler.run(executor, [job], 1, min_chunk_seconds=0, wrapper=instruments.Worker(time_phases=True, report_memory=True), on_merge=merged)
+        self.assertEqual(timing.totals.phases["roll"].calls, 200)
+        # the pilot chunk and at least one more
+        self.assertGreaterEqual(timing.totals.phases["_simulate (whole chunks)"].calls, 2)
+        self.assertEqual(footprint.growth[-1]["iterations"], 200)
+        self.assertEqual(footprint.growth[-1]["entries"], footprint.entries(job.result))
+        self.assertEqual(list(footprint.worker_peak_rss), [os.getpid()])
@@ -0,0 +1,64 @@
+from unittest import TestCase
+from parameterized import parameterized
+import os
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+import logos
+
+
+def _write_logo(path: str, width: int, height: int, color: tuple[int, int, int, int] = (0, 60, 160, 255)):
+    Image.new("RGBA", (width, height), color).save(path)
+
+
+class LogoCacheTest(TestCase):
+    def setUp(self):
+        logos._logos.clear()
+        logos._sources.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "team.png")
+        _write_logo(self.path, 400, 200)
+
+    def tearDown(self):
+        logos._logos.clear()
+        logos._sources.clear()
+        self.directory.cleanup()
+
+    @parameterized.expand([
+        ("full", None, (200, 400, 4)),
+        ("downsampled", 100, (50, 100, 4)),
+        ("already_small", 1000, (200, 400, 4)),
+    ])
+    def test_logo_size(self, _, size, shape):
+        logo = logos.logo(self.path, size)
+        self.assertEqual(logo.shape, shape)
+        self.assertTrue(np.allclose(logo[25, 50], [0, 60 / 255, 160 / 255, 1], atol=1 / 255))
+
+    def test_decoded_once(self):
+        logo = logos.logo(self.path, 100)
+        self.assertIs(logos.logo(self.path, 100), logo)
+        self.assertFalse(logo.flags.writeable)
+        self.assertEqual(logos.preload([(self.path, 100), (self.path, 50)]), 1)
+
+    def test_atlas_round_trip(self):
+        expected = {size: logos.logo(self.path, size) for size in (None, 64)}
+        atlas = os.path.join(self.directory.name, "atlas.npz")
+        logos.save_atlas(atlas)
+        logos._logos.clear()
+        self.assertEqual(logos.load_atlas(atlas), 2)
+        for size, logo in expected.items():
+            self.assertTrue(np.array_equal(logos.logo(self.path, size), logo))
+
+    def test_atlas_skips_changed_logos(self):
+        logos.logo(self.path, 64)
+        atlas = os.path.join(self.directory.name, "atlas.npz")
+        logos.save_atlas(atlas)
+        logos._logos.clear()
+        _write_logo(self.path, 300, 300, (200, 0, 0, 255))
+        self.assertEqual(logos.load_atlas(atlas), 0)
+        self.assertEqual(logos.logo(self.path, 64).shape, (64, 64, 4))
+
+    def test_missing_atlas(self):
+        self.assertEqual(logos.load_atlas(os.path.join(self.directory.name, "missing.npz")), 0)
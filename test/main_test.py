@@ -0,0 +1,15 @@
+from unittest import TestCase
+import inspect
+
+import main
+
+
+class ParseArgsTest(TestCase):
+    def test_every_argument_is_a_parameter_of_main(self):
+        args = vars(main.parse_args(["--time-budget", "5m", "--tiebreakers", "--no-save-figs", "--progress"]))
+        inspect.signature(main.main).bind(**args)
+        self.assertIsNone(args["iterations"])
+        self.assertTrue(args["structured_scenarios"])
+        self.assertFalse(args["save_figures"])
+        self.assertTrue(args["show_progress"])
+
@@ -0,0 +1,63 @@
+from unittest import TestCase
+from parameterized import parameterized
+import datetime
+import random
+
+from sports.season import SeasonSnapshot, Conference, Game, OutcomeIndex
+from sports.outcomes import ScenarioOutcomes, win_exactly, win_at_most, win_out, win_out_except, win_out_except_possibly, beat, any_outcome
+
+date = datetime.date.today()
+games = {
+    Game(date, "a", "b", False, (1, 0), None),
+    Game(date, "a", "c", False, (0, 1), None),
+    Game(date, "a", "d", False, None, 0.25),
+    Game(date, "a", "e", False, None, 0.90),
+    Game(date, "f", "a", False, None, 0.32),
+    Game(date, "g", "a", False, None, 0.87),
+    Game(date, "h", "a", False, None, 0.51),
+    Game(date, "b", "c", False, None, 0.45),
+    Game(date, "d", "b", False, None, 0.60),
+    Game(date, "e", "f", False, (3, 2), None),
+}
+season = SeasonSnapshot(2024, {Conference("zzz", {"a", "b", "c", "d", "e", "f", "g", "h"}, None, True, None)}, games)
+
+
+class CompiledConditionTest(TestCase):
+    @parameterized.expand([
+        ("any", lambda: [any_outcome()]),
+        ("win_exactly", lambda: [win_exactly(season, "a", 4)]),
+        ("win_exactly_with_results", lambda: [win_exactly(season, "a", 4, wins={"d"}, losses={"f"})]),
+        ("win_at_most", lambda: [win_at_most(season, "a", 3)]),
+        ("win_out", lambda: [win_out(season, "b")]),
+        ("win_out_except", lambda: [win_out_except(season, "a", {"g"})]),
+        ("win_out_except_possibly", lambda: [win_out_except_possibly(season, "a", ["d", "e"])]),
+        ("beat_unplayed", lambda: [beat(season, "b", "c")]),
+        ("beat_played", lambda: [beat(season, "a", "b")]),
+        ("beat_played_loss", lambda: [beat(season, "b", "a")]),
+        ("combined", lambda: [win_at_most(season, "a", 4), beat(season, "d", "b"), win_exactly(season, "c", 1)]),
+    ])
+    def test_compiled_matches_condition(self, _, conditions):
+        scenario = ScenarioOutcomes(*conditions())
+        index = OutcomeIndex(season)
+        compiled = scenario.compile(index)
+        self.assertIsNotNone(compiled)
+        for _ in range(500):
+            rolled_season = season.roll(random.random)
+            self.assertEqual(index.outcome(rolled_season) in compiled, rolled_season in scenario)
+
+    def test_contradiction_is_impossible(self):
+        scenario = ScenarioOutcomes(beat(season, "a", "d"), beat(season, "d", "a"))
+        compiled = scenario.compile(OutcomeIndex(season))
+        self.assertIsNotNone(compiled.impossible)
+
+    @parameterized.expand([
+        ("feasible", lambda: [win_out(season, "a"), beat(season, "b", "c")], False),
+        ("already_played", lambda: [beat(season, "b", "a")], True),
+        ("same_game", lambda: [beat(season, "a", "d"), beat(season, "d", "a")], True),
+        ("win_count_bounds", lambda: [win_exactly(season, "a", 4), beat(season, "d", "a"), beat(season, "e", "a"), beat(season, "f", "a"), beat(season, "g", "a")], True),
+        ("shared_matchup", lambda: [win_out(season, "a"), win_out(season, "d")], True),
+    ])
+    def test_infeasibility(self, _, conditions, impossible):
+        scenario = ScenarioOutcomes(*conditions())
+        reason = scenario.infeasibility(OutcomeIndex(season))
+        self.assertEqual(reason is not None, impossible, reason)
@@ -0,0 +1,56 @@
+from unittest import TestCase
+import concurrent.futures
+import datetime
+import json
+import os
+import random
+import tempfile
+
+import instruments
+import progress
+import scheduler
+from simulator import Simulator
+from sports import tiebreakers
+from sports.season import SeasonSnapshot, Conference, Game
+
+date = datetime.date.today()
+teams = ["a", "b", "c", "d"]
+games = {Game(date, a, b, False, None, 0.5) for i, a in enumerate(teams) for b in teams[i + 1:]}
+season = SeasonSnapshot(2024, {Conference("zzz", set(teams), None, True, tiebreakers.big12_championship_seeder)}, games)
+
+
+def _simulate(iterations: int) -> Simulator:
+    simulator = Simulator(season)
+    simulator.simulate(iterations)
+    return simulator
+
+
+class ProgressTest(TestCase):
+    def test_not_reporting_unless_attached(self):
+        with progress.reporting("anything") as reporter:
+            self.assertIsNone(reporter)
+            _simulate(10)
+
+    def test_monitor_adds_up_every_chunk(self):
+        random.seed(0)
+        job = scheduler.Job("season", _simulate, (), 1000)
+        with tempfile.TemporaryDirectory() as directory:
+            log_path = os.path.join(directory, "progress.jsonl")
+            monitor = progress.Monitor(live=False, log_path=log_path, interval=0.01)
+            progress.attach(monitor.queue, interval=0)
+            try:
+                with concurrent.futures.ThreadPoolExecutor(1) as executor, monitor:
+                    scheduler.run(executor, [job], 1, min_chunk_seconds=0, wrapper=instruments.Worker())
+            finally:
+                progress.attach(None)
+            with open(log_path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(monitor.iterations(), {"_simulate": 1000})
+        estimates = monitor.estimates_so_far()
+        for team, outcomes in job.result.conference_outcomes["zzz"].teams.items():
+            p, se, seasons = estimates[f"{team} CCG"]
+            self.assertEqual(seasons, 1000)
+            self.assertAlmostEqual(p, outcomes.made_ccg / 1000)
+        self.assertEqual(sum(record["done"] for record in records), len(monitor.latest))
+        self.assertIn("1,000 iterations", monitor.line())
@@ -0,0 +1,61 @@
+from unittest import TestCase
+import concurrent.futures
+import random
+import time
+
+import scheduler
+
+
+def _count(iterations: int, fail: bool = False) -> list[int] | None:
+    if fail:
+        return None
+    return [iterations]
+
+
+def _seeded(iterations: int) -> list[float]:
+    """A job whose result is its random stream, to check how the scheduler seeds it"""
+    return [random.random() for _ in range(iterations)]
+
+
+def _merge(result: list, other: list) -> list:
+    return result + other
+
+
+class SchedulerTest(TestCase):
+    def test_run_completes_every_iteration(self):
+        jobs = [scheduler.Job(i, _count, (), iterations, merge=_merge) for i, iterations in enumerate([1, 10, 1000, 12345])]
+        with concurrent.futures.ThreadPoolExecutor(4) as executor:
+            scheduler.run(executor, jobs, 4, min_chunk_seconds=0)
+        for job in jobs:
+            self.assertEqual(sum(job.result), job.iterations)
+            self.assertEqual(job.completed, job.iterations)
+
+    def test_run_failed_job(self):
+        jobs = [scheduler.Job("ok", _count, (), 100, merge=_merge), scheduler.Job("failed", _count, (True,), 100, merge=_merge)]
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            scheduler.run(executor, jobs, 2)
+        self.assertEqual(sum(jobs[0].result), 100)
+        self.assertTrue(jobs[1].failed)
+        self.assertIsNone(jobs[1].result)
+
+    def test_run_until_deadline(self):
+        def slow(iterations: int) -> list[int]:
+            time.sleep(iterations * 0.001)
+            return [iterations]
+        jobs = [scheduler.Job("capped", slow, (), 50, merge=_merge), scheduler.Job("open", slow, (), None, merge=_merge)]
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            scheduler.run(executor, jobs, 2, deadline=time.monotonic() + 0.5, min_chunk_seconds=0.05)
+        self.assertEqual(sum(jobs[0].result), 50)
+        self.assertEqual(sum(jobs[1].result), jobs[1].completed)
+        self.assertGreater(jobs[1].completed, 100)
+
+    def test_run_without_deadline_needs_iterations(self):
+        jobs = [scheduler.Job("open", _count, (), None, merge=_merge)]
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            with self.assertRaises(ValueError):
+                scheduler.run(executor, jobs, 1)
+
+    def test_chunks_are_seeded(self):
+        first = scheduler.Chunk("job", _seeded, (), 10, "7/job/0")()[0]
+        self.assertEqual(scheduler.Chunk("job", _seeded, (), 10, "7/job/0")()[0], first)
+        self.assertNotEqual(scheduler.Chunk("job", _seeded, (), 10, "7/job/1")()[0], first)
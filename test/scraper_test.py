@@ -0,0 +1,153 @@
+from unittest import TestCase
+import datetime
+import os
+import tempfile
+import time
+
+import massey_standin
+import scraper
+from sports.season import SeasonSnapshot, Conference, Game
+
+date = datetime.date(2024, 11, 2)
+games = {
+    Game(date, "Texas A&M", "Kansas St", False, (24, 17), None),
+    Game(date, "BYU", "Utah", True, (21, 20), None),
+    Game(date + datetime.timedelta(days=7), "Utah", "Texas A&M", False, None, None),
+    Game(date + datetime.timedelta(days=7), "Kansas St", "BYU", True, None, None),
+}
+conferences = {Conference("zzz", {"Texas A&M", "Kansas St", "BYU", "Utah", "Iowa St"}, None, True, None)}
+season = SeasonSnapshot(2024, conferences, games)
+team_ids = {"Texas A&M": "1", "Kansas St": "2", "BYU": "3", "Utah": "4", "Iowa St": "5"}
+
+
+scores_page = b"""<html><head><title>Scores</title></head><body><pre>
+Massey Ratings: Scores and Schedule
+----------------------------------------------------------------
+2024-08-24  Georgia Tech              24  Florida St                21          Dublin, Ireland
+2024-09-07 @Texas A&amp;M               52  McNeese St                10
+2024-10-05  <a href="/team?t=3">BYU</a>                       38 @Baylor                    28 O1
+2024-11-30  Utah                       0 @BYU                        0 Sch
+2024-12-07  Iowa St                    0  Arizona St                 0 Sch   Arlington TX
+</pre><pre>2024-12-14  Army  0  Navy  0 Sch</pre></body></html>"""
+
+
+class _StandInWithoutSchool(massey_standin.MasseyStandIn):
+    """Lists the team `missing` in its searches, but has no page for it"""
+    def __init__(self, missing: str, **kwargs):
+        super().__init__(**kwargs)
+        self.missing = missing
+
+    def page(self, path: str) -> bytes | None:
+        page = super().page(path)
+        return None if path == f"/school?t={self.missing}" else page
+
+
+class ScraperTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.stand_in = massey_standin.MasseyStandIn(season=season, team_ids=team_ids)
+        cls.server = massey_standin.serve(cls.stand_in)
+        cls.massey_url = scraper.massey_url
+        cls.http_cache = scraper.http_cache
+        scraper.massey_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        scraper.http_cache = None
+
+    @classmethod
+    def tearDownClass(cls):
+        scraper.massey_url = cls.massey_url
+        scraper.http_cache = cls.http_cache
+        cls.server.shutdown()
+
+    def test_concurrent_matches_serial(self):
+        matchups = [(a, b, neutral) for a in team_ids for b in team_ids if a != b for neutral in (False, True)]
+        concurrent = scraper.scrape_win_probabilities(matchups, team_ids, max_in_flight=4, requests_per_second=None)
+        serial = {matchup: scraper.scrape_win_probability(*matchup, team_ids) for matchup in matchups}
+        self.assertEqual(concurrent, serial)
+
+    def test_scrape_games(self):
+        scraped = scraper.scrape_games(2024, lambda matchups: scraper.scrape_win_probabilities(matchups, team_ids))
+        def key(game: Game) -> tuple:
+            return game.date, game.team_a, game.team_b, game.neutral, game.final_score
+        self.assertEqual({key(game) for game in scraped}, {key(game) for game in games})
+        for game in scraped:
+            self.assertEqual(game.team_a_win_probability is None, game.final_score is not None)
+
+    def __update(self, new_games: set[Game]) -> tuple[list[scraper.Matchup], dict[tuple, float]]:
+        """Scrapes the season with `new_games` added on top of a previous snapshot of it, returning what was fetched and the probabilities"""
+        previous = SeasonSnapshot(2024, conferences, {game if game.is_over else Game(game.date, game.team_a, game.team_b, game.neutral, None, 0.5) for game in games})
+        self.stand_in.season = SeasonSnapshot(2024, conferences, games | new_games)
+        self.addCleanup(setattr, self.stand_in, "season", season)
+
+        fetched = []
+        def get_win_probabilities(matchups: list[scraper.Matchup]) -> dict[scraper.Matchup, float]:
+            fetched.extend(matchups)
+            return scraper.scrape_win_probabilities(matchups, team_ids)
+        updated = {(game.team_a, game.team_b): game.team_a_win_probability for game in scraper.scrape_games(2024, get_win_probabilities, previous) if not game.is_over}
+        return fetched, updated
+
+    def test_update_without_results_fetches_only_new_games(self):
+        scheduled = Game(date + datetime.timedelta(days=14), "BYU", "Iowa St", False, None, None)
+        fetched, updated = self.__update({scheduled})
+        self.assertEqual(fetched, [("BYU", "Iowa St", False)])
+        self.assertEqual(updated[("Kansas St", "BYU")], 0.5)
+        self.assertEqual(updated[("Utah", "Texas A&M")], 0.5)
+
+    def test_update_after_any_result_fetches_every_game(self):
+        played = Game(date + datetime.timedelta(days=3), "Utah", "Iowa St", False, (10, 7), None)
+        scheduled = Game(date + datetime.timedelta(days=14), "BYU", "Iowa St", False, None, None)
+        fetched, updated = self.__update({played, scheduled})
+        # Kansas St and BYU haven't played since, but the result moves every team's rating
+        self.assertCountEqual(fetched, [("Utah", "Texas A&M", False), ("Kansas St", "BYU", True), ("BYU", "Iowa St", False)])
+        self.assertNotEqual(updated[("Kansas St", "BYU")], 0.5)
+
+    def test_parse_scores(self):
+        parsed = {(game.date, game.team_a, game.team_b, game.neutral, game.final_score) for game in scraper.parse_scores(scores_page)}
+        self.assertEqual(parsed, {
+            (datetime.date(2024, 8, 24), "Georgia Tech", "Florida St", True, (24, 21)),
+            (datetime.date(2024, 9, 7), "McNeese St", "Texas A&M", False, (10, 52)),
+            (datetime.date(2024, 10, 5), "BYU", "Baylor", False, (38, 28)),
+            (datetime.date(2024, 11, 30), "Utah", "BYU", False, None),
+            (datetime.date(2024, 12, 7), "Iowa St", "Arizona St", True, None),
+        })
+
+    def test_rate_limit(self):
+        limiter = scraper.RateLimiter(50, burst=1)
+        start = time.monotonic()
+        for _ in range(11):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 0.19)
+
+    def test_scrape_team_ids_fetches_only_unknown(self):
+        found = {}
+        requests_before = self.stand_in.requests
+        scraped = scraper.scrape_team_ids(2024, {"BYU": "3"}, lambda name, id: found.update({name: id}))
+        self.assertEqual(scraped, team_ids)
+        self.assertEqual(found, {name: id for name, id in team_ids.items() if name != "BYU"})
+        # the name search plus one page per unknown team
+        self.assertEqual(self.stand_in.requests - requests_before, 1 + len(found))
+
+    def test_get_team_ids_scrapes_only_what_is_missing(self):
+        stand_in = _StandInWithoutSchool("99", team_ids=team_ids | {"Gone": "99"})
+        server = massey_standin.serve(stand_in)
+        self.addCleanup(server.shutdown)
+        self.addCleanup(setattr, scraper, "massey_url", scraper.massey_url)
+        scraper.massey_url = f"http://127.0.0.1:{server.server_address[1]}"
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+        os.mkdir("data")
+
+        self.assertEqual(scraper.get_team_ids(2024, ["BYU"]), team_ids)
+        # the name search plus every team's page
+        self.assertEqual(stand_in.requests, 1 + len(team_ids) + 1)
+        self.assertEqual(scraper.get_team_ids(2024, ["BYU", "Utah"]), team_ids)
+        self.assertEqual(stand_in.requests, 1 + len(team_ids) + 1)
+        # a team that isn't in the file is searched for, but the id without a page isn't fetched again
+        self.assertEqual(scraper.get_team_ids(2024, ["Nowhere"]), team_ids)
+        self.assertEqual(stand_in.requests, 1 + len(team_ids) + 1 + 1)
+
+    def test_team_ids_round_trip(self):
+        lines = scraper._serialize_team_ids(team_ids | {None: "99"}).splitlines()
+        self.assertEqual(scraper._deserialize_team_ids(lines), team_ids)
+        self.assertEqual(scraper._deserialize_unresolved_ids(lines), {"99"})
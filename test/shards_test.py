@@ -0,0 +1,56 @@
+from unittest import TestCase
+import concurrent.futures
+import os
+import tempfile
+
+import scheduler
+import shards
+from scheduler_test import _seeded, _merge
+
+
+def _jobs(cells: list[tuple[int, int]]) -> list[scheduler.Job]:
+    return [scheduler.Job("job", _seeded, (), None, merge=_merge, seed="1/job")] + [scheduler.Job(cell, _seeded, (), None, merge=_merge, seed=f"1/{cell}") for cell in cells]
+
+
+def _run_shard(chunks: range) -> shards.Shard:
+    with concurrent.futures.ThreadPoolExecutor(1) as executor:
+        # like the scenario grid's cells, each draw of the pilot under a half gets a job of its own
+        pilot = shards.pilot(executor, _jobs([]), 10)[0]
+        cells = [(0, n) for n, draw in enumerate(pilot.result) if draw < 0.5]
+        jobs = _jobs(cells)
+        scheduler.run_range(executor, jobs, chunks, 10, 1)
+    states = {job.key: {"result": job.result, "completed": job.completed, "seconds": job.seconds, "failed": job.failed} for job in jobs}
+    return shards.Shard("abc", {"seed": 1, "chunk_iterations": 10}, (chunks.start, chunks.stop), states, cells)
+
+
+class ShardsTest(TestCase):
+    def test_save_and_load(self):
+        shard = _run_shard(range(0, 2))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "run", "shard.pickle.gz")
+            shards.save(shard, path)
+            self.assertEqual(shards.load(path), shard)
+
+    def test_ranges_merge_into_the_whole_run(self):
+        whole = _run_shard(range(0, 4))
+        parts = [_run_shard(range(2, 4)), _run_shard(range(0, 2))]
+        self.assertTrue(whole.fallbacks)
+        self.assertEqual(shards.fallbacks(parts), whole.fallbacks)
+        jobs = _jobs(shards.fallbacks(parts))
+        merged = shards.merge_into(parts, jobs)
+        self.assertEqual(merged, 40 * len(jobs))
+        for job in jobs:
+            self.assertEqual(job.completed, 40)
+            self.assertEqual(sorted(job.result), sorted(whole.jobs[job.key]["result"]))
+        self.assertEqual(len(set(jobs[0].result)), 40)
+
+    def test_mismatch(self):
+        first, second = _run_shard(range(0, 2)), _run_shard(range(2, 4))
+        self.assertIsNone(shards.mismatch([first, second], "abc", {"seed": 1}))
+        self.assertIn("snapshot", shards.mismatch([first, second], "def", {}))
+        self.assertIn("seed is 1, not 2", shards.mismatch([first, second], "abc", {"seed": 2}))
+        self.assertIn("chunks 1 to 1", shards.mismatch([first, _run_shard(range(1, 3))], "abc", {}))
+        second.fallbacks = second.fallbacks[1:]
+        self.assertIn("different scenario grid cells", shards.mismatch([first, second], "abc", {}))
+        second.config["chunk_iterations"] = 20
+        self.assertIn("different settings", shards.mismatch([first, second], "abc", {}))
@@ -0,0 +1,63 @@
+from unittest import TestCase
+import datetime
+import random
+
+from simulator import Simulator
+from sports import timing, tiebreakers
+from sports.outcomes import ScenarioOutcomes, beat, win_out
+from sports.season import SeasonSnapshot, Conference, Game
+
+date = datetime.date.today()
+teams = ["a", "b", "c", "d"]
+games = {Game(date, a, b, False, None, 0.5) for i, a in enumerate(teams) for b in teams[i + 1:]}
+season = SeasonSnapshot(2024, {Conference("zzz", set(teams), None, True, tiebreakers.big12_championship_seeder)}, games)
+
+
+def _simulate(iterations: int) -> Simulator:
+    simulator = Simulator(season)
+    simulator.simulate(iterations)
+    return simulator
+
+
+class TimingsTest(TestCase):
+    def test_merge(self):
+        timings = timing.Timings()
+        timings.add("roll", 1.0)
+        other = timing.Timings()
+        other.add("roll", 0.5, 2)
+        other.add("seeding", 0.25)
+        timings |= other
+        self.assertEqual(timings.to_json(), {"roll": {"seconds": 1.5, "calls": 3}, "seeding": {"seconds": 0.25, "calls": 1}})
+
+    def test_table_nests_phases_under_their_outer_phase(self):
+        timings = timing.Timings()
+        timings.add("standings", 1.0)
+        timings.add("seeding", 2.0)
+        timings.add("seeding / coin_toss", 0.5)
+        timings.add("seeding / head_to_head", 1.0)
+        names = [line[:48].rstrip() for line in timings.table().splitlines()[1:]]
+        self.assertEqual(names, ["seeding", "  head_to_head", "  coin_toss", "standings"])
+
+    def test_off_unless_collecting(self):
+        random.seed(0)
+        _simulate(10)
+        self.assertIsNone(timing.current)
+
+    def test_simulate_times_every_phase(self):
+        random.seed(0)
+        with timing.collecting() as timings:
+            _simulate(50)
+        for phase in ["roll", "team construction", "standings", "seeding", "conference outcomes", "week outcomes"]:
+            self.assertEqual(timings.phases[phase].calls, 50)
+        self.assertIn("seeding / head_to_head", timings.phases)
+        self.assertIsNone(timing.current)
+
+    def test_scenario_grid_times_every_phase(self):
+        random.seed(0)
+        simulator = Simulator(season)
+        with timing.collecting() as timings:
+            simulator.simulate_shared(ScenarioOutcomes(beat(season, "a", "b")), [ScenarioOutcomes(beat(season, "a", "b"), win_out(season, "c"))], 50)
+            simulator.simulate_scenario(ScenarioOutcomes(beat(season, "b", "a")), 50)
+        for phase in ["roll", "team construction", "standings", "seeding", "scenario checks"]:
+            self.assertEqual(timings.phases[phase].calls, 100)
+        self.assertIn("seeding / head_to_head", timings.phases)
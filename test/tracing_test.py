@@ -0,0 +1,106 @@
+from unittest import TestCase
+import collections
+import concurrent.futures
+import json
+import datetime
+import os
+import pickle
+import tempfile
+import time
+
+import scheduler
+import tracing
+from sports import binary_snapshot
+from sports.season import SeasonSnapshot, Conference, Game
+
+
+def _count(iterations: int) -> list[int]:
+    return [iterations]
+
+
+def _merge(result: list[int], other: list[int]) -> list[int]:
+    return result + other
+
+
+def _no_seeder(conference: str) -> None:
+    return None
+
+
+def _game_count(season: SeasonSnapshot) -> tuple[int, SeasonSnapshot]:
+    return len(season.games), season
+
+
+class TracerTest(TestCase):
+    def setUp(self):
+        tracing.tracer = tracing.Tracer()
+
+    def tearDown(self):
+        tracing.tracer = None
+
+    def test_traced_results_match(self):
+        jobs = [scheduler.Job(i, _count, (), iterations, merge=_merge) for i, iterations in enumerate([10, 1000])]
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            scheduler.run(tracing.TracedExecutor(executor, tracing.tracer), jobs, 2, min_chunk_seconds=0)
+        for job in jobs:
+            self.assertEqual(sum(job.result), job.iterations)
+
+    def test_every_task_has_its_events(self):
+        job = scheduler.Job("job", _count, (), 1000, merge=tracing.traced("merge", _merge))
+        with concurrent.futures.ThreadPoolExecutor(2) as executor, tracing.span("run chunks"):
+            scheduler.run(tracing.TracedExecutor(executor, tracing.tracer), [job], 2, min_chunk_seconds=0)
+        tasks = sum(tasks for _, tasks in tracing.tracer.utilization().values())
+        names = collections.Counter((event["ph"], event["name"]) for event in tracing.tracer.events)
+        self.assertGreaterEqual(tasks, 2)
+        for name in ["pickle arguments", "unpickle arguments", "run", "pickle result", "unpickle result"]:
+            self.assertEqual(names["X", name], tasks, name)
+        for name in ["queued", "result returned"]:
+            self.assertEqual(names["b", name], tasks, name)
+            self.assertEqual(names["e", name], tasks, name)
+        # the first chunk's result is the job's, so needs no merge
+        self.assertEqual(names["X", "merge"], tasks - 1)
+        self.assertEqual(names["X", "run chunks"], 1)
+        self.assertEqual(names["X", "_count job (100 iterations)"], 1)
+
+    def test_result_returned_ends_when_the_result_is_back(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            future = tracing.tracer.submit(executor, "task", "test", _count, 10)
+            concurrent.futures.wait([future])
+            time.sleep(0.2)
+            self.assertEqual(tracing.tracer.result(future), [10])
+        returned = [event["ts"] for event in tracing.tracer.events if event["name"] == "result returned"]
+        self.assertLess(returned[1] - returned[0], 0.1e6)
+
+    def test_shared_seasons_are_sent_by_reference(self):
+        teams = [f"Team {i}" for i in range(12)]
+        games = {Game(datetime.date(2024, 11, 2), a, b, False, None, 0.5) for i, a in enumerate(teams) for b in teams[i + 1:]}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "season.bin")
+            binary_snapshot.save(SeasonSnapshot(2024, {Conference("zzz", set(teams), None, True, None)}, games), path)
+            season = binary_snapshot.load_shared(path, _no_seeder)
+            with concurrent.futures.ThreadPoolExecutor(1) as executor:
+                future = tracing.tracer.submit(executor, "task", "test", _game_count, season)
+                concurrent.futures.wait([future])
+                count, returned = tracing.tracer.result(future)
+        self.assertEqual(count, len(games))
+        self.assertIs(returned, season)
+        sent = {event["name"]: event["args"]["bytes"] for event in tracing.tracer.events if "bytes" in event.get("args", {})}
+        self.assertLess(sent["pickle arguments"], len(pickle.dumps(season)) / 10)
+        self.assertLess(sent["pickle result"], len(pickle.dumps(season)) / 10)
+
+    def test_save(self):
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            scheduler.run(tracing.TracedExecutor(executor, tracing.tracer), [scheduler.Job("job", _count, (), 100, merge=_merge)], 1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "trace.json")
+            tracing.tracer.save(path)
+            with open(path) as f:
+                trace = json.load(f)
+        self.assertIn({"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "main"}}, trace["traceEvents"])
+        for event in trace["traceEvents"]:
+            if event["ph"] == "X":
+                self.assertGreaterEqual(event["dur"], 0)
+
+    def test_span_without_tracer(self):
+        tracing.tracer = None
+        with tracing.span("nothing"):
+            pass